@@ -0,0 +1,246 @@
+"""Benchmark du dashboard sur une base synthétique.
+
+Chaque taille tourne dans un sous-processus isolé (dossier temporaire, caches vides).
+`go run` et les API CoinGecko/MEXC sont remplacés par des stubs locaux.
+Le rapport donne p50/p99, la taille des réponses et le pic mémoire par route.
+
+    python3 benchmark.py --rows 1000 100000 --save bench_baseline.json
+    python3 benchmark.py --rows 1000 100000 --compare bench_baseline.json
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+try:
+    import resource
+except ImportError:
+    resource = None
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ROWS = [1000, 10000, 100000]
+DEFAULT_RUNS = 30
+DEFAULT_THRESHOLD = 1.25
+BENCH_ROUTES = [
+    ("data", "/api/data"),
+    ("cycles_page", "/api/cycles?limit=50"),
+    ("cycles_page_columns", "/api/cycles?limit=500&format=columns"),
+    ("performance", "/api/performance"),
+    ("performance_lttb", "/api/performance?points=500"),
+    ("performance_columns", "/api/performance?format=columns"),
+    ("gains_distribution", "/api/gains-distribution"),
+    ("gains_quantile", "/api/gains-distribution?mode=quantile&bins=20"),
+    ("active_timeline", "/api/active-cycles-timeline"),
+    ("active_history", "/api/active-cycles-history"),
+    ("active_history_split", "/api/active-cycles-history-split"),
+    ("active_history_hour", "/api/active-cycles-history-split?bucket=hour&days=7"),
+]
+JOB_ROUTE = ("job_update", "/api/update-cycles?wait=1")
+JOB_RUNS = 5
+# Les anciens cycles sont presque tous terminés, les cycles actifs se concentrent sur les plus récents
+STATUS_MIX_OLD = [("completed", 0.97), ("order_sell_placed", 0.02), ("order_buy_placed", 0.01)]
+STATUS_MIX_RECENT = [("completed", 0.40), ("order_buy_placed", 0.30), ("order_sell_placed", 0.25), ("order_buy_filled", 0.05)]
+RECENT_FRACTION = 0.05
+CYCLES_SCHEMA = """
+CREATE TABLE cycles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    status TEXT,
+    quantity REAL,
+    buyPrice REAL,
+    sellPrice REAL,
+    buyId TEXT,
+    sellId TEXT,
+    percent REAL,
+    dedicatedBalance REAL,
+    createdAt DATETIME,
+    completedAt DATETIME
+)
+"""
+
+# ============ GENERATEUR DE BASE SYNTHETIQUE ============
+
+def _pick_status(rng, mix):
+    r = rng.random()
+    for status, weight in mix:
+        if r < weight:
+            return status
+        r -= weight
+    return mix[-1][0]
+
+def generate_cycles_db(path, rows, seed=42, days=180):
+    """Crée db/bot.db avec le schéma cycles et un mélange de statuts réaliste (reproductible via seed)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if os.path.exists(path):
+        os.remove(path)
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute(CYCLES_SCHEMA)
+    start = datetime.now() - timedelta(days=days)
+    step = days * 86400 / max(rows, 1)
+    recent_from = int(rows * (1 - RECENT_FRACTION))
+    price = 60000.0
+    batch = []
+    for i in range(rows):
+        price = max(10000.0, price + rng.gauss(0, 40))
+        status = _pick_status(rng, STATUS_MIX_RECENT if i >= recent_from else STATUS_MIX_OLD)
+        created = start + timedelta(seconds=i * step)
+        buy_price = round(price - rng.uniform(100, 600), 2)
+        sell_price = round(buy_price * (1 + rng.uniform(-0.002, 0.012)), 2)
+        completed = (created + timedelta(hours=rng.expovariate(1 / 12))).strftime("%Y-%m-%d %H:%M:%S") if status == "completed" else None
+        quantity = round(rng.uniform(0.0005, 0.003), 8)
+        batch.append((status, quantity, buy_price, sell_price, f"B{i}", f"S{i}" if status != "order_buy_placed" else "", 3, round(quantity * buy_price, 2), created.strftime("%Y-%m-%d %H:%M:%S"), completed))
+        if len(batch) >= 50000:
+            conn.executemany("INSERT INTO cycles (status, quantity, buyPrice, sellPrice, buyId, sellId, percent, dedicatedBalance, createdAt, completedAt) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+            batch = []
+    if batch:
+        conn.executemany("INSERT INTO cycles (status, quantity, buyPrice, sellPrice, buyId, sellId, percent, dedicatedBalance, createdAt, completedAt) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+    conn.commit()
+    conn.close()
+
+# ============ STUBS (API EXTERNES + BOT) ============
+
+class StubApiHandler(BaseHTTPRequestHandler):
+    """Répond comme CoinGecko (prix) et MEXC (balances), sans latence réseau"""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith("/api/v3/simple/price"):
+            body = {"bitcoin": {"usd": 65000.12}}
+        else:
+            body = {"balances": [{"asset": "USDC", "free": "1500.5", "locked": "250"}, {"asset": "BTC", "free": "0.02", "locked": "0.01"}]}
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+def start_stub_api():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubApiHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+# ============ MESURES (SOUS-PROCESSUS PAR TAILLE) ============
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+def time_route(client, method, url, runs):
+    start = time.perf_counter()
+    response = client.open(url, method=method)
+    cold_ms = (time.perf_counter() - start) * 1000
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        response = client.open(url, method=method)
+        latencies.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    client.open(url, method=method)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"status": response.status_code, "cold_ms": round(cold_ms, 3), "p50_ms": round(percentile(latencies, 50), 3), "p99_ms": round(percentile(latencies, 99), 3), "bytes": len(response.get_data()), "peak_kb": round(peak / 1024, 1)}
+
+def run_worker(rows, runs, seed):
+    """Mesure une taille de base dans un dossier temporaire; imprime le résultat en JSON sur stdout"""
+    workdir = tempfile.mkdtemp(prefix="dashboard-bench-")
+    os.chdir(workdir)
+    start = time.perf_counter()
+    generate_cycles_db(os.path.join("db", "bot.db"), rows, seed)
+    generate_seconds = time.perf_counter() - start
+    with open("bot.conf", "w") as f:
+        f.write('MEXC_API_KEY="bench"\nMEXC_SECRET_KEY="bench"\nBUY_OFFSET=-400\nSELL_OFFSET=500\nPERCENT=3\n')
+    stub_url = start_stub_api()
+    # Variables lues à l'import du dashboard
+    os.environ.update({"COINGECKO_URL": stub_url, "MEXC_API_URL": stub_url, "BOT_PREBUILT": "0", "PRICE_STREAM": "0"})
+    sys.path.insert(0, ROOT)
+    import dashboard
+    dashboard.BOT_COMMAND = [sys.executable, "-c", "import sys; print('bot stub', *sys.argv[1:])"]
+    dashboard.load_config()
+    dashboard.init_database()
+    client = dashboard.app.test_client()
+    results = {}
+    for name, url in BENCH_ROUTES:
+        results[name] = time_route(client, "GET", url, runs)
+    results[JOB_ROUTE[0]] = time_route(client, "POST", JOB_ROUTE[1], JOB_RUNS)
+    print(json.dumps({"rows": rows, "generate_seconds": round(generate_seconds, 3), "db_bytes": os.path.getsize(os.path.join("db", "bot.db")), "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None, "routes": results}))
+    os.chdir(ROOT)
+    shutil.rmtree(workdir, ignore_errors=True)
+
+def run_size(rows, runs, seed):
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", str(rows), "--runs", str(runs), "--seed", str(seed)], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"benchmark {rows} lignes en echec:\n{result.stderr}")
+    # Le dashboard imprime ses propres messages: le résultat est la dernière ligne
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+# ============ RAPPORT ET COMPARAISON ============
+
+def print_report(report, baseline=None, threshold=DEFAULT_THRESHOLD):
+    """Affiche le tableau des mesures; retourne la liste des régressions p50 par rapport au baseline"""
+    regressions = []
+    base_sizes = {str(size["rows"]): size for size in (baseline or {}).get("sizes", [])}
+    for size in report["sizes"]:
+        rss = f"{size['max_rss_kb'] / 1024:.0f} Mo" if size["max_rss_kb"] else "?"
+        print(f"\n📊 {size['rows']:,} cycles (generation {size['generate_seconds']}s, base {size['db_bytes'] / 1e6:.1f} Mo, RSS max {rss})")
+        print(f"{'route':<24}{'froid ms':>10}{'p50 ms':>10}{'p99 ms':>10}{'octets':>12}{'pic Ko':>10}{'vs base':>10}")
+        base_routes = base_sizes.get(str(size["rows"]), {}).get("routes", {})
+        for name, stats in size["routes"].items():
+            compare = ""
+            base = base_routes.get(name)
+            if base and base["p50_ms"] > 0:
+                ratio = stats["p50_ms"] / base["p50_ms"]
+                compare = f"x{ratio:.2f}"
+                if ratio > threshold:
+                    compare += " ⚠️"
+                    regressions.append((size["rows"], name, base["p50_ms"], stats["p50_ms"]))
+            print(f"{name:<24}{stats['cold_ms']:>10.2f}{stats['p50_ms']:>10.2f}{stats['p99_ms']:>10.2f}{stats['bytes']:>12}{stats['peak_kb']:>10.1f}{compare:>10}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des routes du dashboard sur une base synthetique")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS, help="tailles de base (nombre de cycles)")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="requetes mesurees par route (apres la requete a froid)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="enregistre le resultat comme baseline JSON")
+    parser.add_argument("--compare", help="compare au baseline JSON (code de sortie 1 si regression)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="ratio p50 au-dela duquel une route est signalee")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker is not None:
+        run_worker(args.worker, args.runs, args.seed)
+        return 0
+    report = {"created_at": datetime.now().isoformat(), "python": sys.version.split()[0], "runs": args.runs, "seed": args.seed, "sizes": []}
+    for rows in args.rows:
+        print(f"⏱️  Benchmark {rows:,} cycles...")
+        report["sizes"].append(run_size(rows, args.runs, args.seed))
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+    regressions = print_report(report, baseline, args.threshold)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Baseline enregistre: {args.save}")
+    if regressions:
+        print(f"\n⚠️  {len(regressions)} regression(s) p50 > x{args.threshold}:")
+        for rows, name, before, after in regressions:
+            print(f"   {rows:,} cycles - {name}: {before:.2f} ms -> {after:.2f} ms")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
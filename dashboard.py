@@ -6,39 +6,228 @@ import hashlib
 import time
 import subprocess
 import json
+import csv
+import io
+import zlib
+import re
 import threading
-from flask import Flask, render_template, jsonify, request, send_file
-from datetime import datetime, timedelta
+import queue
+import uuid
+import concurrent.futures
+from collections import namedtuple, deque
+import bisect
+import functools
+import tempfile
+import stat
+from types import MappingProxyType
+from array import array
+import heapq
+import random
+import asyncio
+import importlib.util
+from urllib.parse import quote
+from contextlib import contextmanager
+from flask import Flask, Response, render_template, jsonify, request, send_file, g
+from flask.json.provider import DefaultJSONProvider
+from datetime import datetime, timedelta, timezone
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 app = Flask(__name__, static_folder='static', static_url_path='/static')
 
+# ============ SERIALISATION JSON (ORJSON SI DISPONIBLE) ============
+
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify via orjson (encodeur C, directement en bytes) s'il est installé, sinon l'encodeur standard de Flask"""
+    options = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+    @staticmethod
+    def default(o):
+        # Colonnes du magasin de cycles (array) et namedtuples sérialisés comme des listes
+        if isinstance(o, (array, tuple)):
+            return list(o)
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs.keys() - {"separators"}:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self.options).decode()
+
+    def response(self, *args, **kwargs):
+        if orjson is None or self._app.debug:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, default=self.default, option=self.options), mimetype=self.mimetype)
+
+app.json = FastJSONProvider(app)
+
 DB_PATH = "db/bot.db"
-CONFIG = {}
+DB_POOL_SIZE = 8
+DB_BUSY_TIMEOUT_MS = 5000
+DB_CACHE_SIZE_KB = 16384
+DB_MMAP_SIZE = 256 * 1024 * 1024
+DB_CACHED_STATEMENTS = 128
+CYCLES_PAGE_SIZE = 50
+CYCLES_PAGE_MAX = 500
+STATS_CHECK_INTERVAL = 600
+HISTOGRAM_DEFAULT_BINS = 8
+HISTOGRAM_MAX_BINS = 100
+HISTORY_BUCKETS = {"hour": 3600, "day": 86400, "week": 7 * 86400}
+HISTORY_DEFAULT_BUCKET = "day"
+HISTORY_MAX_BUCKETS = 5000
+EXPORT_CHUNK_ROWS = 1000
+SQL_IN_CHUNK = 500
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson", "json": "application/json", "parquet": "application/vnd.apache.parquet"}
+CHANGELOG_RETENTION = 20000
+JOB_WORKERS = 2
+JOB_TIMEOUT = 30
+JOB_HISTORY = 200
+BATCH_MAX_ITEMS = 100
+BATCH_MIN_INTERVAL = float(os.environ.get("BATCH_MIN_INTERVAL", "0.5"))
+BOT_COMMAND = ['go', 'run', '.']
+BOT_PREBUILT = os.environ.get("BOT_PREBUILT", "1") != "0"
+BOT_BINARY = os.path.join("bin", "bot.exe" if os.name == "nt" else "bot")
+BOT_BUILD_STATE_FILE = os.path.join("bin", ".bot_build.json")
+BOT_BUILD_TIMEOUT = 300
+BOT_SOURCE_CHECK_INTERVAL = 2
+STREAM_POLL_INTERVAL = 1
+STREAM_KEEPALIVE = 15
+STREAM_QUEUE_SIZE = 100
+STREAM_AUTO_RESYNC = 30
+SNAPSHOT_INTERVALS = {"db": 5, "price": 15, "balances": 30}
+SNAPSHOT_MAX_WAIT = 3
+SNAPSHOT_STALE_FACTOR = 3
+CONFIG_FILE = "bot.conf"
+CONFIG_WATCH_INTERVAL = 1
+CONFIG = MappingProxyType({})
 BTC_PRICE_CACHE = {"price": 0, "timestamp": 0}
 CACHE_DURATION = 60
+BALANCES_CACHE = {"data": None, "timestamp": 0}
+BALANCES_CACHE_DURATION = 20
+COINGECKO_URL = os.environ.get("COINGECKO_URL", "https://api.coingecko.com")
+MEXC_API_URL = os.environ.get("MEXC_API_URL", "https://api.mexc.com")
+HTTP_POOL_SIZE = 10
+HTTP_RETRIES = 2
+HTTP_BACKOFF = 0.5
+SINGLE_FLIGHT_WAIT = 30
+PRICE_STREAM_ENABLED = os.environ.get("PRICE_STREAM", "0") == "1"
+MEXC_WS_URL = os.environ.get("MEXC_WS_URL", "wss://wbs.mexc.com/ws")
+MEXC_WS_CHANNEL = os.environ.get("MEXC_WS_CHANNEL", "spot@public.bookTicker.v3.api@BTCUSDC")
+PRICE_STREAM_STALE = 5
+PRICE_STREAM_PING = 20
+PRICE_STREAM_PUBLISH_INTERVAL = 1
+STATE_DB_PATH = os.path.join("db", "dashboard_state.db")
+STATE_LOCK_DIR = os.path.join("db", "locks")
+STATE_SYNC_INTERVAL = 1
+LEADER_RETRY_INTERVAL = 10
+AUTO_CATCHUP_POLICIES = ("once", "skip", "catchup")
+AUTO_OPTION_KEYS = ("update_interval_seconds", "catchup_policy", "jitter_seconds")
+AUTO_CATCHUP_MAX = 5
+METRICS_ENABLED = os.environ.get("METRICS", "1") != "0"
+COMPRESS_ENABLED = os.environ.get("COMPRESS", "1") != "0"
+COMPRESS_MIN_BYTES = 1024
+COMPRESS_GZIP_LEVEL = 6
+COMPRESS_BROTLI_QUALITY = 5
+COMPRESS_MIMETYPES = {"application/json", "text/html", "text/css", "text/javascript", "application/javascript", "text/plain", "image/svg+xml"}
+WARMUP_ENABLED = os.environ.get("WARMUP", "1") != "0"
+WARMUP_MAX_WAIT = 10
+METRIC_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
 
 AUTO_CONFIG_FILE = "auto_config.json"
 AUTO_STATE = {
     "enabled": False,
     "interval_minutes": 30,
     "last_cycle_time": None,
-    "next_cycle_time": None
+    "next_cycle_time": None,
+    "update_interval_seconds": 120,
+    "catchup_policy": "once",
+    "jitter_seconds": 0
 }
 
-def load_config():
+# Instantané immuable et versionné de bot.conf: les lecteurs prennent la référence courante,
+# un rechargement la remplace en bloc (jamais de dict modifié pendant une lecture)
+CONFIG_STATE = {"version": 0, "stat": None, "checked_at": 0, "missing": False}
+CONFIG_LOCK = threading.RLock()
+
+def parse_config(lines):
+    config = {}
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if "=" in line:
+            key, value = line.split("=", 1)
+            config[key] = value.strip('"')
+    return config
+
+def load_config(force=False):
+    """(Re)charge bot.conf si le fichier a changé (mtime/taille); retourne True si l'instantané a été remplacé"""
     global CONFIG
-    if not os.path.exists("bot.conf"):
-        print("⚠️  Fichier bot.conf introuvable")
-        return
-    with open("bot.conf", "r") as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-            if "=" in line:
-                key, value = line.split("=", 1)
-                CONFIG[key] = value.strip('"')
-    print(f"✅ Config chargee: {len(CONFIG)} parametres")
+    with CONFIG_LOCK:
+        CONFIG_STATE["checked_at"] = time.time()
+        try:
+            file_stat = os.stat(CONFIG_FILE)
+        except FileNotFoundError:
+            if not CONFIG_STATE["missing"]:
+                print(f"⚠️  Fichier {CONFIG_FILE} introuvable")
+            CONFIG_STATE["missing"] = True
+            return False
+        CONFIG_STATE["missing"] = False
+        signature = (file_stat.st_mtime_ns, file_stat.st_size, file_stat.st_ino)
+        if not force and signature == CONFIG_STATE["stat"]:
+            return False
+        with open(CONFIG_FILE, "r") as f:
+            config = parse_config(f)
+        CONFIG_STATE["stat"] = signature
+        if config == dict(CONFIG) and CONFIG_STATE["version"]:
+            return False
+        CONFIG = MappingProxyType(config)
+        CONFIG_STATE["version"] += 1
+    print(f"✅ Config chargee: {len(config)} parametres (version {CONFIG_STATE['version']})")
+    return True
+
+def watch_config():
+    """Détecte les modifications externes de bot.conf (au plus un stat par CONFIG_WATCH_INTERVAL)"""
+    if time.time() - CONFIG_STATE["checked_at"] < CONFIG_WATCH_INTERVAL:
+        return False
+    return load_config()
+
+def write_config(updates):
+    """Remplace les valeurs des clés existantes de bot.conf: écriture atomique (fichier temporaire + os.replace) sous verrou"""
+    with CONFIG_LOCK, process_lock("config"):
+        with open(CONFIG_FILE, "r") as f:
+            lines = f.readlines()
+        new_lines = []
+        for line in lines:
+            key = line.strip().split("=", 1)[0]
+            if "=" in line and updates.get(key) is not None:
+                new_lines.append(f"{key}={updates[key]}\n")
+            else:
+                new_lines.append(line)
+        directory = os.path.dirname(os.path.abspath(CONFIG_FILE))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".bot.conf.")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.writelines(new_lines)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(temp_path, stat.S_IMODE(os.stat(CONFIG_FILE).st_mode))
+            os.replace(temp_path, CONFIG_FILE)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        load_config(force=True)
+    return CONFIG
 
 def load_auto_config():
     global AUTO_STATE
@@ -47,49 +236,655 @@ def load_auto_config():
             with open(AUTO_CONFIG_FILE, "r") as f:
                 saved_config = json.load(f)
                 AUTO_STATE.update(saved_config)
-                print(f"✅ Config auto chargee: enabled={AUTO_STATE['enabled']}, interval={AUTO_STATE['interval_minutes']}min")
+        # L'état partagé fait foi: un autre worker a pu modifier le mode auto depuis l'écriture du fichier
+        AUTO_STATE.update(state_get("auto", {}))
+        print(f"✅ Config auto chargee: enabled={AUTO_STATE['enabled']}, interval={AUTO_STATE['interval_minutes']}min")
     except Exception as e:
         print(f"⚠️  Erreur chargement config auto: {e}")
 
+# ============ METRIQUES (FORMAT TEXTE PROMETHEUS) ============
+
+# Compteurs et histogrammes en mémoire, par worker; rendus à la demande par /metrics
+METRICS = {"histograms": {}, "counters": {}}
+METRICS_LOCK = threading.Lock()
+METRICS_HELP = {
+    "dashboard_http_request_duration_seconds": ("histogram", "Durée des requêtes HTTP par route"),
+    "dashboard_sqlite_query_duration_seconds": ("histogram", "Durée d'exécution des requêtes SQLite (jusqu'à la première ligne)"),
+    "dashboard_external_request_duration_seconds": ("histogram", "Latence des appels aux API externes"),
+    "dashboard_external_request_errors_total": ("counter", "Erreurs des appels aux API externes"),
+    "dashboard_single_flight_shared_total": ("counter", "Appels externes évités (réponse partagée en vol)"),
+    "dashboard_job_duration_seconds": ("histogram", "Durée des jobs du bot"),
+    "dashboard_jobs_total": ("counter", "Jobs du bot terminés par code de sortie"),
+    "dashboard_batch_items_total": ("counter", "Opérations des jobs par lot, par résultat"),
+    "dashboard_cache_requests_total": ("counter", "Accès aux caches (hit/miss)"),
+    "dashboard_http_compressed_total": ("counter", "Réponses HTTP compressées par encodage"),
+    "dashboard_scheduler_drift_seconds": ("histogram", "Retard du planificateur auto par rapport à l'échéance"),
+}
+SQL_LABELS = {}
+
+def _metric_key(name, labels):
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def observe(name, value, **labels):
+    if not METRICS_ENABLED:
+        return
+    key = _metric_key(name, labels)
+    with METRICS_LOCK:
+        histogram = METRICS["histograms"].get(key)
+        if histogram is None:
+            histogram = METRICS["histograms"][key] = {"buckets": [0] * len(METRIC_BUCKETS), "sum": 0.0, "count": 0}
+        index = bisect.bisect_left(METRIC_BUCKETS, value)
+        if index < len(METRIC_BUCKETS):
+            histogram["buckets"][index] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+
+def inc(name, amount=1, **labels):
+    if not METRICS_ENABLED:
+        return
+    key = _metric_key(name, labels)
+    with METRICS_LOCK:
+        METRICS["counters"][key] = METRICS["counters"].get(key, 0) + amount
+
+def cache_event(cache, hit):
+    inc("dashboard_cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+def sql_label(sql):
+    """Étiquette courte et bornée d'une requête: opération + table (ex: 'SELECT cycles')"""
+    label = SQL_LABELS.get(sql)
+    if label is None:
+        words = sql.split(None, 1)
+        operation = words[0].upper() if words else "?"
+        match = re.search(r"\b(?:FROM|INTO|UPDATE|TABLE|ON)\s+(\w+)", sql, re.IGNORECASE)
+        label = f"{operation} {match.group(1)}" if match else operation
+        if len(SQL_LABELS) < 1000:
+            SQL_LABELS[sql] = label
+    return label
+
+class TimedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            observe("dashboard_sqlite_query_duration_seconds", time.perf_counter() - start, query=sql_label(sql))
+
+class TimedConnection(sqlite3.Connection):
+    """Connexion instrumentée: chaque execute() est chronométré sans toucher au code appelant"""
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            observe("dashboard_sqlite_query_duration_seconds", time.perf_counter() - start, query=sql_label(sql))
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+DB_CONNECTION_FACTORY = TimedConnection if METRICS_ENABLED else sqlite3.Connection
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in pairs) + "}"
+
+def render_metrics():
+    """Exposition texte Prometheus des compteurs, histogrammes et jauges du worker courant"""
+    with METRICS_LOCK:
+        histograms = {key: {"buckets": value["buckets"][:], "sum": value["sum"], "count": value["count"]} for key, value in METRICS["histograms"].items()}
+        counters = dict(METRICS["counters"])
+    lines = []
+    for name, (kind, help_text) in METRICS_HELP.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "counter":
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+            continue
+        for (metric, labels), histogram in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(METRIC_BUCKETS, histogram["buckets"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', str(bound))])} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {histogram['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram['sum']:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+    caches = {}
+    for (metric, labels), value in counters.items():
+        if metric == "dashboard_cache_requests_total":
+            label_map = dict(labels)
+            hits, total = caches.get(label_map["cache"], (0, 0))
+            caches[label_map["cache"]] = (hits + (value if label_map["result"] == "hit" else 0), total + value)
+    gauges = [
+        ("dashboard_cache_hit_ratio", "Taux de hit par cache", [((("cache", cache),), round(hits / total, 4)) for cache, (hits, total) in sorted(caches.items()) if total]),
+        ("dashboard_scheduler_last_drift_seconds", "Dernier retard du planificateur auto (publié par le leader)", [((("task", task),), drift) for task, drift in sorted(SCHEDULER_VIEW.get("last_drift", {}).items()) if drift is not None]),
+        ("dashboard_scheduler_max_drift_seconds", "Retard maximal du planificateur auto", [((("task", task),), drift) for task, drift in sorted(SCHEDULER_VIEW.get("max_drift", {}).items())]),
+        ("dashboard_scheduler_missed_cycles", "Cycles manqués pendant un arrêt", [((), SCHEDULER_VIEW.get("missed_cycles", 0))]),
+        ("dashboard_scheduler_skipped_updates", "Mises à jour sautées faute de cycle actif", [((), SCHEDULER_VIEW.get("skipped_updates", 0))]),
+        ("dashboard_job_queue_depth", "Jobs en attente par type", [((("kind", kind),), len(pending)) for kind, pending in sorted(JOB_QUEUES.items())]),
+        ("dashboard_stream_subscribers", "Clients SSE connectés", [((), len(STREAM_SUBSCRIBERS))]),
+        ("dashboard_leader", "1 si ce worker exécute le planificateur auto", [((("pid", str(os.getpid())),), int(LEADER["is_leader"]))]),
+        ("dashboard_ready", "1 quand le préchauffage du worker est terminé", [((), int(is_ready()))]),
+        ("dashboard_startup_step_seconds", "Durée des étapes du démarrage", [((("step", step["step"]),), step["seconds"]) for step in STARTUP["steps"]]),
+    ]
+    for name, help_text, samples in gauges:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in samples:
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.get("request_started")
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "<inconnue>"
+        observe("dashboard_http_request_duration_seconds", time.perf_counter() - started, route=route, method=request.method, status=response.status_code)
+    return response
+
+# ============ ACCES SQLITE (POOL LECTURE + ECRIVAIN UNIQUE) ============
+
+DB_READ_POOL = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+DB_WRITE_LOCK = threading.Lock()
+DB_WRITER = {"conn": None}
+
+def _tune_connection(conn):
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA cache_size = -{DB_CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size = {DB_MMAP_SIZE}")
+    return conn
+
+def _open_read_connection():
+    # Connexion URI en lecture seule: le dashboard ne prend jamais de verrou d'écriture en lisant
+    uri = f"file:{quote(os.path.abspath(DB_PATH))}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, timeout=DB_BUSY_TIMEOUT_MS / 1000, check_same_thread=False, cached_statements=DB_CACHED_STATEMENTS, factory=DB_CONNECTION_FACTORY)
+    conn.execute("PRAGMA query_only = ON")
+    return _tune_connection(conn)
+
+@contextmanager
+def read_db():
+    """Emprunte une connexion de lecture au pool (les requêtes préparées restent en cache par connexion)"""
+    try:
+        conn = DB_READ_POOL.get_nowait()
+    except queue.Empty:
+        conn = _open_read_connection()
+    try:
+        yield conn
+    finally:
+        # Rendue au pool selon son état, quelle que soit l'exception: une transaction restée ouverte
+        # (BEGIN sans fin, générateur abandonné) garderait un ancien instantané WAL
+        try:
+            reusable = not conn.in_transaction
+        except sqlite3.ProgrammingError:
+            reusable = False
+        if reusable:
+            try:
+                DB_READ_POOL.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+        else:
+            conn.close()
+
+@contextmanager
+def write_db():
+    """Chemin d'écriture unique: une seule connexion, sérialisée par verrou, commit/rollback automatique"""
+    with DB_WRITE_LOCK:
+        conn = DB_WRITER["conn"]
+        if conn is None:
+            conn = _tune_connection(sqlite3.connect(DB_PATH, timeout=DB_BUSY_TIMEOUT_MS / 1000, check_same_thread=False, cached_statements=DB_CACHED_STATEMENTS, factory=DB_CONNECTION_FACTORY))
+            DB_WRITER["conn"] = conn
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
 def init_database():
-    print("✅ Init DB: rien à faire")
+    if not os.path.exists(DB_PATH):
+        print(f"⚠️  Base introuvable: {DB_PATH}")
+        return
+    try:
+        with process_lock("init"), write_db() as conn:
+            mode = conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+            # Index pour les filtres par statut paginés par id (id est deja la cle primaire)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cycles_status_id ON cycles(status, id)")
+            ensure_history_schema(conn)
+        print(f"✅ Init DB: journal_mode={mode}, pool lecture={DB_POOL_SIZE}")
+    except Exception as e:
+        print(f"⚠️  Init DB: impossible d'activer WAL ({e})")
+    with process_lock("init"):
+        check_cycles_stats()
 
 def reset_autoincrement():
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("SELECT MAX(id) FROM cycles")
-        max_id = cursor.fetchone()[0]
-        if max_id is None:
-            max_id = 0
-        cursor.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'cycles'", (max_id,))
-        conn.commit()
-        conn.close()
+        with write_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT MAX(id) FROM cycles")
+            max_id = cursor.fetchone()[0]
+            if max_id is None:
+                max_id = 0
+            cursor.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'cycles'", (max_id,))
         print(f"✅ Compteur auto-increment réinitialisé: prochain ID = {max_id + 1}")
         return True
     except Exception as e:
         print(f"❌ Erreur reset autoincrement: {e}")
         return False
 
-def save_auto_config():
+# ============ ETAT PARTAGE ENTRE WORKERS (GUNICORN) ============
+
+# Chaque worker garde ses dicts en mémoire; les changements passent par une petite base SQLite
+# versionnée que les autres workers relisent (au plus une fois par seconde)
+STATE_LOCAL = threading.local()
+SHARED_STATE = {"version": 0, "synced_at": 0}
+SHARED_STATE_LOCK = threading.Lock()
+SHARED_JOBS = {}
+SCHEDULER_VIEW = {}
+LEADER = {"fd": None, "is_leader": False, "thread": None}
+
+def _state_connection():
+    conn = getattr(STATE_LOCAL, "conn", None)
+    if conn is None:
+        os.makedirs(os.path.dirname(STATE_DB_PATH), exist_ok=True)
+        conn = sqlite3.connect(STATE_DB_PATH, timeout=DB_BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS shared_state (key TEXT PRIMARY KEY, value TEXT NOT NULL, version INTEGER NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_shared_state_version ON shared_state(version)")
+        STATE_LOCAL.conn = conn
+    return conn
+
+def _state_write(conn, key, value):
+    version = conn.execute("SELECT COALESCE(MAX(version), 0) + 1 FROM shared_state").fetchone()[0]
+    conn.execute("INSERT OR REPLACE INTO shared_state (key, value, version) VALUES (?, ?, ?)", (key, json.dumps(value, default=str), version))
+
+def state_set(key, value):
+    """Écrit une valeur partagée; la version globale croissante permet aux autres workers de ne relire que les nouveautés"""
+    try:
+        conn = _state_connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            _state_write(conn, key, value)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    except Exception as e:
+        print(f"⚠️  Etat partage: ecriture {key} impossible ({e})")
+
+def state_update(key, fields, default=None):
+    """Fusionne fields dans la valeur partagée relue sous le verrou d'écriture (BEGIN IMMEDIATE, commun aux workers):
+    les autres clés gardent la dernière valeur écrite par n'importe quel worker. Retourne la valeur fusionnée, None en cas d'échec"""
+    try:
+        conn = _state_connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT value FROM shared_state WHERE key = ?", (key,)).fetchone()
+            value = {**(json.loads(row[0]) if row else default or {}), **fields}
+            _state_write(conn, key, value)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    except Exception as e:
+        print(f"⚠️  Etat partage: ecriture {key} impossible ({e})")
+        return None
+    return value
+
+def state_get(key, default=None):
+    try:
+        row = _state_connection().execute("SELECT value FROM shared_state WHERE key = ?", (key,)).fetchone()
+    except Exception as e:
+        print(f"⚠️  Etat partage: lecture {key} impossible ({e})")
+        return default
+    return json.loads(row[0]) if row else default
+
+def _apply_shared_price_stream(value):
+    # Seul le worker leader tient la connexion WebSocket; les autres reprennent son dernier prix
+    if PRICE_STREAM["thread"] is None:
+        PRICE_STREAM.update(value)
+
+def _apply_shared_config(value):
+    if value.get("pid") != os.getpid() and load_config():
+        publish_snapshot()
+
+SHARED_STATE_HANDLERS = {
+    "auto": lambda value: AUTO_STATE.update(value),
+    "btc_price": lambda value: BTC_PRICE_CACHE.update(value) if value["timestamp"] > BTC_PRICE_CACHE["timestamp"] else None,
+    "price_stream": _apply_shared_price_stream,
+    "config": _apply_shared_config,
+    "scheduler": lambda value: SCHEDULER_VIEW.update(value),
+}
+
+def sync_shared_state(force=False):
+    """Applique les valeurs écrites par les autres workers depuis la dernière synchronisation"""
+    if not force and time.time() - SHARED_STATE["synced_at"] < STATE_SYNC_INTERVAL:
+        return
+    with SHARED_STATE_LOCK:
+        SHARED_STATE["synced_at"] = time.time()
+        try:
+            rows = _state_connection().execute("SELECT key, value, version FROM shared_state WHERE version > ? ORDER BY version", (SHARED_STATE["version"],)).fetchall()
+        except Exception as e:
+            print(f"⚠️  Etat partage: synchronisation impossible ({e})")
+            return
+        for key, value, version in rows:
+            SHARED_STATE["version"] = version
+            try:
+                if key.startswith("job:"):
+                    SHARED_JOBS[key[4:]] = json.loads(value)
+                elif key in SHARED_STATE_HANDLERS:
+                    SHARED_STATE_HANDLERS[key](json.loads(value))
+            except Exception as e:
+                print(f"⚠️  Etat partage: valeur {key} ignoree ({e})")
+        for job_id in sorted(SHARED_JOBS, key=lambda j: SHARED_JOBS[j]["submitted_at"])[:max(0, len(SHARED_JOBS) - JOB_HISTORY)]:
+            del SHARED_JOBS[job_id]
+
+def share_job(job):
+    """Publie l'état d'un job pour que /api/jobs/<id> réponde quel que soit le worker interrogé"""
+    state_set(f"job:{job['id']}", job_view(job))
+    if job["finished_at"] is not None:
+        try:
+            _state_connection().execute("DELETE FROM shared_state WHERE key IN (SELECT key FROM shared_state WHERE key LIKE 'job:%' ORDER BY version DESC LIMIT -1 OFFSET ?)", (JOB_HISTORY,))
+        except Exception as e:
+            print(f"⚠️  Etat partage: purge des jobs impossible ({e})")
+
+@contextmanager
+def process_lock(name, blocking=True):
+    """Verrou fichier (flock) commun à tous les workers; yield False si non bloquant et déjà pris"""
+    if fcntl is None:
+        yield True
+        return
+    os.makedirs(STATE_LOCK_DIR, exist_ok=True)
+    with open(os.path.join(STATE_LOCK_DIR, f"{name}.lock"), "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def try_acquire_leadership():
+    """Élection du leader: le premier worker qui obtient le verrou le garde jusqu'à sa mort (libéré par l'OS)"""
+    if LEADER["is_leader"]:
+        return True
+    if fcntl is None:
+        LEADER["is_leader"] = True
+        return True
+    os.makedirs(STATE_LOCK_DIR, exist_ok=True)
+    fd = open(os.path.join(STATE_LOCK_DIR, "leader.lock"), "a")
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        fd.close()
+        return False
+    LEADER.update({"fd": fd, "is_leader": True})
+    return True
+
+def start_leader_tasks():
+    print(f"👑 Worker {os.getpid()} elu leader: planificateur auto, binaire du bot, flux prix")
+    threading.Thread(target=auto_cycle_worker, daemon=True).start()
+    threading.Thread(target=ensure_bot_binary, daemon=True).start()
+    start_price_stream()
+
+def leader_election():
+    """Les workers suiveurs retentent régulièrement: si le leader meurt, un autre reprend le planificateur"""
+    while not try_acquire_leadership():
+        time.sleep(LEADER_RETRY_INTERVAL)
+    start_leader_tasks()
+
+def save_auto_config(fields):
+    """N'écrit que les clés modifiées par l'appelant: le planificateur ne possède que last/next_cycle_time et ne doit
+    pas réécrire un enabled ou un intervalle lus avant un job de création, changés entre-temps par un autre worker"""
+    merged = state_update("auto", {key: AUTO_STATE[key] for key in fields}, default=dict(AUTO_STATE))
+    if merged is not None:
+        AUTO_STATE.update(merged)
     try:
         with open(AUTO_CONFIG_FILE, "w") as f:
             json.dump(AUTO_STATE, f, indent=2)
     except Exception as e:
         print(f"❌ Erreur sauvegarde config auto: {e}")
 
+# ============ BINAIRE DU BOT PRECOMPILE ============
+
+BOT_BUILD = {"fingerprint": None, "build_seconds": None, "built_at": None, "runs": 0, "error": None, "failed_fingerprint": None}
+BOT_BUILD_LOCK = threading.Lock()
+BOT_SOURCE_SKIP_DIRS = {"bin", "db", "exports", "static", "templates", "node_modules", "venv", "__pycache__"}
+BOT_SOURCES = {"fingerprint": None, "checked_at": 0}
+
+def bot_sources_fingerprint():
+    """Empreinte (chemin, taille, mtime) des sources Go: change dès qu'un fichier est modifié.
+    Chaque commande du bot la demande: le parcours n'est refait qu'après BOT_SOURCE_CHECK_INTERVAL secondes"""
+    if time.time() - BOT_SOURCES["checked_at"] < BOT_SOURCE_CHECK_INTERVAL:
+        return BOT_SOURCES["fingerprint"]
+    entries = []
+    for root, dirs, files in os.walk("."):
+        # Dossiers cachés (.git, .venv...) et dépendances: jamais de sources du bot
+        dirs[:] = [d for d in dirs if d not in BOT_SOURCE_SKIP_DIRS and not d.startswith(".")]
+        for name in files:
+            if name.endswith(".go") or name in ("go.mod", "go.sum"):
+                path = os.path.join(root, name)
+                info = os.stat(path)
+                entries.append(f"{path}:{info.st_size}:{info.st_mtime_ns}")
+    BOT_SOURCES.update({"fingerprint": hashlib.sha1("\n".join(sorted(entries)).encode()).hexdigest() if entries else None, "checked_at": time.time()})
+    return BOT_SOURCES["fingerprint"]
+
+def ensure_bot_binary():
+    """Compile le bot une fois (go build) et ne recompile que si les sources changent; None = repli sur go run"""
+    if not BOT_PREBUILT:
+        return None
+    # Le verrou fichier évite que plusieurs workers compilent en même temps; le suivant réutilise le binaire
+    with BOT_BUILD_LOCK, process_lock("bot-build"):
+        fingerprint = bot_sources_fingerprint()
+        if fingerprint is None:
+            return None
+        if BOT_BUILD["fingerprint"] == fingerprint and os.path.exists(BOT_BINARY):
+            return BOT_BINARY
+        saved = {}
+        if os.path.exists(BOT_BUILD_STATE_FILE):
+            with open(BOT_BUILD_STATE_FILE, "r") as f:
+                saved = json.load(f)
+        # Echec déjà constaté pour ces sources (ici ou dans un autre worker): go run direct jusqu'à la prochaine modification
+        if fingerprint in (BOT_BUILD["failed_fingerprint"], saved.get("failed_fingerprint")):
+            BOT_BUILD["failed_fingerprint"] = fingerprint
+            return None
+        if os.path.exists(BOT_BINARY) and saved.get("fingerprint") == fingerprint:
+            BOT_BUILD.update(saved)
+            print(f"✅ Binaire bot reutilise: {BOT_BINARY}")
+            return BOT_BINARY
+        print(f"🔨 Compilation du bot: {BOT_BINARY}")
+        start = time.time()
+        os.makedirs(os.path.dirname(BOT_BINARY), exist_ok=True)
+        try:
+            result = subprocess.run(['go', 'build', '-o', BOT_BINARY, '.'], cwd=os.getcwd(), capture_output=True, text=True, timeout=BOT_BUILD_TIMEOUT)
+            error = result.stderr if result.returncode != 0 else None
+        except Exception as e:
+            error = str(e)
+        if error is not None:
+            BOT_BUILD.update({"error": error, "failed_fingerprint": fingerprint})
+            with open(BOT_BUILD_STATE_FILE, "w") as f:
+                json.dump({**saved, "failed_fingerprint": fingerprint}, f, indent=2)
+            print(f"⚠️  Compilation du bot echouee, repli sur go run jusqu'a la prochaine modification des sources: {error}")
+            return None
+        BOT_BUILD.update({"fingerprint": fingerprint, "build_seconds": round(time.time() - start, 3), "built_at": datetime.now().isoformat(), "error": None, "failed_fingerprint": None})
+        with open(BOT_BUILD_STATE_FILE, "w") as f:
+            json.dump({key: BOT_BUILD[key] for key in ("fingerprint", "build_seconds", "built_at")}, f, indent=2)
+        print(f"✅ Bot compile en {BOT_BUILD['build_seconds']}s")
+        return BOT_BINARY
+
+def bot_command(args):
+    binary = ensure_bot_binary()
+    if binary is None:
+        return BOT_COMMAND + args
+    BOT_BUILD["runs"] += 1
+    return [os.path.abspath(binary)] + args
+
+# ============ FILE DE JOBS (COMMANDES DU BOT) ============
+
+JOBS = {}
+JOBS_LOCK = threading.Lock()
+JOB_QUEUES = {}
+JOB_RUNNING_KINDS = set()
+JOB_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+
+def job_view(job):
+    return {key: value for key, value in job.items() if not key.startswith("_")}
+
+def all_job_views():
+    """Jobs de ce worker + ceux publiés par les autres workers"""
+    with JOBS_LOCK:
+        views = dict(SHARED_JOBS)
+        views.update({job_id: job_view(job) for job_id, job in JOBS.items()})
+    return views
+
+def submit_job(kind, args, on_done=None, coalesce=False, batch=False):
+    """Met une commande du bot en file: un seul job par type à la fois, doublons en attente fusionnés; batch=True: args est une liste de commandes"""
+    with JOBS_LOCK:
+        pending = JOB_QUEUES.setdefault(kind, deque())
+        if coalesce:
+            for job in pending:
+                if job["args"] == args:
+                    job["coalesced"] += 1
+                    return job
+        job = {"id": uuid.uuid4().hex[:12], "kind": kind, "args": args, "status": "queued", "submitted_at": time.time(), "started_at": None, "finished_at": None, "duration": None, "returncode": None, "output": "", "error": "", "result": {}, "coalesced": 0, "_batch": batch, "_on_done": on_done, "_event": threading.Event()}
+        JOBS[job["id"]] = job
+        pending.append(job)
+        finished = [j["id"] for j in JOBS.values() if j["finished_at"] is not None]
+        for job_id in finished[:max(0, len(JOBS) - JOB_HISTORY)]:
+            del JOBS[job_id]
+        if kind not in JOB_RUNNING_KINDS:
+            JOB_RUNNING_KINDS.add(kind)
+            JOB_EXECUTOR.submit(_drain_jobs, kind)
+    share_job(job)
+    return job
+
+def _drain_jobs(kind):
+    while True:
+        with JOBS_LOCK:
+            pending = JOB_QUEUES[kind]
+            if not pending:
+                JOB_RUNNING_KINDS.discard(kind)
+                return
+            job = pending.popleft()
+            job["status"] = "running"
+            job["started_at"] = time.time()
+        _run_job(job)
+
+def _run_job(job):
+    try:
+        # Un seul job de ce type à la fois, tous workers confondus
+        with process_lock(f"job-{job['kind']}"):
+            if job["_batch"]:
+                _run_batch(job)
+            else:
+                result = subprocess.run(bot_command(job["args"]), cwd=os.getcwd(), capture_output=True, text=True, timeout=JOB_TIMEOUT)
+                job["returncode"] = result.returncode
+                job["output"] = result.stdout
+                job["error"] = result.stderr
+    except subprocess.TimeoutExpired as e:
+        job["error"] = f"Timeout apres {JOB_TIMEOUT}s"
+        output = e.stdout or ""
+        job["output"] = output.decode(errors="replace") if isinstance(output, bytes) else output
+    except Exception as e:
+        job["error"] = str(e)
+    job["status"] = "succeeded" if job["returncode"] == 0 else "failed"
+    if job["_on_done"] is not None:
+        try:
+            job["_on_done"](job)
+        except Exception as e:
+            print(f"❌ Erreur post-traitement job {job['kind']}: {e}")
+    job["finished_at"] = time.time()
+    job["duration"] = round(job["finished_at"] - job["started_at"], 3)
+    observe("dashboard_job_duration_seconds", job["duration"], kind=job["kind"])
+    inc("dashboard_jobs_total", kind=job["kind"], returncode=job["returncode"])
+    share_job(job)
+    job["_event"].set()
+
+def _run_batch(job):
+    """Exécute les commandes du lot dans le même job, espacées d'au moins BATCH_MIN_INTERVAL (limite vers l'exchange)"""
+    items = job["result"]["items"] = []
+    last_call = 0
+    for args in job["args"]:
+        delay = last_call + BATCH_MIN_INTERVAL - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        last_call = time.time()
+        item = {"args": args, "returncode": None, "output": "", "error": ""}
+        try:
+            result = subprocess.run(bot_command(args), cwd=os.getcwd(), capture_output=True, text=True, timeout=JOB_TIMEOUT)
+            item.update(returncode=result.returncode, output=result.stdout, error=result.stderr)
+        except subprocess.TimeoutExpired:
+            item["error"] = f"Timeout apres {JOB_TIMEOUT}s"
+        except Exception as e:
+            item["error"] = str(e)
+        item["success"] = item["returncode"] == 0
+        item["duration"] = round(time.time() - last_call, 3)
+        items.append(item)
+        inc("dashboard_batch_items_total", kind=job["kind"], result="success" if item["success"] else "failure")
+        # Progression visible depuis /api/jobs/<id> pendant l'exécution
+        job["result"]["done"] = len(items)
+        share_job(job)
+    failed = [item for item in items if not item["success"]]
+    job["result"].update({"succeeded": len(items) - len(failed), "failed": len(failed)})
+    job["returncode"] = 1 if failed else 0
+    job["output"] = "\n".join(item["output"] for item in items if item["output"])
+    job["error"] = "\n".join(f"{' '.join(item['args'])}: {item['error']}" for item in failed)
+
+def batch_timeout(job):
+    return (JOB_TIMEOUT + BATCH_MIN_INTERVAL) * len(job["args"]) if job["_batch"] else JOB_TIMEOUT
+
+def wait_job(job, timeout=None):
+    job["_event"].wait(timeout)
+    return job
+
+def _after_cycles_changed(job):
+    invalidate_snapshot("db")
+
+def _after_cycle_cancelled(job):
+    reset_autoincrement()
+    invalidate_snapshot("db")
+
+def _after_cycles_cancelled(job):
+    # Un seul reset du compteur pour tout le lot
+    for item in job["result"].get("items", []):
+        item["cycle_id"] = int(item["args"][1])
+    reset_autoincrement()
+    invalidate_snapshot("db")
+
+def _after_export(job):
+    csv_file, json_file = get_latest_export_files()
+    job["result"] = {"csv_file": csv_file, "json_file": json_file, "files": {"csv": csv_file is not None, "json": json_file is not None}}
+
 def create_cycle_auto():
     try:
         print(f"\n{'='*60}")
         print(f"🤖 CREATION AUTO D'UN CYCLE - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"{'='*60}")
-        result = subprocess.run(['go', 'run', '.', '-n'], cwd=os.getcwd(), capture_output=True, text=True, timeout=30)
-        if result.returncode == 0:
+        job = submit_job("new", ["-n"], on_done=_after_cycles_changed)
+        # Attente bornée: un lot en cours devant ce job ne bloque pas le planificateur indéfiniment
+        if wait_job(job, batch_timeout(job))["finished_at"] is None:
+            # Le job reste en file et créera le cycle: le compter comme lancé évite un doublon au prochain tour
+            print(f"⏳ Creation auto toujours en cours apres {batch_timeout(job)}s (job {job['id']})")
+            return True
+        if job["returncode"] == 0:
             print("✅ Cycle cree automatiquement avec succes!")
-            print(result.stdout)
+            print(job["output"])
             return True
         else:
-            print(f"❌ Erreur creation cycle auto: {result.stderr}")
+            print(f"❌ Erreur creation cycle auto: {job['error']}")
             return False
     except Exception as e:
         print(f"❌ Exception creation cycle auto: {e}")
@@ -97,149 +892,1569 @@ def create_cycle_auto():
 
 def update_cycles_auto():
     try:
-        result = subprocess.run(['go', 'run', '.', '-u'], cwd=os.getcwd(), capture_output=True, text=True, timeout=30)
-        if result.returncode == 0:
+        job = submit_job("update", ["-u"], on_done=_after_cycles_changed, coalesce=True)
+        if wait_job(job, batch_timeout(job))["finished_at"] is None:
+            print(f"⏳ Update cycles toujours en cours apres {batch_timeout(job)}s (job {job['id']})")
+            return False
+        if job["returncode"] == 0:
             print("✅ Cycles mis à jour automatiquement")
             return True
         else:
-            print(f"⚠️  Erreur update cycles: {result.stderr}")
+            print(f"⚠️  Erreur update cycles: {job['error']}")
             return False
     except Exception as e:
         print(f"❌ Exception update cycles: {e}")
         return False
 
+# ============ PLANIFICATEUR DU MODE AUTO (TAS DE MINUTEURS) ============
+
+AUTO_WAKE = threading.Event()
+AUTO_SCHEDULER = {
+    "next_update": None,
+    "started_at": None,
+    "runs": {"create": 0, "update": 0},
+    "skipped_updates": 0,
+    "missed_cycles": 0,
+    "last_drift": {"create": None, "update": None},
+    "max_drift": {"create": 0, "update": 0},
+}
+
+def wake_auto_scheduler():
+    """Réveille le planificateur pour qu'il recalcule ses échéances (changement d'intervalle, start/stop)"""
+    AUTO_WAKE.set()
+
+def _auto_jitter():
+    return random.uniform(0, AUTO_STATE["jitter_seconds"]) if AUTO_STATE["jitter_seconds"] > 0 else 0
+
+def _auto_timers():
+    """Tas des prochaines échéances (epoch, tâche): mise à jour des ordres et création de cycle"""
+    timers = [(AUTO_SCHEDULER["next_update"], "update")]
+    if AUTO_STATE["enabled"] and AUTO_STATE["next_cycle_time"] is not None:
+        timers.append((datetime.fromisoformat(AUTO_STATE["next_cycle_time"]).timestamp(), "create"))
+    heapq.heapify(timers)
+    return timers
+
+def _record_drift(task, due):
+    drift = round(time.time() - due, 3)
+    AUTO_SCHEDULER["runs"][task] += 1
+    AUTO_SCHEDULER["last_drift"][task] = drift
+    AUTO_SCHEDULER["max_drift"][task] = max(AUTO_SCHEDULER["max_drift"][task], drift)
+    observe("dashboard_scheduler_drift_seconds", max(0, drift), task=task)
+
+def scheduler_view():
+    view = {key: value for key, value in AUTO_SCHEDULER.items() if key not in ("next_update", "started_at")}
+    view["next_update_time"] = datetime.fromtimestamp(AUTO_SCHEDULER["next_update"]).isoformat() if AUTO_SCHEDULER["next_update"] else None
+    return view
+
+def _run_auto_update(due):
+    AUTO_SCHEDULER["next_update"] = time.time() + AUTO_STATE["update_interval_seconds"] + _auto_jitter()
+    active = sum(count for status, count in get_cycle_totals()["by_status"].items() if _cycle_phase(status)[0])
+    if active == 0:
+        # Aucun cycle actif: rien à synchroniser avec MEXC, on évite de lancer le bot
+        AUTO_SCHEDULER["skipped_updates"] += 1
+        return
+    _record_drift("update", due)
+    print(f"\n🔄 Mise à jour automatique des cycles - {datetime.now().strftime('%H:%M:%S')} ({active} actifs)")
+    update_cycles_auto()
+
+def _run_auto_create(due):
+    now = time.time()
+    interval = AUTO_STATE["interval_minutes"] * 60
+    # Seule une échéance dépassée avant le démarrage du planificateur est un arrêt réel à rattraper;
+    # en fonctionnement, un retard (job long, intervalle raccourci) ne crée qu'un cycle
+    missed = int((now - due) // interval) if due < AUTO_SCHEDULER["started_at"] else 0
+    policy = AUTO_STATE["catchup_policy"]
+    if missed > 0:
+        AUTO_SCHEDULER["missed_cycles"] += missed
+        print(f"⏰ {missed} cycle(s) manqué(s) pendant l'arrêt (politique: {policy})")
+    if missed > 0 and policy == "skip":
+        # On saute les échéances manquées et on se recale sur la grille d'origine
+        next_due = due + (missed + 1) * interval
+    else:
+        count = min(missed + 1, AUTO_CATCHUP_MAX) if policy == "catchup" else 1
+        _record_drift("create", due)
+        print(f"⏰ Temps écoulé, création de {count} cycle(s) automatique(s)")
+        created = False
+        for _ in range(count):
+            created = create_cycle_auto() or created
+        if not created:
+            # Echec: nouvel essai au prochain tour de mise à jour plutôt qu'en boucle serrée
+            AUTO_STATE["next_cycle_time"] = datetime.fromtimestamp(now + AUTO_STATE["update_interval_seconds"]).isoformat()
+            save_auto_config(("next_cycle_time",))
+            return
+        AUTO_STATE["last_cycle_time"] = datetime.fromtimestamp(now).isoformat()
+        # Grille fixe (pas de dérive cumulée) sauf si l'échéance suivante est déjà passée
+        next_due = due + interval if missed == 0 and due + interval > time.time() else time.time() + interval
+    AUTO_STATE["next_cycle_time"] = datetime.fromtimestamp(next_due + _auto_jitter()).isoformat()
+    save_auto_config(("last_cycle_time", "next_cycle_time"))
+
 def auto_cycle_worker():
-    print("🚀 Thread auto-cycle demarre (update toutes les 2 minutes)")
+    """Dort jusqu'à la prochaine échéance du tas; réveillé immédiatement par wake_auto_scheduler()"""
+    print(f"🚀 Thread auto-cycle demarre (update toutes les {AUTO_STATE['update_interval_seconds']}s, politique {AUTO_STATE['catchup_policy']})")
+    AUTO_SCHEDULER["started_at"] = time.time()
+    AUTO_SCHEDULER["next_update"] = time.time() + AUTO_STATE["update_interval_seconds"]
     while True:
         try:
-            time.sleep(120)
-            print(f"\n🔄 Mise à jour automatique des cycles - {datetime.now().strftime('%H:%M:%S')}")
-            update_cycles_auto()
-            if AUTO_STATE["enabled"]:
-                now = datetime.now()
-                if AUTO_STATE["next_cycle_time"] is not None:
-                    next_cycle = datetime.fromisoformat(AUTO_STATE["next_cycle_time"])
-                    if now >= next_cycle:
-                        print(f"⏰ Temps écoulé, création d'un cycle automatique")
-                        if create_cycle_auto():
-                            AUTO_STATE["last_cycle_time"] = now.isoformat()
-                            AUTO_STATE["next_cycle_time"] = (now + timedelta(minutes=AUTO_STATE["interval_minutes"])).isoformat()
-                            save_auto_config()
+            # Les changements faits dans un autre worker arrivent par l'état partagé: on ne dort jamais plus longtemps que la synchro
+            sync_shared_state(force=True)
+            # Cadence de mise à jour raccourcie (éventuellement par un autre worker): prise en compte immédiate
+            AUTO_SCHEDULER["next_update"] = min(AUTO_SCHEDULER["next_update"], time.time() + AUTO_STATE["update_interval_seconds"] + AUTO_STATE["jitter_seconds"])
+            due, task = _auto_timers()[0]
+            delay = due - time.time()
+            if delay > 0:
+                AUTO_WAKE.wait(min(delay, STATE_SYNC_INTERVAL))
+                AUTO_WAKE.clear()
+                continue
+            if task == "update":
+                _run_auto_update(due)
+            else:
+                _run_auto_create(due)
+            state_set("scheduler", scheduler_view())
         except Exception as e:
             print(f"❌ Erreur dans auto_cycle_worker: {e}")
+            time.sleep(STATE_SYNC_INTERVAL)
+
+CYCLE_COLUMNS_CACHE = {"columns": None}
+
+def get_cycle_columns():
+    if CYCLE_COLUMNS_CACHE["columns"] is None:
+        with read_db() as conn:
+            CYCLE_COLUMNS_CACHE["columns"] = [row["name"] for row in conn.execute("PRAGMA table_info(cycles)")]
+    return CYCLE_COLUMNS_CACHE["columns"]
+
+# Colonnes d'horodatage possibles selon la version du bot
+CYCLE_CREATED_COLUMNS = ("createdAt", "created_at", "createTime", "timestamp")
+CYCLE_COMPLETED_COLUMNS = ("completedAt", "completed_at", "sellFilledAt", "updatedAt", "updated_at")
+
+def find_cycle_column(candidates):
+    columns = get_cycle_columns()
+    return next((c for c in candidates if c in columns), None)
+
+def epoch_sql(column):
+    """Expression SQL convertissant une colonne (texte ISO, secondes ou millisecondes) en secondes unix"""
+    return f"""(CASE WHEN typeof("{column}") IN ('integer', 'real') THEN (CASE WHEN "{column}" > 100000000000 THEN "{column}" / 1000 ELSE "{column}" END) ELSE CAST(strftime('%s', "{column}") AS INTEGER) END)"""
+
+def int_arg(value, name):
+    """Paramètre entier optionnel de la query string: message clair plutôt que l'erreur brute de int()"""
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} doit etre un entier") from None
+
+def parse_time_arg(value, name="date"):
+    """Accepte un timestamp unix ou une date ISO (2024-01-31 / 2024-01-31T12:00:00, fuseau optionnel)"""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} doit etre un timestamp unix ou une date ISO (ex: 2024-01-31T12:00:00)") from None
+    # Sans fuseau: UTC, comme strftime('%s') de SQLite lit les dates texte de la table (epoch_sql)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+def status_filter_sql(statuses):
+    """Filtre SQL sur une liste de statuts ('active' = tout statut sauf completed)"""
+    conditions = []
+    params = []
+    if "active" in statuses:
+        conditions.append("status != 'completed'")
+    explicit = [st for st in statuses if st != "active"]
+    if explicit:
+        conditions.append(f"status IN ({', '.join('?' * len(explicit))})")
+        params.extend(explicit)
+    return "(" + " OR ".join(conditions) + ")", params
+
+def response_format():
+    """?format=rows (liste d'objets, défaut) ou ?format=columns (tableaux parallèles, sans clés répétées)"""
+    response_format = request.args.get('format', 'rows')
+    if response_format not in ("rows", "columns"):
+        raise ValueError("format doit etre 'rows' ou 'columns'")
+    return response_format
+
+def select_cycle_columns(fields):
+    columns = get_cycle_columns()
+    if not fields:
+        return columns
+    unknown = [f for f in fields if f not in columns]
+    if unknown:
+        raise ValueError(f"Colonnes inconnues: {', '.join(unknown)}")
+    return ["id"] + [f for f in fields if f != "id"]
+
+def query_cycles_page(limit=CYCLES_PAGE_SIZE, cursor=None, order="desc", statuses=None, fields=None, columnar=False):
+    """Page de cycles par curseur d'id (keyset): coût borné quelle que soit la taille de l'historique;
+    columnar=True retourne {colonne: [valeurs]} sans créer un dict par ligne"""
+    selected = select_cycle_columns(fields)
+    if order not in ("asc", "desc"):
+        raise ValueError("order doit etre 'asc' ou 'desc'")
+    limit = int_arg(limit, "limit")
+    limit = max(1, min(CYCLES_PAGE_SIZE if limit is None else limit, CYCLES_PAGE_MAX))
+    cursor = int_arg(cursor, "cursor")
+    where = []
+    params = []
+    if statuses:
+        status_sql, status_params = status_filter_sql(statuses)
+        where.append(status_sql)
+        params.extend(status_params)
+    if cursor is not None:
+        where.append("id < ?" if order == "desc" else "id > ?")
+        params.append(cursor)
+    sql = "SELECT " + ", ".join(f'"{c}"' for c in selected) + " FROM cycles"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY id {order.upper()} LIMIT ?"
+    params.append(limit + 1)
+    with read_db() as conn:
+        cursor = conn.execute(sql, params)
+        columns = [description[0] for description in cursor.description]
+        rows = cursor.fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = rows[-1]["id"] if has_more else None
+    if columnar:
+        values = list(zip(*rows)) or [()] * len(columns)
+        return {"fields": columns, "cycles": {column: list(value) for column, value in zip(columns, values)}, "next_cursor": next_cursor, "has_more": has_more}
+    return {"cycles": [dict(zip(columns, row)) for row in rows], "next_cursor": next_cursor, "has_more": has_more}
+
+def load_cycles_summary():
+    page = query_cycles_page()
+    # Au-delà de CYCLES_PAGE_MAX actifs, active_next_cursor permet de lire la suite via /api/cycles?status=active
+    active = query_cycles_page(limit=CYCLES_PAGE_MAX, statuses=["active"])
+    totals = get_cycle_totals()
+    return {"cycles": page["cycles"], "next_cursor": page["next_cursor"], "active_cycles": active["cycles"], "active_next_cursor": active["next_cursor"], **totals}
 
 def get_cycles_from_db():
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM cycles ORDER BY id DESC")
-        cycles = [dict(row) for row in cursor.fetchall()]
-        cursor.execute("SELECT * FROM cycles WHERE status = 'completed'")
-        completed = [dict(row) for row in cursor.fetchall()]
-        cursor.execute("SELECT COUNT(*) as total FROM cycles")
-        total_count = cursor.fetchone()[0]
-        cursor.execute("SELECT COUNT(*) as completed FROM cycles WHERE status = 'completed'")
-        completed_count = cursor.fetchone()[0]
-        conn.close()
-        print(f"✅ DB: {len(cycles)} cycles charges, {completed_count} completes")
-        return {"cycles": cycles, "completed": completed, "total_count": total_count, "completed_count": completed_count}
+        db_data = load_cycles_summary()
+        print(f"✅ DB: {len(db_data['cycles'])} cycles charges, {db_data['completed_count']} completes")
+        return db_data
     except Exception as e:
         print(f"❌ Erreur DB: {e}")
-        return {"cycles": [], "completed": [], "total_count": 0, "completed_count": 0}
-
-def calculate_stats(completed_cycles):
-    total_buy = 0
-    total_sell = 0
-    for cycle in completed_cycles:
-        buy_amount = cycle.get("buyPrice", 0) * cycle.get("quantity", 0)
-        sell_amount = cycle.get("sellPrice", 0) * cycle.get("quantity", 0)
-        total_buy += buy_amount
-        total_sell += sell_amount
+        return {"cycles": [], "next_cursor": None, "active_cycles": [], "active_next_cursor": None, "total_count": 0, "completed_count": 0, "total_buy": 0, "total_sell": 0, "by_status": {}}
+
+# ============ STATISTIQUES MATERIALISEES ============
+
+# Table de synthese par statut, maintenue par triggers: chaque INSERT/UPDATE/DELETE du bot
+# ne modifie que la ligne de son statut, la lecture des stats ne depend plus de l'historique
+CYCLES_STATS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cycles_stats (status TEXT PRIMARY KEY, count INTEGER NOT NULL DEFAULT 0, total_buy REAL NOT NULL DEFAULT 0, total_sell REAL NOT NULL DEFAULT 0);
+CREATE TRIGGER IF NOT EXISTS cycles_stats_insert AFTER INSERT ON cycles BEGIN
+    INSERT OR IGNORE INTO cycles_stats (status) VALUES (COALESCE(NEW.status, ''));
+    UPDATE cycles_stats SET count = count + 1, total_buy = total_buy + COALESCE(NEW.buyPrice * NEW.quantity, 0), total_sell = total_sell + COALESCE(NEW.sellPrice * NEW.quantity, 0) WHERE status = COALESCE(NEW.status, '');
+END;
+CREATE TRIGGER IF NOT EXISTS cycles_stats_delete AFTER DELETE ON cycles BEGIN
+    UPDATE cycles_stats SET count = count - 1, total_buy = total_buy - COALESCE(OLD.buyPrice * OLD.quantity, 0), total_sell = total_sell - COALESCE(OLD.sellPrice * OLD.quantity, 0) WHERE status = COALESCE(OLD.status, '');
+END;
+CREATE TRIGGER IF NOT EXISTS cycles_stats_update AFTER UPDATE OF status, buyPrice, sellPrice, quantity ON cycles BEGIN
+    UPDATE cycles_stats SET count = count - 1, total_buy = total_buy - COALESCE(OLD.buyPrice * OLD.quantity, 0), total_sell = total_sell - COALESCE(OLD.sellPrice * OLD.quantity, 0) WHERE status = COALESCE(OLD.status, '');
+    INSERT OR IGNORE INTO cycles_stats (status) VALUES (COALESCE(NEW.status, ''));
+    UPDATE cycles_stats SET count = count + 1, total_buy = total_buy + COALESCE(NEW.buyPrice * NEW.quantity, 0), total_sell = total_sell + COALESCE(NEW.sellPrice * NEW.quantity, 0) WHERE status = COALESCE(NEW.status, '');
+END;
+"""
+# Journal des ids modifiés: permet aux caches en mémoire de ne relire que les cycles touchés
+CYCLES_CHANGELOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cycles_changelog (seq INTEGER PRIMARY KEY AUTOINCREMENT, cycle_id INTEGER NOT NULL);
+CREATE TRIGGER IF NOT EXISTS cycles_changelog_insert AFTER INSERT ON cycles BEGIN
+    INSERT INTO cycles_changelog (cycle_id) VALUES (NEW.id);
+END;
+CREATE TRIGGER IF NOT EXISTS cycles_changelog_update AFTER UPDATE ON cycles BEGIN
+    INSERT INTO cycles_changelog (cycle_id) VALUES (OLD.id);
+    INSERT INTO cycles_changelog (cycle_id) SELECT NEW.id WHERE NEW.id != OLD.id;
+END;
+CREATE TRIGGER IF NOT EXISTS cycles_changelog_delete AFTER DELETE ON cycles BEGIN
+    INSERT INTO cycles_changelog (cycle_id) VALUES (OLD.id);
+END;
+"""
+CYCLES_TRIGGERS = ("cycles_stats_insert", "cycles_stats_delete", "cycles_stats_update", "cycles_changelog_insert", "cycles_changelog_update", "cycles_changelog_delete")
+CYCLES_STATS_SCAN = "SELECT COALESCE(status, '') AS status, COUNT(*) AS count, TOTAL(buyPrice * quantity) AS total_buy, TOTAL(sellPrice * quantity) AS total_sell FROM cycles GROUP BY 1"
+STATS_STATE = {"materialized": False, "last_check": 0}
+
+def _stats_by_status(rows):
+    return {row["status"]: (row["count"], row["total_buy"], row["total_sell"]) for row in rows if row["count"]}
+
+def _stats_consistent(materialized, scanned):
+    if materialized.keys() != scanned.keys():
+        return False
+    for status, (count, total_buy, total_sell) in scanned.items():
+        m_count, m_buy, m_sell = materialized[status]
+        if m_count != count or abs(m_buy - total_buy) > 0.01 or abs(m_sell - total_sell) > 0.01:
+            return False
+    return True
+
+def rebuild_cycles_stats():
+    """Reconstruction complète de cycles_stats (installe la table et les triggers si besoin)"""
+    with write_db() as conn:
+        conn.executescript("BEGIN;" + CYCLES_STATS_SCHEMA + CYCLES_CHANGELOG_SCHEMA)
+        conn.execute("DELETE FROM cycles_stats")
+        conn.execute("INSERT INTO cycles_stats (status, count, total_buy, total_sell) " + CYCLES_STATS_SCAN)
+    print("🔁 Stats: cycles_stats reconstruite")
+
+def check_cycles_stats():
+    """Vérifie la table materialisee contre un agrégat complet et la reconstruit si elle a dérivé"""
+    STATS_STATE["last_check"] = time.time()
+    try:
+        with read_db() as conn:
+            triggers = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+            installed = triggers.issuperset(CYCLES_TRIGGERS)
+            scanned = _stats_by_status(conn.execute(CYCLES_STATS_SCAN).fetchall())
+            materialized = _stats_by_status(conn.execute("SELECT * FROM cycles_stats").fetchall()) if installed else None
+        if not installed or not _stats_consistent(materialized, scanned):
+            rebuild_cycles_stats()
+        with write_db() as conn:
+            conn.execute("DELETE FROM cycles_changelog WHERE seq <= (SELECT MAX(seq) FROM cycles_changelog) - ?", (CHANGELOG_RETENTION,))
+        STATS_STATE["materialized"] = True
+    except Exception as e:
+        STATS_STATE["materialized"] = False
+        print(f"⚠️  Stats materialisees indisponibles, agregat complet utilise ({e})")
+
+def ensure_cycles_stats():
+    if time.time() - STATS_STATE["last_check"] > STATS_CHECK_INTERVAL:
+        check_cycles_stats()
+
+def get_cycle_totals():
+    """Compteurs par statut + montants des cycles completes, lus depuis cycles_stats (ou agrégat complet en secours)"""
+    ensure_cycles_stats()
+    with read_db() as conn:
+        if STATS_STATE["materialized"]:
+            by_status = _stats_by_status(conn.execute("SELECT * FROM cycles_stats").fetchall())
+        else:
+            by_status = _stats_by_status(conn.execute(CYCLES_STATS_SCAN).fetchall())
+    completed_count, total_buy, total_sell = by_status.get("completed", (0, 0, 0))
+    return {"total_count": sum(count for count, _, _ in by_status.values()), "completed_count": completed_count, "total_buy": total_buy, "total_sell": total_sell, "by_status": {status: values[0] for status, values in by_status.items()}}
+
+def read_changes(conn, since_seq):
+    """Retourne (seq courant, ids modifiés depuis since_seq) ou (seq courant, None) si une reconstruction est nécessaire"""
+    if not STATS_STATE["materialized"]:
+        return None, None
+    min_seq, max_seq = conn.execute("SELECT MIN(seq), MAX(seq) FROM cycles_changelog").fetchone()
+    if max_seq is None:
+        max_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name = 'cycles_changelog'").fetchone()[0]
+    if since_seq is None or since_seq > max_seq or (min_seq is not None and since_seq < min_seq - 1):
+        return max_seq, None
+    ids = [row[0] for row in conn.execute("SELECT DISTINCT cycle_id FROM cycles_changelog WHERE seq > ?", (since_seq,))]
+    return max_seq, ids
+
+def calculate_stats(total_buy, total_sell):
     gain_abs = total_sell - total_buy
     gain_percent = (gain_abs / total_buy * 100) if total_buy > 0 else 0
     return {"total_buy": round(total_buy, 2), "total_sell": round(total_sell, 2), "gain_abs": round(gain_abs, 2), "gain_percent": round(gain_percent, 2)}
 
-def get_btc_price_coingecko():
-    global BTC_PRICE_CACHE
+# ============ MAGASIN COLONNAIRE DES CYCLES ============
+
+# Une copie compacte (tableaux typés, triés par id) partagée par les routes d'analyse:
+# chargée une fois, puis maintenue à partir du journal cycles_changelog
+CYCLE_STORE = {"seq": None, "fingerprint": None, "version": 0, "ids": array('q'), "status": array('H'), "buy_price": array('d'), "sell_price": array('d'), "quantity": array('d'), "status_names": [], "status_codes": {}, "dirty": deque(maxlen=256)}
+CYCLE_STORE_LOCK = threading.RLock()
+CYCLE_STORE_COLUMNS = "id, COALESCE(status, ''), COALESCE(buyPrice, 0), COALESCE(sellPrice, 0), COALESCE(quantity, 0)"
+# Empreinte utilisée quand le journal n'est pas matérialisé (base en lecture seule)
+CYCLE_STORE_FINGERPRINT_SQL = "SELECT COUNT(*), COALESCE(MAX(id), 0), TOTAL(id * length(status)), TOTAL(buyPrice * quantity), TOTAL(sellPrice * quantity) FROM cycles"
+CYCLE_STORE_FETCH = 5000
+
+def _cycle_phase(status):
+    """Retourne (actif, achat, vente) pour un statut de cycle"""
+    if status == "completed":
+        return False, False, False
+    lowered = status.lower()
+    return True, "buy" in lowered, "sell" in lowered
+
+def _status_code(status):
+    codes = CYCLE_STORE["status_codes"]
+    code = codes.get(status)
+    if code is None:
+        code = codes[status] = len(CYCLE_STORE["status_names"])
+        CYCLE_STORE["status_names"].append(status)
+    return code
+
+def _store_reload(conn):
+    """Rechargement complet, par blocs pour limiter le pic mémoire"""
+    store = CYCLE_STORE
+    columns = {key: array(store[key].typecode) for key in ("ids", "status", "buy_price", "sell_price", "quantity")}
+    cursor = conn.execute(f"SELECT {CYCLE_STORE_COLUMNS} FROM cycles ORDER BY id")
+    while True:
+        rows = cursor.fetchmany(CYCLE_STORE_FETCH)
+        if not rows:
+            break
+        for cycle_id, status, buy_price, sell_price, quantity in rows:
+            columns["ids"].append(cycle_id)
+            columns["status"].append(_status_code(status))
+            columns["buy_price"].append(buy_price)
+            columns["sell_price"].append(sell_price)
+            columns["quantity"].append(quantity)
+    store.update(columns)
+    return 0
+
+def _store_apply(conn, changed):
+    """Applique les ids modifiés (ajout, mise à jour, suppression); retourne la première position touchée"""
+    store = CYCLE_STORE
+    ids = store["ids"]
+    changed = sorted(changed)
+    rows = {}
+    for i in range(0, len(changed), SQL_IN_CHUNK):
+        chunk = changed[i:i + SQL_IN_CHUNK]
+        placeholders = ",".join("?" * len(chunk))
+        for row in conn.execute(f"SELECT {CYCLE_STORE_COLUMNS} FROM cycles WHERE id IN ({placeholders})", chunk):
+            rows[row[0]] = row
+    first = None
+    for cycle_id in changed:
+        position = bisect.bisect_left(ids, cycle_id)
+        present = position < len(ids) and ids[position] == cycle_id
+        row = rows.get(cycle_id)
+        if row is None and not present:
+            continue
+        if row is None:
+            for key in ("ids", "status", "buy_price", "sell_price", "quantity"):
+                del store[key][position]
+        elif present:
+            store["status"][position] = _status_code(row[1])
+            store["buy_price"][position], store["sell_price"][position], store["quantity"][position] = row[2:]
+        else:
+            ids.insert(position, cycle_id)
+            store["status"].insert(position, _status_code(row[1]))
+            store["buy_price"].insert(position, row[2])
+            store["sell_price"].insert(position, row[3])
+            store["quantity"].insert(position, row[4])
+        first = position if first is None else min(first, position)
+    return first
+
+def refresh_cycle_store():
+    """Synchronise le magasin avec la base; chaque changement incrémente la version et note la première position modifiée"""
+    ensure_cycles_stats()
+    with CYCLE_STORE_LOCK:
+        store = CYCLE_STORE
+        with read_db() as conn:
+            # Journal et lignes lus dans la même transaction pour un instantané cohérent
+            conn.execute("BEGIN")
+            try:
+                seq, changed = read_changes(conn, store["seq"])
+                if seq is None:
+                    fingerprint = tuple(conn.execute(CYCLE_STORE_FINGERPRINT_SQL).fetchone())
+                    first = _store_reload(conn) if fingerprint != store["fingerprint"] else None
+                    store["fingerprint"] = fingerprint
+                elif changed is None:
+                    first = _store_reload(conn)
+                else:
+                    first = _store_apply(conn, changed) if changed else None
+            finally:
+                conn.execute("COMMIT")
+        store["seq"] = seq
+        if first is not None:
+            if first == 0 and changed is None:
+                print(f"🔁 Magasin des cycles: rechargement complet ({len(store['ids'])} cycles)")
+            store["version"] += 1
+            store["dirty"].append((store["version"], first))
+        return store["version"]
+
+def store_dirty_from(version):
+    """Première position modifiée depuis version, None si à jour, 0 si l'historique des changements est dépassé"""
+    store = CYCLE_STORE
+    if version == store["version"]:
+        return None
+    dirty = store["dirty"]
+    if version is None or not dirty or dirty[0][0] > version + 1:
+        return 0
+    return min(position for changed_version, position in dirty if changed_version > version)
+
+# ============ MOTEUR DE COMPTAGE DES CYCLES ACTIFS ============
+
+ACTIVE_CYCLES_VIEW = {"version": None, "active_counts": array('q'), "buy_counts": array('q'), "sell_counts": array('q')}
+
+def refresh_active_cycles():
+    """Comptes cumulés actifs/achat/vente, prolongés depuis la première position modifiée du magasin"""
+    with CYCLE_STORE_LOCK:
+        refresh_cycle_store()
+        store = CYCLE_STORE
+        view = ACTIVE_CYCLES_VIEW
+        start = store_dirty_from(view["version"])
+        cache_event("active_cycles", start is None)
+        if start is not None:
+            for key in ("active_counts", "buy_counts", "sell_counts"):
+                del view[key][start:]
+            active = view["active_counts"][-1] if start else 0
+            buy = view["buy_counts"][-1] if start else 0
+            sell = view["sell_counts"][-1] if start else 0
+            phases = [_cycle_phase(status) for status in store["status_names"]]
+            for code in store["status"][start:]:
+                is_active, is_buy, is_sell = phases[code]
+                active += is_active
+                buy += is_buy
+                sell += is_sell
+                view["active_counts"].append(active)
+                view["buy_counts"].append(buy)
+                view["sell_counts"].append(sell)
+            view["version"] = store["version"]
+        timeline = {key: view[key][:] for key in ("active_counts", "buy_counts", "sell_counts")}
+        timeline["ids"] = store["ids"][:]
+        return timeline
+
+# ============ HISTORIQUE HORODATE DES CYCLES ACTIFS ============
+
+# Buckets clos figés dans cycles_history; seul le bucket ouvert est recalculé.
+# Le nombre d'actifs est exact (dates de création/complétion), mais la répartition achat/vente d'un
+# bucket clos vient du statut des cycles au moment du calcul: elle n'est fidèle que pour le bucket
+# calculé juste après sa clôture. Les buckets rattrapés plus tard sont marqués approximate.
+CYCLES_HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cycles_history (
+    width INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    active INTEGER NOT NULL,
+    buy INTEGER NOT NULL,
+    sell INTEGER NOT NULL,
+    approximate INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (width, bucket)
+) WITHOUT ROWID
+"""
+HISTORY_BUY_SQL = "status != 'completed' AND status LIKE '%buy%'"
+HISTORY_CACHE = {}
+HISTORY_LOCK = threading.Lock()
+
+def history_time_sql():
+    """(expression création, expression complétion) en secondes unix, None sans colonne de création"""
+    created = find_cycle_column(CYCLE_CREATED_COLUMNS)
+    if created is None:
+        return None
+    completed = find_cycle_column(CYCLE_COMPLETED_COLUMNS)
+    created_sql = epoch_sql(created)
+    # Cycle complete sans date de complétion: considéré terminé dès sa création
+    completed_sql = f"COALESCE({epoch_sql(completed)}, {created_sql})" if completed else created_sql
+    return created_sql, completed_sql
+
+def ensure_history_schema(conn):
+    """Index sur les expressions d'horodatage (mêmes textes que les requêtes) + table des buckets figés"""
+    conn.execute(CYCLES_HISTORY_SCHEMA)
+    if "approximate" not in {row[1] for row in conn.execute("PRAGMA table_info(cycles_history)")}:
+        # Table créée avant le marquage: ses buckets ont tous été rattrapés, donc approximatifs
+        conn.execute("ALTER TABLE cycles_history ADD COLUMN approximate INTEGER NOT NULL DEFAULT 1")
+    exprs = history_time_sql()
+    if exprs is None:
+        return
+    created_sql, completed_sql = exprs
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_cycles_created_epoch ON cycles({created_sql}, status)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_cycles_completed_epoch ON cycles({completed_sql}) WHERE status = 'completed'")
+
+def _history_range(conn, exprs, width, first, last):
+    """(bucket, actifs, achat, vente) à la fin de chaque bucket clos de first à last, par GROUP BY sur les index"""
+    created_sql, completed_sql = exprs
+    start = first * width
+    created_before, buy_before = conn.execute(f"SELECT COUNT(*), COALESCE(SUM({HISTORY_BUY_SQL}), 0) FROM cycles WHERE {created_sql} < ?", (start,)).fetchone()
+    completed_before = conn.execute(f"SELECT COUNT(*) FROM cycles WHERE status = 'completed' AND {completed_sql} < ?", (start,)).fetchone()[0]
+    created = {bucket: (count, buy) for bucket, count, buy in conn.execute(f"SELECT CAST({created_sql} / ? AS INTEGER) AS bucket, COUNT(*), COALESCE(SUM({HISTORY_BUY_SQL}), 0) FROM cycles WHERE {created_sql} >= ? GROUP BY bucket", (width, start))}
+    completed = {bucket: count for bucket, count in conn.execute(f"SELECT CAST({completed_sql} / ? AS INTEGER) AS bucket, COUNT(*) FROM cycles WHERE status = 'completed' AND {completed_sql} >= ? GROUP BY bucket", (width, start))}
+    # Achat = cycles actuellement en achat déjà créés (ils n'ont jamais quitté cette phase); vente = le reste des actifs.
+    # Un cycle passé en vente depuis compte en vente dans tous les buckets: la répartition n'est qu'approchée
+    active = created_before - completed_before
+    buy = buy_before
+    rows = []
+    for bucket in range(first, last + 1):
+        count, new_buy = created.get(bucket, (0, 0))
+        active += count - completed.get(bucket, 0)
+        buy += new_buy
+        rows.append((bucket, active, buy, active - buy))
+    return rows
+
+def refresh_active_history(width):
+    """Série continue des buckets de largeur width; None si la table cycles n'a pas d'horodatage"""
+    exprs = history_time_sql()
+    if exprs is None:
+        return None
+    with HISTORY_LOCK:
+        cache = HISTORY_CACHE.get(width)
+        current = int(time.time() // width)
+        closed = []
+        with read_db() as conn:
+            if cache is None:
+                try:
+                    frozen = conn.execute("SELECT bucket, active, buy, sell, approximate FROM cycles_history WHERE width = ? ORDER BY bucket", (width,)).fetchall()
+                except sqlite3.OperationalError:
+                    frozen = []
+                cache = HISTORY_CACHE[width] = {"rows": [tuple(row) for row in frozen]}
+            oldest = conn.execute(f"SELECT MIN({exprs[0]}) FROM cycles").fetchone()[0]
+            if oldest is None:
+                return []
+            # Premier bucket attendu: le plus ancien cycle, borné à la fenêtre conservée
+            window_start = current - HISTORY_MAX_BUCKETS
+            expected_first = max(int(oldest // width), window_start)
+            if cache["rows"] and expected_first < cache["rows"][0][0]:
+                # Cycles antérieurs aux buckets figés (base remplacée): on repart de zéro
+                print(f"🔁 Historique {width}s: reconstruction complete")
+                cache["rows"] = []
+                with write_db() as write_conn:
+                    write_conn.execute("DELETE FROM cycles_history WHERE width = ?", (width,))
+            first = cache["rows"][-1][0] + 1 if cache["rows"] else expected_first
+            if first < current:
+                # Seul le bucket qui vient de se clore voit des statuts encore proches de sa fin
+                closed = [row + (int(row[0] < current - 1),) for row in _history_range(conn, exprs, width, max(first, window_start), current - 1)]
+        if closed:
+            cache["rows"].extend(closed)
+        # La table et le cache gardent la même fenêtre: leur premier bucket reste comparable à expected_first
+        trimmed = bisect.bisect_left(cache["rows"], (window_start,))
+        if closed or trimmed:
+            del cache["rows"][:trimmed]
+            try:
+                with write_db() as write_conn:
+                    write_conn.executemany("INSERT OR IGNORE INTO cycles_history (width, bucket, active, buy, sell, approximate) VALUES (?, ?, ?, ?, ?, ?)", [(width,) + row for row in closed])
+                    write_conn.execute("DELETE FROM cycles_history WHERE width = ? AND bucket < ?", (width, window_start))
+            except sqlite3.Error as e:
+                print(f"⚠️  Historique: buckets non persistes ({e})")
+        cache_event("active_history", not closed)
+        rows = cache["rows"][:]
+    # Bucket ouvert = état actuel, lu dans les compteurs matérialisés (aucun parcours de la table)
+    by_status = get_cycle_totals()["by_status"]
+    active = sum(count for status, count in by_status.items() if _cycle_phase(status)[0])
+    buy = sum(count for status, count in by_status.items() if _cycle_phase(status)[1])
+    rows.append((current, active, buy, active - buy, 0))
+    return rows
+
+def active_history_window(bucket_name, days):
+    """Buckets de la fenêtre demandée (days=0: tout l'historique) avec leurs libellés"""
+    if bucket_name not in HISTORY_BUCKETS:
+        raise ValueError(f"bucket doit etre {', '.join(HISTORY_BUCKETS)}")
+    width = HISTORY_BUCKETS[bucket_name]
+    rows = refresh_active_history(width)
+    if rows is None:
+        return None
+    if days:
+        start = int((time.time() - days * 86400) // width)
+        rows = [row for row in rows if row[0] >= start]
+    short_format, full_format = ("%d %b %Hh", "%Y-%m-%d %H:00") if bucket_name == "hour" else ("%d %b", "%Y-%m-%d")
+    # Les dates texte sont interprétées par SQLite comme UTC: on les réaffiche telles quelles
+    starts = [datetime.fromtimestamp(row[0] * width, timezone.utc) for row in rows]
+    return {"bucket": bucket_name, "window_days": days, "dates": [d.strftime(short_format) for d in starts], "full_dates": [d.strftime(full_format) for d in starts], "counts": [row[1] for row in rows], "buy_counts": [row[2] for row in rows], "sell_counts": [row[3] for row in rows], "split_approximate": [bool(row[4]) for row in rows]}
+
+def per_cycle_history():
+    """Ancien format (un point par cycle) pour les bases sans colonne d'horodatage"""
+    timeline = refresh_active_cycles()
+    base_date = datetime.now() - timedelta(days=len(timeline["ids"]))
+    cycle_dates = [base_date + timedelta(days=i) for i in range(len(timeline["ids"]))]
+    return {"bucket": "cycle", "window_days": 0, "dates": [d.strftime('%d %b') for d in cycle_dates], "full_dates": [d.strftime('%Y-%m-%d') for d in cycle_dates], "counts": list(timeline["active_counts"]), "buy_counts": list(timeline["buy_counts"]), "sell_counts": list(timeline["sell_counts"]), "split_approximate": [i < len(cycle_dates) - 1 for i in range(len(cycle_dates))]}
+
+# ============ COURBE DE PERFORMANCE ============
+
+PERFORMANCE_VIEW = {"version": None, "ids": array('q'), "gains": array('d'), "cumulative": array('d')}
+
+def refresh_performance_curve():
+    """Gains cumulés par cycle complete, prolongés à partir de la première position modifiée du magasin"""
+    with CYCLE_STORE_LOCK:
+        refresh_cycle_store()
+        store = CYCLE_STORE
+        view = PERFORMANCE_VIEW
+        start = store_dirty_from(view["version"])
+        cache_event("performance", start is None)
+        if start is not None:
+            # Les ids du magasin étant triés, tout ce qui précède la position modifiée reste valide
+            cut = bisect.bisect_right(view["ids"], store["ids"][start - 1]) if start else 0
+            for key in ("ids", "gains", "cumulative"):
+                del view[key][cut:]
+            completed = store["status_codes"].get("completed")
+            if completed is not None:
+                ids, status = store["ids"], store["status"]
+                buy_price, sell_price, quantity = store["buy_price"], store["sell_price"], store["quantity"]
+                cumulative_gain = view["cumulative"][-1] if view["cumulative"] else 0
+                for i in range(start, len(ids)):
+                    if status[i] != completed:
+                        continue
+                    gain = (sell_price[i] * quantity[i]) - (buy_price[i] * quantity[i])
+                    cumulative_gain += gain
+                    view["ids"].append(ids[i])
+                    view["gains"].append(gain)
+                    view["cumulative"].append(cumulative_gain)
+            view["version"] = store["version"]
+        return view["ids"][:], view["gains"][:], view["cumulative"][:]
+
+def lttb_indices(values, threshold):
+    """Largest-Triangle-Three-Buckets: indices des points conservant la forme de la courbe"""
+    count = len(values)
+    if threshold >= count or threshold < 3:
+        return list(range(count))
+    indices = [0]
+    bucket_size = (count - 2) / (threshold - 2)
+    previous = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, count)
+        avg_x = (end + next_end - 1) / 2
+        avg_y = sum(values[end:next_end]) / (next_end - end)
+        prev_y = values[previous]
+        best_area = -1
+        best = start
+        for j in range(start, end):
+            area = abs((previous - avg_x) * (values[j] - prev_y) - (previous - j) * (avg_y - prev_y))
+            if area > best_area:
+                best_area = area
+                best = j
+        indices.append(best)
+        previous = best
+    indices.append(count - 1)
+    return indices
+
+# ============ HISTOGRAMME DES GAINS ============
+
+HISTOGRAM_CACHE = {}
+COMPLETED_GAIN_SQL = "(sellPrice * quantity) - (buyPrice * quantity)"
+
+def completed_marker():
+    """Empreinte de l'ensemble des cycles completes (via cycles_stats), None si non materialise"""
+    ensure_cycles_stats()
+    if not STATS_STATE["materialized"]:
+        return None
+    with read_db() as conn:
+        row = conn.execute("SELECT count, total_buy, total_sell FROM cycles_stats WHERE status = 'completed'").fetchone()
+    return tuple(row) if row else (0, 0, 0)
+
+def _completed_window_sql(since_id=None, until_id=None, since=None, until=None):
+    where = ["status = 'completed'"]
+    params = []
+    if since_id is not None:
+        where.append("id >= ?")
+        params.append(since_id)
+    if until_id is not None:
+        where.append("id <= ?")
+        params.append(until_id)
+    if since is not None or until is not None:
+        column = find_cycle_column(CYCLE_COMPLETED_COLUMNS) or find_cycle_column(CYCLE_CREATED_COLUMNS)
+        if column is None:
+            raise ValueError("Aucune colonne d'horodatage dans la table cycles")
+        if since is not None:
+            where.append(f"{epoch_sql(column)} >= ?")
+            params.append(since)
+        if until is not None:
+            where.append(f"{epoch_sql(column)} <= ?")
+            params.append(until)
+    return " AND ".join(where), params
+
+def _bin_gains(gains, bins, mode):
+    """Compte les gains (triés en mode quantile) par intervalle; retourne (edges, counts)"""
+    total = len(gains)
+    if mode == "fixed":
+        min_gain, max_gain = min(gains), max(gains)
+        range_size = (max_gain - min_gain) / bins if max_gain > min_gain else 1
+        edges = [min_gain + (i * range_size) for i in range(bins + 1)]
+        counts = [0] * bins
+        for gain in gains:
+            counts[min(int((gain - min_gain) / range_size), bins - 1)] += 1
+        return edges, counts
+    edges = [gains[round(i * (total - 1) / bins)] for i in range(bins + 1)]
+    counts = []
+    start = 0
+    for i in range(bins):
+        end = total if i == bins - 1 else bisect.bisect_left(gains, edges[i + 1], start)
+        counts.append(end - start)
+        start = end
+    return edges, counts
+
+def compute_gains_histogram(bins=HISTOGRAM_DEFAULT_BINS, mode="fixed", since_id=None, until_id=None, since=None, until=None):
+    """Histogramme des gains: magasin colonnaire pour les fenêtres par id, SQLite pour les fenêtres de dates"""
+    bins = int_arg(bins, "bins")
+    bins = max(1, min(HISTOGRAM_DEFAULT_BINS if bins is None else bins, HISTOGRAM_MAX_BINS))
+    since_id = int_arg(since_id, "since_id")
+    until_id = int_arg(until_id, "until_id")
+    if mode not in ("fixed", "quantile"):
+        raise ValueError("mode doit etre 'fixed' ou 'quantile'")
+    key = (bins, mode, since_id, until_id, since, until)
+    marker = completed_marker()
+    cached = HISTOGRAM_CACHE.get(key)
+    hit = marker is not None and cached is not None and cached[0] == marker
+    cache_event("gains_histogram", hit)
+    if hit:
+        return cached[1]
+    if since is None and until is None:
+        # Le magasin n'a pas d'horodatage: seules les fenêtres par id y sont calculées
+        ids, gains, _ = refresh_performance_curve()
+        low = bisect.bisect_left(ids, since_id) if since_id is not None else 0
+        high = bisect.bisect_right(ids, until_id) if until_id is not None else len(ids)
+        gains = gains[low:high]
+        if mode == "quantile":
+            gains = sorted(gains)
+        total = len(gains)
+        if not total:
+            return {"ranges": [], "counts": [], "edges": [], "mode": mode, "total": 0}
+        edges, counts = _bin_gains(gains, bins, mode)
+    else:
+        where, params = _completed_window_sql(since_id, until_id, since, until)
+        gains_sql = f"SELECT {COMPLETED_GAIN_SQL} AS gain FROM cycles WHERE {where}"
+        with read_db() as conn:
+            if mode == "fixed":
+                min_gain, max_gain, total = conn.execute(f"SELECT MIN(gain), MAX(gain), COUNT(*) FROM ({gains_sql})", params).fetchone()
+                if not total:
+                    return {"ranges": [], "counts": [], "edges": [], "mode": mode, "total": 0}
+                range_size = (max_gain - min_gain) / bins if max_gain > min_gain else 1
+                edges = [min_gain + (i * range_size) for i in range(bins + 1)]
+                counts = [0] * bins
+                rows = conn.execute(f"SELECT MIN(CAST((gain - ?) / ? AS INTEGER), ?) AS bin, COUNT(*) FROM ({gains_sql}) GROUP BY bin", [min_gain, range_size, bins - 1] + params)
+                for index, count in rows:
+                    counts[index] = count
+            else:
+                gains = [row[0] for row in conn.execute(f"{gains_sql} ORDER BY gain", params)]
+                total = len(gains)
+                if not total:
+                    return {"ranges": [], "counts": [], "edges": [], "mode": mode, "total": 0}
+                edges, counts = _bin_gains(gains, bins, mode)
+    ranges = [f"${edges[i]:.2f} - ${edges[i + 1]:.2f}" for i in range(bins)]
+    result = {"ranges": ranges, "counts": counts, "edges": [round(e, 4) for e in edges], "mode": mode, "total": total}
+    if marker is not None:
+        if len(HISTOGRAM_CACHE) > 32:
+            HISTOGRAM_CACHE.clear()
+        HISTOGRAM_CACHE[key] = (marker, result)
+    return result
+
+# ============ CLIENT HTTP PARTAGE (KEEP-ALIVE + SINGLE-FLIGHT) ============
+
+HTTP_STATE = {"session": None}
+HTTP_LOCK = threading.Lock()
+SINGLE_FLIGHT = {}
+SINGLE_FLIGHT_LOCK = threading.Lock()
+
+def http_session():
+    """Session requests partagée: connexions TCP/TLS réutilisées, retries avec backoff sur 429/5xx"""
+    with HTTP_LOCK:
+        if HTTP_STATE["session"] is None:
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+            retry = Retry(total=HTTP_RETRIES, backoff_factor=HTTP_BACKOFF, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET",), raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            HTTP_STATE["session"] = session
+        return HTTP_STATE["session"]
+
+def single_flight(key, fn):
+    """Les appels concurrents sur la même clé partagent une seule requête en vol"""
+    with SINGLE_FLIGHT_LOCK:
+        call = SINGLE_FLIGHT.get(key)
+        leader = call is None
+        if leader:
+            call = {"event": threading.Event(), "result": None, "error": None}
+            SINGLE_FLIGHT[key] = call
+    if not leader:
+        inc("dashboard_single_flight_shared_total", api=key)
+        # Requête du leader bloquée: les suiveurs abandonnent au lieu de s'empiler derrière elle
+        if not call["event"].wait(SINGLE_FLIGHT_WAIT):
+            raise TimeoutError(f"{key}: pas de reponse apres {SINGLE_FLIGHT_WAIT}s")
+        if call["error"] is not None:
+            raise call["error"]
+        return call["result"]
+    start = time.perf_counter()
+    try:
+        call["result"] = fn()
+        return call["result"]
+    except Exception as e:
+        call["error"] = e
+        inc("dashboard_external_request_errors_total", api=key, error=type(e).__name__)
+        raise
+    finally:
+        observe("dashboard_external_request_duration_seconds", time.perf_counter() - start, api=key)
+        with SINGLE_FLIGHT_LOCK:
+            del SINGLE_FLIGHT[key]
+        call["event"].set()
+
+def _request_btc_price():
+    response = http_session().get(f"{COINGECKO_URL}/api/v3/simple/price", params={"ids": "bitcoin", "vs_currencies": "usd"}, timeout=5)
+    response.raise_for_status()
+    price = round(response.json()["bitcoin"]["usd"], 2)
+    BTC_PRICE_CACHE["price"] = price
+    BTC_PRICE_CACHE["timestamp"] = time.time()
+    state_set("btc_price", dict(BTC_PRICE_CACHE))
+    return price
+
+def fetch_btc_price():
+    """Prix CoinGecko (cache partagé entre workers); lève une exception si l'API échoue"""
+    # Un autre worker a peut-être déjà rafraîchi le prix: on relit l'état partagé avant d'appeler CoinGecko
+    sync_shared_state()
     current_time = time.time()
-    if BTC_PRICE_CACHE["price"] > 0 and (current_time - BTC_PRICE_CACHE["timestamp"]) < CACHE_DURATION:
+    hit = BTC_PRICE_CACHE["price"] > 0 and (current_time - BTC_PRICE_CACHE["timestamp"]) < CACHE_DURATION
+    cache_event("btc_price", hit)
+    if hit:
         return BTC_PRICE_CACHE["price"]
+    return single_flight("coingecko", _request_btc_price)
+
+def get_btc_price_coingecko():
     try:
-        url = "https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd"
-        response = requests.get(url, timeout=5)
-        data = response.json()
-        price = round(data["bitcoin"]["usd"], 2)
-        BTC_PRICE_CACHE["price"] = price
-        BTC_PRICE_CACHE["timestamp"] = current_time
-        return price
+        return fetch_btc_price()
     except Exception as e:
         print(f"❌ Erreur CoinGecko: {e}")
         return BTC_PRICE_CACHE["price"] if BTC_PRICE_CACHE["price"] > 0 else 0
 
+# ============ FLUX DE PRIX TEMPS REEL (WEBSOCKET MEXC) ============
+
+PRICE_STREAM = {"price": 0, "bid": 0, "ask": 0, "updated_at": 0, "event_time": 0, "connected": False, "reconnects": 0, "gaps": 0, "published_at": 0, "thread": None}
+
+def _handle_price_message(message):
+    """Met à jour meilleur bid/ask et prix médian; ignore les messages hors ordre et compte les trous"""
+    data = message.get("d")
+    if not isinstance(data, dict) or "b" not in data or "a" not in data:
+        return
+    event_time = message.get("t", 0)
+    if event_time and event_time < PRICE_STREAM["event_time"]:
+        return
+    now = time.time()
+    if PRICE_STREAM["updated_at"] and now - PRICE_STREAM["updated_at"] > PRICE_STREAM_STALE:
+        PRICE_STREAM["gaps"] += 1
+    bid = float(data["b"])
+    ask = float(data["a"])
+    PRICE_STREAM.update({"bid": bid, "ask": ask, "price": round((bid + ask) / 2, 2), "updated_at": now, "event_time": event_time})
+    if now - PRICE_STREAM["published_at"] >= PRICE_STREAM_PUBLISH_INTERVAL:
+        PRICE_STREAM["published_at"] = now
+        state_set("price_stream", {key: PRICE_STREAM[key] for key in ("price", "bid", "ask", "updated_at")})
+        SNAPSHOT_SOURCES["price"].update({"data": PRICE_STREAM["price"], "updated_at": now, "error": None})
+        publish_snapshot()
+
+def stream_price_fresh():
+    return PRICE_STREAM["price"] > 0 and time.time() - PRICE_STREAM["updated_at"] < PRICE_STREAM_STALE
+
+async def _price_stream_session(websockets):
+    async with websockets.connect(MEXC_WS_URL, ping_interval=None) as ws:
+        await ws.send(json.dumps({"method": "SUBSCRIPTION", "params": [MEXC_WS_CHANNEL]}))
+        PRICE_STREAM["connected"] = True
+        print(f"✅ Flux prix connecte: {MEXC_WS_CHANNEL}")
+        last_ping = time.time()
+        while True:
+            if time.time() - last_ping >= PRICE_STREAM_PING:
+                await ws.send(json.dumps({"method": "PING"}))
+                last_ping = time.time()
+            # Aucun message pendant trop longtemps: connexion considérée morte, on se reconnecte
+            raw = await asyncio.wait_for(ws.recv(), timeout=PRICE_STREAM_STALE * 2)
+            _handle_price_message(json.loads(raw))
+
+async def price_stream_main():
+    import websockets
+    backoff = 1
+    while True:
+        try:
+            await _price_stream_session(websockets)
+        except Exception as e:
+            print(f"⚠️  Flux prix interrompu ({e!r}), reconnexion dans {backoff}s")
+        PRICE_STREAM["connected"] = False
+        PRICE_STREAM["reconnects"] += 1
+        await asyncio.sleep(backoff)
+        backoff = 1 if stream_price_fresh() else min(backoff * 2, 30)
+
+def start_price_stream():
+    """Démarre le client WebSocket (optionnel: PRICE_STREAM=1 et module websockets installé)"""
+    if not PRICE_STREAM_ENABLED or PRICE_STREAM["thread"] is not None:
+        return
+    # Simple vérification de présence: le module n'est importé que dans le thread du flux
+    if importlib.util.find_spec("websockets") is None:
+        print("⚠️  PRICE_STREAM=1 mais le module websockets n'est pas installe (pip install websockets)")
+        return
+    PRICE_STREAM["thread"] = threading.Thread(target=lambda: asyncio.run(price_stream_main()), daemon=True)
+    PRICE_STREAM["thread"].start()
+
+def fetch_current_price():
+    """Prix temps réel du flux WebSocket s'il est frais, sinon CoinGecko (REST); lève une exception en cas d'échec"""
+    if stream_price_fresh():
+        return PRICE_STREAM["price"]
+    return fetch_btc_price()
+
+def get_btc_price():
+    """Comme fetch_current_price, mais retombe sur le dernier prix connu (ou 0) sans lever"""
+    if stream_price_fresh():
+        return PRICE_STREAM["price"]
+    return get_btc_price_coingecko()
+
 def create_mexc_signature(query_string, secret_key):
     return hmac.new(secret_key.encode('utf-8'), query_string.encode('utf-8'), hashlib.sha256).hexdigest()
 
+def _request_mexc_balances():
+    config = CONFIG
+    api_key = config.get("MEXC_API_KEY", "")
+    secret_key = config.get("MEXC_SECRET_KEY", "")
+    if not api_key or not secret_key:
+        return {"usdc": 0, "btc": 0}
+    timestamp = int(time.time() * 1000)
+    query_string = f"timestamp={timestamp}"
+    signature = create_mexc_signature(query_string, secret_key)
+    url = f"{MEXC_API_URL}/api/v3/account?{query_string}&signature={signature}"
+    headers = {"X-MEXC-APIKEY": api_key}
+    response = http_session().get(url, headers=headers, timeout=10)
+    if response.status_code != 200:
+        raise RuntimeError(f"HTTP {response.status_code}")
+    data = response.json()
+    balances = data.get("balances", [])
+    usdc_balance = 0
+    btc_balance = 0
+    for balance in balances:
+        asset = balance.get("asset", "")
+        free = float(balance.get("free", "0"))
+        locked = float(balance.get("locked", "0"))
+        total = free + locked
+        if asset == "USDC":
+            usdc_balance = total
+        elif asset == "BTC":
+            btc_balance = total
+    result = {"usdc": round(usdc_balance, 2), "btc": round(btc_balance, 8)}
+    BALANCES_CACHE["data"] = result
+    BALANCES_CACHE["timestamp"] = time.time()
+    return result
+
+def fetch_mexc_balances():
+    hit = BALANCES_CACHE["data"] is not None and (time.time() - BALANCES_CACHE["timestamp"]) < BALANCES_CACHE_DURATION
+    cache_event("mexc_balances", hit)
+    if hit:
+        return BALANCES_CACHE["data"]
+    return single_flight("mexc_balances", _request_mexc_balances)
+
 def get_mexc_balances():
     try:
-        api_key = CONFIG.get("MEXC_API_KEY", "")
-        secret_key = CONFIG.get("MEXC_SECRET_KEY", "")
-        if not api_key or not secret_key:
-            return {"usdc": 0, "btc": 0}
-        timestamp = int(time.time() * 1000)
-        query_string = f"timestamp={timestamp}"
-        signature = create_mexc_signature(query_string, secret_key)
-        url = f"https://api.mexc.com/api/v3/account?{query_string}&signature={signature}"
-        headers = {"X-MEXC-APIKEY": api_key}
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code != 200:
-            return {"usdc": 0, "btc": 0}
-        data = response.json()
-        balances = data.get("balances", [])
-        usdc_balance = 0
-        btc_balance = 0
-        for balance in balances:
-            asset = balance.get("asset", "")
-            free = float(balance.get("free", "0"))
-            locked = float(balance.get("locked", "0"))
-            total = free + locked
-            if asset == "USDC":
-                usdc_balance = total
-            elif asset == "BTC":
-                btc_balance = total
-        return {"usdc": round(usdc_balance, 2), "btc": round(btc_balance, 8)}
+        return fetch_mexc_balances()
     except Exception as e:
         print(f"❌ Erreur MEXC: {e}")
-        return {"usdc": 0, "btc": 0}
+        return BALANCES_CACHE["data"] or {"usdc": 0, "btc": 0}
 
 def get_latest_export_files():
     try:
         export_dir = "exports"
         if not os.path.exists(export_dir):
             return None, None
-        files = os.listdir(export_dir)
-        csv_files = sorted([f for f in files if f.endswith('.csv')], reverse=True)
-        json_files = sorted([f for f in files if f.endswith('.json')], reverse=True)
-        csv_file = csv_files[0] if csv_files else None
-        json_file = json_files[0] if json_files else None
+        # Un seul passage sur le dossier (les noms horodatés se trient chronologiquement)
+        csv_file = None
+        json_file = None
+        with os.scandir(export_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.csv') and (csv_file is None or entry.name > csv_file):
+                    csv_file = entry.name
+                elif entry.name.endswith('.json') and (json_file is None or entry.name > json_file):
+                    json_file = entry.name
         return csv_file, json_file
     except Exception as e:
         print(f"Erreur get_latest_export_files: {e}")
         return None, None
 
+# ============ EXPORT NATIF EN STREAMING ============
+
+def export_query(since_id=None, until_id=None, after_id=None, since=None, until=None, statuses=None, fields=None):
+    """Colonnes, SQL et paramètres de l'export, toujours par id croissant (after_id = reprise)"""
+    selected = select_cycle_columns(fields)
+    where = []
+    params = []
+    for condition, value in (("id >= ?", since_id), ("id <= ?", until_id), ("id > ?", after_id)):
+        if value is not None:
+            where.append(condition)
+            params.append(int(value))
+    if since is not None or until is not None:
+        column = find_cycle_column(CYCLE_CREATED_COLUMNS)
+        if column is None:
+            raise ValueError("Aucune colonne d'horodatage dans la table cycles")
+        if since is not None:
+            where.append(f"{epoch_sql(column)} >= ?")
+            params.append(since)
+        if until is not None:
+            where.append(f"{epoch_sql(column)} <= ?")
+            params.append(until)
+    if statuses:
+        status_sql, status_params = status_filter_sql(statuses)
+        where.append(status_sql)
+        params.extend(status_params)
+    sql = "SELECT " + ", ".join(f'"{c}"' for c in selected) + " FROM cycles"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return selected, sql + " ORDER BY id ASC", params
+
+def _export_chunks(sql, params):
+    """Lit le résultat par paquets (fetchmany) sur une connexion dédiée: mémoire constante, instantané cohérent"""
+    conn = _open_read_connection()
+    try:
+        conn.execute("BEGIN")
+        cursor = conn.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK_ROWS)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+def _encode_csv(columns, chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue().encode()
+    for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+
+def _encode_ndjson(columns, chunks):
+    for rows in chunks:
+        yield "".join(json.dumps(dict(zip(columns, row)), default=str) + "\n" for row in rows).encode()
+
+def _encode_json(columns, chunks):
+    separator = "[\n"
+    for rows in chunks:
+        yield (separator + ",\n".join(json.dumps(dict(zip(columns, row)), default=str) for row in rows)).encode()
+        separator = ",\n"
+    yield ("[]" if separator == "[\n" else "\n]").encode()
+
+class _ChunkSink(io.RawIOBase):
+    """Fichier en écriture seule vidé après chaque row group Parquet"""
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+def _arrow_column(pa, declared):
+    """Type Arrow et conversion d'une colonne selon son type déclaré SQLite"""
+    declared = (declared or "").upper()
+    if "INT" in declared:
+        return pa.int64(), int
+    if any(name in declared for name in ("REAL", "FLOA", "DOUB", "NUM", "DEC")):
+        return pa.float64(), float
+    return pa.string(), str
+
+def _encode_parquet(columns, chunks):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    with read_db() as conn:
+        declared = {row["name"]: row["type"] for row in conn.execute("PRAGMA table_info(cycles)")}
+    converters = [_arrow_column(pa, declared.get(column)) for column in columns]
+    schema = pa.schema([(column, arrow_type) for column, (arrow_type, _) in zip(columns, converters)])
+
+    def convert(value, cast):
+        if value is None:
+            return None
+        try:
+            return cast(value)
+        except (TypeError, ValueError):
+            return None
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for rows in chunks:
+            arrays = [pa.array([convert(row[index], cast) for row in rows], type=arrow_type) for index, (arrow_type, cast) in enumerate(converters)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+EXPORT_ENCODERS = {"csv": _encode_csv, "ndjson": _encode_ndjson, "json": _encode_json, "parquet": _encode_parquet}
+
+def _gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+# ============ SNAPSHOT DU DASHBOARD (RAFRAICHI EN ARRIERE-PLAN) ============
+
+# Instantané immuable: jamais modifié après publication, remplacé en bloc par le rafraîchisseur
+DashboardSnapshot = namedtuple("DashboardSnapshot", ["payload", "etag", "published_at", "sources"])
+SNAPSHOT = {"current": None, "thread": None}
+SNAPSHOT_LOCK = threading.Lock()
+SNAPSHOT_WAKE = threading.Event()
+# Levé quand chaque source a répondu (ou échoué) au moins une fois
+SNAPSHOT_READY = threading.Event()
+SNAPSHOT_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=len(SNAPSHOT_INTERVALS), thread_name_prefix="snapshot")
+SNAPSHOT_SOURCES = {
+    name: {"data": None, "updated_at": 0, "error": None, "running": False, "forced": False, "interval": interval}
+    for name, interval in SNAPSHOT_INTERVALS.items()
+}
+SNAPSHOT_FETCHERS = {
+    "db": lambda: load_cycles_summary(),
+    # Fetchers qui lèvent: l'échec reste visible (error + stale) au lieu d'un prix 0 présenté comme frais
+    "price": lambda: fetch_current_price(),
+    "balances": lambda: fetch_mexc_balances(),
+}
+
+def publish_snapshot():
+    """Assemble un nouvel instantané à partir des dernières données de chaque source"""
+    with SNAPSHOT_LOCK:
+        db_data = SNAPSHOT_SOURCES["db"]["data"] or {"cycles": [], "next_cursor": None, "active_cycles": [], "active_next_cursor": None, "total_count": 0, "completed_count": 0, "total_buy": 0, "total_sell": 0, "by_status": {}}
+        btc_price = SNAPSHOT_SOURCES["price"]["data"] or 0
+        mexc_balances = SNAPSHOT_SOURCES["balances"]["data"] or {"usdc": 0, "btc": 0}
+        stats = calculate_stats(db_data["total_buy"], db_data["total_sell"])
+        config = CONFIG
+        payload = {"cycles": db_data["cycles"], "next_cursor": db_data["next_cursor"], "active_cycles": db_data["active_cycles"], "active_next_cursor": db_data["active_next_cursor"], "stats": {**stats, "total_cycles": db_data["total_count"], "completed_cycles": db_data["completed_count"], "by_status": db_data["by_status"]}, "balances": {"usdc": mexc_balances["usdc"], "btc": mexc_balances["btc"], "btc_price": btc_price, "price_source": "stream" if stream_price_fresh() else "rest"}, "config": {"buy_offset": config.get("BUY_OFFSET", "-400"), "sell_offset": config.get("SELL_OFFSET", "500"), "percent": config.get("PERCENT", "3")}}
+        etag = hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+        current = SNAPSHOT["current"]
+        sources = tuple((name, source["updated_at"], source["error"]) for name, source in SNAPSHOT_SOURCES.items())
+        if current is not None and current.etag == etag:
+            SNAPSHOT["current"] = current._replace(sources=sources)
+        else:
+            SNAPSHOT["current"] = DashboardSnapshot(payload, etag, time.time(), sources)
+        return SNAPSHOT["current"]
+
+def _refresh_source(name):
+    source = SNAPSHOT_SOURCES[name]
+    source["forced"] = False
+    try:
+        data = SNAPSHOT_FETCHERS[name]()
+        source["data"] = data
+        source["updated_at"] = time.time()
+        source["error"] = None
+    except Exception as e:
+        source["error"] = str(e)
+        print(f"⚠️  Snapshot: echec source {name}: {e}")
+    finally:
+        source["running"] = False
+    publish_snapshot()
+    if all(source["updated_at"] or source["error"] for source in SNAPSHOT_SOURCES.values()):
+        SNAPSHOT_READY.set()
+
+def refresh_snapshot_now(names=None, timeout=None):
+    """Rafraîchit les sources demandées en parallèle et attend le résultat (au plus timeout secondes)"""
+    futures = []
+    for name in names or SNAPSHOT_SOURCES:
+        SNAPSHOT_SOURCES[name]["running"] = True
+        futures.append(SNAPSHOT_EXECUTOR.submit(_refresh_source, name))
+    concurrent.futures.wait(futures, timeout)
+    return SNAPSHOT["current"] or publish_snapshot()
+
+def invalidate_snapshot(*names):
+    """Force le rafraîchissement des sources au prochain tour (ex: après une action sur les cycles)"""
+    for name in names or SNAPSHOT_SOURCES:
+        SNAPSHOT_SOURCES[name]["forced"] = True
+    SNAPSHOT_WAKE.set()
+
+def snapshot_refresher():
+    print(f"🚀 Thread snapshot demarre (db {SNAPSHOT_INTERVALS['db']}s, prix {SNAPSHOT_INTERVALS['price']}s, balances {SNAPSHOT_INTERVALS['balances']}s)")
+    while True:
+        now = time.time()
+        for name, source in SNAPSHOT_SOURCES.items():
+            if not source["running"] and (source["forced"] or now - source["updated_at"] >= source["interval"]):
+                source["running"] = True
+                SNAPSHOT_EXECUTOR.submit(_refresh_source, name)
+        SNAPSHOT_WAKE.wait(1)
+        SNAPSHOT_WAKE.clear()
+
+def source_stale(name, updated_at, now):
+    """Source jamais chargée ou sans mise à jour réussie depuis SNAPSHOT_STALE_FACTOR intervalles"""
+    return not updated_at or now - updated_at > SNAPSHOT_STALE_FACTOR * SNAPSHOT_INTERVALS[name]
+
+def ensure_snapshot_refresher():
+    with SNAPSHOT_LOCK:
+        if SNAPSHOT["thread"] is None:
+            SNAPSHOT["thread"] = threading.Thread(target=snapshot_refresher, daemon=True)
+            SNAPSHOT["thread"].start()
+
+# ============ FLUX SSE (PUSH DES CHANGEMENTS) ============
+
+STREAM_SUBSCRIBERS = []
+STREAM_LOCK = threading.Lock()
+STREAM_STATE = {"thread": None}
+
+def broadcast_event(event, data):
+    message = f"event: {event}\ndata: {app.json.dumps(data)}\n\n"
+    with STREAM_LOCK:
+        for subscriber in STREAM_SUBSCRIBERS[:]:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # Client trop lent: on le déconnecte, EventSource se reconnectera
+                STREAM_SUBSCRIBERS.remove(subscriber)
+                with subscriber.mutex:
+                    subscriber.queue.clear()
+                subscriber.put_nowait(None)
+
+def _stream_cycle_changes(conn, seq):
+    """Diffuse les cycles modifiés depuis seq; retourne le nouveau seq"""
+    new_seq, changed = read_changes(conn, seq)
+    if changed is None:
+        broadcast_event("reload", {})
+    else:
+        # Un lot peut toucher des milliers de cycles: IN (...) par paquets, sous la limite de variables SQLite
+        for i in range(0, len(changed), SQL_IN_CHUNK):
+            chunk = changed[i:i + SQL_IN_CHUNK]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = [dict(row) for row in conn.execute(f"SELECT * FROM cycles WHERE id IN ({placeholders})", chunk)]
+            found = {row["id"] for row in rows}
+            broadcast_event("cycles", {"changed": rows, "deleted": [cycle_id for cycle_id in chunk if cycle_id not in found]})
+    return new_seq
+
+def stream_producer():
+    """Producteur unique: détecte les changements (DB, mode auto, jobs, balances) et pousse des deltas à tous les abonnés"""
+    print("🚀 Thread flux SSE demarre")
+    conn = None
+    data_version = None
+    seq = None
+    auto_signature = None
+    auto_sent_at = 0
+    jobs_seen = set()
+    balances = None
+    while True:
+        try:
+            sync_shared_state()
+            if conn is None:
+                conn = _open_read_connection()
+                data_version = None
+            ensure_cycles_stats()
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if version != data_version:
+                conn.execute("BEGIN")
+                try:
+                    if data_version is None:
+                        seq = read_changes(conn, None)[0]
+                    else:
+                        seq = _stream_cycle_changes(conn, seq)
+                finally:
+                    conn.execute("COMMIT")
+                if data_version is not None:
+                    totals = get_cycle_totals()
+                    broadcast_event("stats", {**calculate_stats(totals["total_buy"], totals["total_sell"]), "total_cycles": totals["total_count"], "completed_cycles": totals["completed_count"], "by_status": totals["by_status"]})
+                data_version = version
+            signature = tuple(sorted(AUTO_STATE.items()))
+            if signature != auto_signature or time.time() - auto_sent_at >= STREAM_AUTO_RESYNC:
+                broadcast_event("auto", auto_status())
+                auto_signature = signature
+                auto_sent_at = time.time()
+            jobs = all_job_views()
+            for job in jobs.values():
+                if job["finished_at"] is not None and job["id"] not in jobs_seen:
+                    jobs_seen.add(job["id"])
+                    broadcast_event("job", {key: value for key, value in job.items() if key not in ("output", "error")})
+            jobs_seen &= set(jobs)
+            snapshot = SNAPSHOT["current"]
+            if snapshot is not None and snapshot.payload["balances"] != balances:
+                balances = snapshot.payload["balances"]
+                broadcast_event("balances", balances)
+        except Exception as e:
+            print(f"❌ Erreur flux SSE: {e}")
+            if conn is not None:
+                conn.close()
+                conn = None
+        time.sleep(STREAM_POLL_INTERVAL)
+
+def ensure_stream_producer():
+    with STREAM_LOCK:
+        if STREAM_STATE["thread"] is None:
+            STREAM_STATE["thread"] = threading.Thread(target=stream_producer, daemon=True)
+            STREAM_STATE["thread"].start()
+
+@app.route('/api/stream')
+def stream():
+    """Server-Sent Events: cycles, stats, auto, job, balances, reload"""
+    ensure_snapshot_refresher()
+    ensure_stream_producer()
+    subscriber = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+    with STREAM_LOCK:
+        STREAM_SUBSCRIBERS.append(subscriber)
+
+    def events():
+        try:
+            yield f"retry: 3000\nevent: auto\ndata: {json.dumps(auto_status())}\n\n"
+            while True:
+                try:
+                    message = subscriber.get(timeout=STREAM_KEEPALIVE)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if message is None:
+                    return
+                yield message
+        finally:
+            with STREAM_LOCK:
+                if subscriber in STREAM_SUBSCRIBERS:
+                    STREAM_SUBSCRIBERS.remove(subscriber)
+
+    return Response(events(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# ============ CACHE HTTP (ETAG + COMPRESSION) ============
+
+# Les ETags des routes d'analyse dérivent de la version des données (seq du journal, commune à
+# tous les workers): un poll sans changement répond 304 sans recalculer ni sérialiser
+ETAG_SALT = str(os.stat(__file__).st_mtime_ns)
+STATIC_FINGERPRINTS = {}
+STATIC_COMPRESSED = {}
+
+def data_version():
+    """Version des cycles: seq du journal des changements, ou empreinte si le journal n'est pas matérialisé"""
+    ensure_cycles_stats()
+    if STATS_STATE["materialized"]:
+        with read_db() as conn:
+            return read_changes(conn, None)[0]
+    refresh_cycle_store()
+    return CYCLE_STORE["fingerprint"]
+
+def matched_etag(etag):
+    """Variante de l'ETag (brute ou suffixée par l'encodage) présente dans If-None-Match, sinon None"""
+    if "If-None-Match" not in request.headers:
+        return None
+    for variant in (etag, f"{etag}-gzip", f"{etag}-br"):
+        if request.if_none_match.contains(variant):
+            return variant
+    return None
+
+def data_etag(extra=None):
+    """Décorateur: ETag fort = (URL, version des données, extra()); 304 si le client a déjà cette version"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                etag = hashlib.sha1(repr((ETAG_SALT, request.full_path, data_version(), extra() if extra else None)).encode()).hexdigest()
+            except Exception as e:
+                print(f"⚠️  ETag indisponible: {e}")
+                return view(*args, **kwargs)
+            matched = matched_etag(etag)
+            cache_event("http_etag", matched is not None)
+            if matched is not None:
+                response = app.response_class(status=304)
+                response.set_etag(matched)
+            else:
+                response = app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
+
+def static_url(filename):
+    """URL d'un fichier statique suffixée par l'empreinte de son contenu (cache navigateur d'un an)"""
+    path = os.path.join(app.static_folder, filename)
+    mtime = os.stat(path).st_mtime_ns
+    cached = STATIC_FINGERPRINTS.get(filename)
+    if cached is None or cached[0] != mtime:
+        with open(path, "rb") as f:
+            cached = STATIC_FINGERPRINTS[filename] = (mtime, hashlib.sha1(f.read()).hexdigest()[:10])
+    return f"{app.static_url_path}/{filename}?v={cached[1]}"
+
+app.jinja_env.globals["static_url"] = static_url
+
+def _negotiate_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+def _compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=COMPRESS_BROTLI_QUALITY)
+    compressor = zlib.compressobj(COMPRESS_GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+@app.after_request
+def compress_response(response):
+    """gzip/brotli des réponses texte au-delà de COMPRESS_MIN_BYTES; SSE et exports en streaming exclus"""
+    is_static = request.endpoint == "static"
+    if is_static and response.status_code == 200:
+        # Werkzeug ne reconnaît que l'ETag brut: revalidation d'une variante compressée
+        matched = response.get_etag()[0] and matched_etag(response.get_etag()[0])
+        if matched:
+            response.close()
+            response = app.response_class(status=304)
+            response.set_etag(matched)
+    if is_static and response.status_code in (200, 304):
+        # Fichier versionné (?v=empreinte): immuable; sinon revalidation par ETag
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable' if request.args.get('v') else 'no-cache'
+    if not COMPRESS_ENABLED or response.mimetype not in COMPRESS_MIMETYPES or request.endpoint == "export_stream":
+        return response
+    response.vary.add("Accept-Encoding")
+    if response.status_code != 200 or "Content-Encoding" in response.headers or (response.is_streamed and not is_static):
+        return response
+    encoding = _negotiate_encoding()
+    if encoding is None:
+        return response
+    etag, weak = response.get_etag()
+    if is_static:
+        # Fichiers statiques compressés une seule fois par version (clé: chemin + ETag)
+        key = (request.path, etag, encoding)
+        compressed = STATIC_COMPRESSED.get(key)
+        if compressed is None:
+            response.direct_passthrough = False
+            data = response.get_data()
+            if len(data) < COMPRESS_MIN_BYTES:
+                return response
+            compressed = STATIC_COMPRESSED[key] = _compress(data, encoding)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_BYTES:
+            return response
+        compressed = _compress(data, encoding)
+    inc("dashboard_http_compressed_total", encoding=encoding)
+    response.direct_passthrough = False
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
+
+@app.before_request
+def sync_worker_state():
+    sync_shared_state()
+    if watch_config():
+        publish_snapshot()
+
+@app.route('/metrics')
+def metrics():
+    """Métriques au format texte Prometheus (par worker: scraper chaque worker ou agréger)"""
+    if not METRICS_ENABLED:
+        return Response("# metriques desactivees (METRICS=0)\n", status=404, mimetype='text/plain')
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/')
 def index():
-    return render_template('dashboard.html')
+    response = app.make_response(render_template('dashboard.html'))
+    response.add_etag()
+    matched = matched_etag(response.get_etag()[0])
+    if matched is not None:
+        response = app.response_class(status=304)
+        response.set_etag(matched)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
-@app.route('/api/auto-status')
-def get_auto_status():
+def auto_status():
     now = datetime.now()
-    status = {"enabled": AUTO_STATE["enabled"], "interval_minutes": AUTO_STATE["interval_minutes"], "last_cycle_time": AUTO_STATE["last_cycle_time"], "next_cycle_time": AUTO_STATE["next_cycle_time"], "minutes_remaining": None}
+    status = {"enabled": AUTO_STATE["enabled"], "interval_minutes": AUTO_STATE["interval_minutes"], "last_cycle_time": AUTO_STATE["last_cycle_time"], "next_cycle_time": AUTO_STATE["next_cycle_time"], "minutes_remaining": None, "seconds_remaining": None}
     if AUTO_STATE["enabled"] and AUTO_STATE["next_cycle_time"]:
         next_cycle = datetime.fromisoformat(AUTO_STATE["next_cycle_time"])
-        remaining = (next_cycle - now).total_seconds() / 60
-        status["minutes_remaining"] = max(0, round(remaining, 1))
-    return jsonify(status)
+        remaining = (next_cycle - now).total_seconds()
+        status["minutes_remaining"] = max(0, round(remaining / 60, 1))
+        status["seconds_remaining"] = max(0, round(remaining))
+    status.update({key: AUTO_STATE[key] for key in AUTO_OPTION_KEYS})
+    status["scheduler"] = dict(SCHEDULER_VIEW)
+    return status
+
+def apply_auto_options(data):
+    """Valide et applique les réglages optionnels du planificateur; retourne un message d'erreur ou None"""
+    update_interval = data.get('update_interval_seconds')
+    policy = data.get('catchup_policy')
+    jitter = data.get('jitter_seconds')
+    if update_interval is not None and not 10 <= update_interval <= 3600:
+        return "update_interval_seconds: entre 10 et 3600 secondes"
+    if policy is not None and policy not in AUTO_CATCHUP_POLICIES:
+        return f"catchup_policy: {', '.join(AUTO_CATCHUP_POLICIES)}"
+    if jitter is not None and not 0 <= jitter <= 300:
+        return "jitter_seconds: entre 0 et 300 secondes"
+    if update_interval is not None:
+        AUTO_STATE["update_interval_seconds"] = update_interval
+    if policy is not None:
+        AUTO_STATE["catchup_policy"] = policy
+    if jitter is not None:
+        AUTO_STATE["jitter_seconds"] = jitter
+    return None
+
+@app.route('/api/auto-status')
+def get_auto_status():
+    return jsonify(auto_status())
 
 @app.route('/api/auto-start', methods=['POST'])
 def start_auto():
@@ -250,12 +2465,16 @@ def start_auto():
             return jsonify({"success": False, "error": "Intervalle minimum: 10 secondes (0.167 min)"})
         if interval > 1440:
             return jsonify({"success": False, "error": "Intervalle maximum: 1440 minutes (24h)"})
+        error = apply_auto_options(data)
+        if error:
+            return jsonify({"success": False, "error": error})
         now = datetime.now()
         AUTO_STATE["enabled"] = True
         AUTO_STATE["interval_minutes"] = interval
         AUTO_STATE["last_cycle_time"] = now.isoformat()
         AUTO_STATE["next_cycle_time"] = (now + timedelta(minutes=interval)).isoformat()
-        save_auto_config()
+        save_auto_config(AUTO_STATE.keys())
+        wake_auto_scheduler()
         print(f"✅ Mode auto DEMARRE: intervalle {interval} minutes")
         return jsonify({"success": True, "message": f"Mode auto activé ({interval} min)"})
     except Exception as e:
@@ -265,7 +2484,8 @@ def start_auto():
 def stop_auto():
     try:
         AUTO_STATE["enabled"] = False
-        save_auto_config()
+        save_auto_config(("enabled",))
+        wake_auto_scheduler()
         print("✅ Mode auto ARRETE")
         return jsonify({"success": True, "message": "Mode auto désactivé"})
     except Exception as e:
@@ -276,208 +2496,191 @@ def update_auto_config():
     try:
         data = request.json or {}
         interval = data.get('interval_minutes')
-        if interval is None:
+        if interval is None and not any(key in data for key in AUTO_OPTION_KEYS):
             return jsonify({"success": False, "error": "interval_minutes requis"})
-        if interval < 0.167:
+        if interval is not None and interval < 0.167:
             return jsonify({"success": False, "error": "Intervalle minimum: 10 secondes (0.167 min)"})
-        if interval > 1440:
+        if interval is not None and interval > 1440:
             return jsonify({"success": False, "error": "Intervalle maximum: 1440 minutes (24h)"})
-        AUTO_STATE["interval_minutes"] = interval
-        if AUTO_STATE["enabled"] and AUTO_STATE["last_cycle_time"]:
-            last_cycle = datetime.fromisoformat(AUTO_STATE["last_cycle_time"])
-            AUTO_STATE["next_cycle_time"] = (last_cycle + timedelta(minutes=interval)).isoformat()
-        save_auto_config()
-        print(f"✅ Config auto mise a jour: intervalle {interval} minutes")
-        return jsonify({"success": True, "message": f"Intervalle mis à jour ({interval} min)"})
+        error = apply_auto_options(data)
+        if error:
+            return jsonify({"success": False, "error": error})
+        fields = [key for key in AUTO_OPTION_KEYS if data.get(key) is not None]
+        if interval is not None:
+            AUTO_STATE["interval_minutes"] = interval
+            fields.append("interval_minutes")
+            if AUTO_STATE["enabled"] and AUTO_STATE["last_cycle_time"]:
+                # Intervalle raccourci: l'échéance recalculée peut être passée, on la ramène à maintenant
+                last_cycle = datetime.fromisoformat(AUTO_STATE["last_cycle_time"])
+                AUTO_STATE["next_cycle_time"] = max(datetime.now(), last_cycle + timedelta(minutes=interval)).isoformat()
+                fields.append("next_cycle_time")
+        save_auto_config(fields)
+        wake_auto_scheduler()
+        print(f"✅ Config auto mise a jour: intervalle {AUTO_STATE['interval_minutes']} minutes, update {AUTO_STATE['update_interval_seconds']}s, politique {AUTO_STATE['catchup_policy']}")
+        return jsonify({"success": True, "message": f"Intervalle mis à jour ({AUTO_STATE['interval_minutes']} min)"})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
+def performance_points(ids, gains, cumulative, indices, columnar):
+    if columnar:
+        return {"cycle_id": [ids[i] for i in indices], "gain": [round(gains[i], 2) for i in indices], "cumulative_gain": [round(cumulative[i], 2) for i in indices]}
+    return [{"cycle_id": ids[i], "gain": round(gains[i], 2), "cumulative_gain": round(cumulative[i], 2)} for i in indices]
+
 @app.route('/api/performance')
+@data_etag()
 def get_performance():
+    """Gains cumulés: ?points=N (sous-échantillonnage LTTB), ?since_id=X (mode delta) et ?format=rows|columns"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, buyPrice, sellPrice, quantity FROM cycles WHERE status = 'completed' ORDER BY id ASC")
-        completed_cycles = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        cumulative_gain = 0
-        performance_data = []
-        for cycle in completed_cycles:
-            gain = (cycle["sellPrice"] * cycle["quantity"]) - (cycle["buyPrice"] * cycle["quantity"])
-            cumulative_gain += gain
-            performance_data.append({"cycle_id": cycle["id"], "gain": round(gain, 2), "cumulative_gain": round(cumulative_gain, 2)})
-        return jsonify(performance_data)
+        columnar = response_format() == "columns"
+        ids, gains, cumulative = refresh_performance_curve()
+        since_id = int_arg(request.args.get('since_id'), "since_id")
+        if since_id is not None:
+            start = bisect.bisect_right(ids, since_id)
+            base_cumulative = cumulative[start - 1] if start > 0 else 0
+            points = performance_points(ids, gains, cumulative, range(start, len(ids)), columnar)
+            return jsonify({"points": points, "base_cumulative": round(base_cumulative, 2), "last_id": ids[-1] if ids else None})
+        points = int_arg(request.args.get('points'), "points")
+        indices = lttb_indices(cumulative, points) if points else range(len(ids))
+        return jsonify(performance_points(ids, gains, cumulative, indices, columnar))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"❌ Erreur performance: {e}")
-        return jsonify([])
+        return jsonify([]), 500
 
 @app.route('/api/gains-distribution')
+@data_etag()
 def get_gains_distribution():
+    """Distribution des gains: ?bins=N&mode=fixed|quantile&since_id=&until_id=&since=&until="""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("SELECT buyPrice, sellPrice, quantity FROM cycles WHERE status = 'completed'")
-        completed_cycles = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        gains = []
-        for cycle in completed_cycles:
-            gain = (cycle["sellPrice"] * cycle["quantity"]) - (cycle["buyPrice"] * cycle["quantity"])
-            gains.append(gain)
-        if not gains:
-            return jsonify({"ranges": [], "counts": []})
-        min_gain = min(gains)
-        max_gain = max(gains)
-        range_size = (max_gain - min_gain) / 8 if max_gain > min_gain else 1
-        ranges = []
-        counts = []
-        for i in range(8):
-            range_start = min_gain + (i * range_size)
-            range_end = min_gain + ((i + 1) * range_size)
-            count = sum(1 for g in gains if range_start <= g < range_end or (i == 7 and g == range_end))
-            ranges.append(f"${range_start:.2f} - ${range_end:.2f}")
-            counts.append(count)
-        return jsonify({"ranges": ranges, "counts": counts})
+        histogram = compute_gains_histogram(
+            bins=request.args.get('bins', HISTOGRAM_DEFAULT_BINS),
+            mode=request.args.get('mode', 'fixed'),
+            since_id=request.args.get('since_id'),
+            until_id=request.args.get('until_id'),
+            since=parse_time_arg(request.args.get('since'), "since"),
+            until=parse_time_arg(request.args.get('until'), "until"))
+        return jsonify(histogram)
+    except ValueError as e:
+        return jsonify({"ranges": [], "counts": [], "error": str(e)}), 400
     except Exception as e:
         print(f"❌ Erreur gains distribution: {e}")
-        return jsonify({"ranges": [], "counts": []})
+        return jsonify({"ranges": [], "counts": []}), 500
 
 @app.route('/api/active-cycles-timeline')
+@data_etag()
 def get_active_cycles_timeline():
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, status FROM cycles ORDER BY id ASC")
-        all_cycles = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        if not all_cycles:
+        timeline = refresh_active_cycles()
+        if not timeline["ids"]:
             return jsonify({"cycle_ids": [], "active_counts": []})
-        cycle_ids = []
-        active_counts = []
-        for i, cycle in enumerate(all_cycles):
-            cycle_ids.append(cycle["id"])
-            active_count = sum(1 for c in all_cycles[:i+1] if c["status"] != "completed")
-            active_counts.append(active_count)
+        cycle_ids = timeline["ids"]
+        active_counts = timeline["active_counts"]
         if len(cycle_ids) > 50:
             step = len(cycle_ids) // 50
             cycle_ids = cycle_ids[::step]
             active_counts = active_counts[::step]
-        return jsonify({"cycle_ids": cycle_ids, "active_counts": active_counts})
+        return jsonify({"cycle_ids": list(cycle_ids), "active_counts": list(active_counts)})
     except Exception as e:
         print(f"❌ Erreur active cycles timeline: {e}")
-        return jsonify({"cycle_ids": [], "active_counts": []})
+        return jsonify({"cycle_ids": [], "active_counts": []}), 500
+
+def history_request():
+    """Paramètres communs des routes d'historique: ?bucket=hour|day|week&days=N (réponse déjà en colonnes: format=columns accepté)"""
+    response_format()
+    bucket_name = request.args.get('bucket', HISTORY_DEFAULT_BUCKET)
+    days = max(0, request.args.get('days', 0, type=int))
+    return active_history_window(bucket_name, days) or per_cycle_history()
+
+def history_etag_extra():
+    # Le bucket ouvert et la fenêtre glissent avec l'heure: l'ETag change à chaque nouveau bucket
+    width = HISTORY_BUCKETS.get(request.args.get('bucket', HISTORY_DEFAULT_BUCKET), HISTORY_BUCKETS["hour"])
+    return int(time.time() // width)
 
 @app.route('/api/active-cycles-history')
+@data_etag(extra=history_etag_extra)
 def get_active_cycles_history():
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, status FROM cycles ORDER BY id ASC")
-        all_cycles = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        if not all_cycles:
-            return jsonify({"dates": [], "counts": [], "full_dates": []})
-        base_date = datetime.now() - timedelta(days=len(all_cycles))
-        dates = []
-        counts = []
-        full_dates = []
-        for i, cycle in enumerate(all_cycles):
-            cycle_date = base_date + timedelta(days=i)
-            active_count = sum(1 for c in all_cycles[:i+1] if c["status"] != "completed")
-            dates.append(cycle_date.strftime('%d %b'))
-            counts.append(active_count)
-            full_dates.append(cycle_date.strftime('%Y-%m-%d'))
-        return jsonify({"dates": dates, "counts": counts, "full_dates": full_dates})
+        history = history_request()
+        return jsonify({key: history[key] for key in ("bucket", "window_days", "dates", "counts", "full_dates")})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"❌ Erreur active cycles history: {e}")
         import traceback
         traceback.print_exc()
-        return jsonify({"dates": [], "counts": [], "full_dates": []})
+        return jsonify({"dates": [], "counts": [], "full_dates": []}), 500
+
 @app.route('/api/active-cycles-history-split')
+@data_etag(extra=history_etag_extra)
 def get_active_cycles_history_split():
-    """Retourne l'historique séparé des cycles en achat vs vente"""
+    """Retourne l'historique séparé des cycles en achat vs vente, agrégé par bucket de temps"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, status FROM cycles ORDER BY id ASC")
-        all_cycles = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        
-        if not all_cycles:
-            return jsonify({"dates": [], "buy_counts": [], "sell_counts": [], "full_dates": []})
-        
-        base_date = datetime.now() - timedelta(days=len(all_cycles))
-        
-        dates = []
-        buy_counts = []
-        sell_counts = []
-        full_dates = []
-        
-        for i, cycle in enumerate(all_cycles):
-            cycle_date = base_date + timedelta(days=i)
-            
-            # Compter les cycles en phase d'achat (statut contient 'buy')
-            buy_count = sum(1 for c in all_cycles[:i+1] 
-                          if c["status"] != "completed" 
-                          and ('buy' in c["status"].lower() or c["status"] == 'order_buy_placed' or c["status"] == 'order_buy_filled'))
-            
-            # Compter les cycles en phase de vente (statut contient 'sell')
-            sell_count = sum(1 for c in all_cycles[:i+1] 
-                           if c["status"] != "completed" 
-                           and ('sell' in c["status"].lower() or c["status"] == 'order_sell_placed'))
-            
-            dates.append(cycle_date.strftime('%d %b'))
-            buy_counts.append(buy_count)
-            sell_counts.append(sell_count)
-            full_dates.append(cycle_date.strftime('%Y-%m-%d'))
-        
-        return jsonify({
-            "dates": dates,
-            "buy_counts": buy_counts,
-            "sell_counts": sell_counts,
-            "full_dates": full_dates
-        })
-        
+        history = history_request()
+        return jsonify({key: history[key] for key in ("bucket", "window_days", "dates", "buy_counts", "sell_counts", "split_approximate", "full_dates")})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"❌ Erreur active cycles history split: {e}")
         import traceback
         traceback.print_exc()
-        return jsonify({"dates": [], "buy_counts": [], "sell_counts": [], "full_dates": []})
+        return jsonify({"dates": [], "buy_counts": [], "sell_counts": [], "split_approximate": [], "full_dates": []}), 500
 
 @app.route('/api/data')
 def get_data():
-    print(f"\n{'='*60}")
-    print(f"⏳  Requete /api/data a {datetime.now().strftime('%H:%M:%S')}")
-    print(f"{'='*60}")
-    db_data = get_cycles_from_db()
-    stats = calculate_stats(db_data["completed"])
-    btc_price = get_btc_price_coingecko()
-    mexc_balances = get_mexc_balances()
-    print(f"✅ Donnees preparees")
-    print(f"{'='*60}\n")
-    response = jsonify({"cycles": db_data["cycles"], "stats": {**stats, "total_cycles": db_data["total_count"], "completed_cycles": db_data["completed_count"]}, "balances": {"usdc": mexc_balances["usdc"], "btc": mexc_balances["btc"], "btc_price": btc_price}, "config": {"buy_offset": CONFIG.get("BUY_OFFSET", "-400"), "sell_offset": CONFIG.get("SELL_OFFSET", "500"), "percent": CONFIG.get("PERCENT", "3")}, "last_update": datetime.now().strftime("%H:%M:%S")})
-    response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
+    ensure_snapshot_refresher()
+    if not SNAPSHOT_READY.is_set():
+        # Premier appel du worker: les sources lentes (API MEXC) ne bloquent pas plus de SNAPSHOT_MAX_WAIT s,
+        # on sert ce qui est prêt et le flag stale signale les valeurs manquantes
+        SNAPSHOT_READY.wait(SNAPSHOT_MAX_WAIT)
+    snapshot = SNAPSHOT["current"] or publish_snapshot()
+    now = time.time()
+    stale = {name: source_stale(name, updated_at, now) for name, updated_at, error in snapshot.sources}
+    # Le contenu peut vieillir sans changer: l'ETag le distingue pour que le client voie passer le flag
+    etag = snapshot.etag + ("-stale" if any(stale.values()) else "")
+    matched = matched_etag(etag)
+    cache_event("snapshot_etag", matched is not None)
+    if matched is not None:
+        response = app.response_class(status=304)
+    else:
+        sources = {name: {"updated_at": datetime.fromtimestamp(updated_at).isoformat() if updated_at else None, "age_seconds": round(now - updated_at, 1) if updated_at else None, "error": error, "stale": stale[name]} for name, updated_at, error in snapshot.sources}
+        response = jsonify({**snapshot.payload, "sources": sources, "stale": any(stale.values()), "last_update": datetime.fromtimestamp(snapshot.published_at).strftime("%H:%M:%S")})
+    response.set_etag(matched or etag)
+    response.headers['Cache-Control'] = 'no-cache'
     return response
 
+@app.route('/api/cycles')
+def get_cycles_page():
+    """Cycles paginés: ?limit=&cursor=&order=asc|desc&status=a,b|active&fields=id,status,...&format=rows|columns"""
+    try:
+        statuses = [st for st in request.args.get('status', '').split(',') if st]
+        fields = [f for f in request.args.get('fields', '').split(',') if f]
+        page = query_cycles_page(limit=request.args.get('limit', CYCLES_PAGE_SIZE), cursor=request.args.get('cursor'), order=request.args.get('order', 'desc'), statuses=statuses, fields=fields, columnar=response_format() == "columns")
+        return jsonify(page)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"❌ Erreur cycles: {e}")
+        return jsonify({"error": str(e)}), 500
+
+def job_response(job):
+    """Réponse immédiate avec l'id du job, ou résultat complet si ?wait=1 (ancien comportement synchrone)"""
+    if request.args.get('wait') in ('1', 'true'):
+        wait_job(job, batch_timeout(job) + 5)
+        return jsonify({"success": job["returncode"] == 0, "job_id": job["id"], "output": job["output"], "error": job["error"], **job["result"]})
+    return jsonify({"success": True, "job_id": job["id"], "status": job["status"], "coalesced": job["coalesced"] > 0})
+
 @app.route('/api/new-cycle', methods=['POST'])
 def new_cycle():
     try:
-        result = subprocess.run(['go', 'run', '.', '-n'], cwd=os.getcwd(), capture_output=True, text=True, timeout=30)
-        return jsonify({"success": result.returncode == 0, "output": result.stdout, "error": result.stderr})
+        return job_response(submit_job("new", ["-n"], on_done=_after_cycles_changed))
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
 @app.route('/api/update-cycles', methods=['POST'])
 def update_cycles():
     try:
-        result = subprocess.run(['go', 'run', '.', '-u'], cwd=os.getcwd(), capture_output=True, text=True, timeout=30)
-        return jsonify({"success": result.returncode == 0, "output": result.stdout, "error": result.stderr})
+        return job_response(submit_job("update", ["-u"], on_done=_after_cycles_changed, coalesce=True))
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
@@ -488,23 +2691,129 @@ def cancel_cycle():
         if not cycle_id:
             return jsonify({"success": False, "error": "ID du cycle manquant"})
         print(f"🗑️  Annulation du cycle #{cycle_id}...")
-        result = subprocess.run(['go', 'run', '.', '-c', str(cycle_id)], cwd=os.getcwd(), capture_output=True, text=True, timeout=30)
-        reset_autoincrement()
-        return jsonify({"success": result.returncode == 0, "output": result.stdout, "error": result.stderr})
+        return job_response(submit_job("cancel", ["-c", str(cycle_id)], on_done=_after_cycle_cancelled, coalesce=True))
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)})
+
+def batch_count(value):
+    try:
+        count = int(value)
+    except (TypeError, ValueError):
+        count = 0
+    if not 1 <= count <= BATCH_MAX_ITEMS:
+        raise ValueError(f"count doit etre un entier entre 1 et {BATCH_MAX_ITEMS}")
+    return count
+
+def parse_cycle_ids(value):
+    """IDs distincts d'un lot: liste d'entiers positifs (ou de chaînes de chiffres), au plus BATCH_MAX_ITEMS"""
+    if not isinstance(value, list) or not value:
+        raise ValueError("IDs des cycles manquants (cycle_ids: liste d'entiers)")
+    if len(value) > BATCH_MAX_ITEMS:
+        raise ValueError(f"Trop de cycles: {BATCH_MAX_ITEMS} maximum par lot")
+    cycle_ids = []
+    for cycle_id in value:
+        if isinstance(cycle_id, str) and cycle_id.isdigit():
+            cycle_id = int(cycle_id)
+        if isinstance(cycle_id, bool) or not isinstance(cycle_id, int) or cycle_id <= 0:
+            raise ValueError(f"ID de cycle invalide: {str(cycle_id)[:20]!r}")
+        cycle_ids.append(cycle_id)
+    return list(dict.fromkeys(cycle_ids))
+
+@app.route('/api/new-cycles', methods=['POST'])
+def new_cycles():
+    """Création de N cycles (?count=N) en un seul job, résultat par cycle"""
+    try:
+        count = batch_count(request.args.get('count', (request.get_json(silent=True) or {}).get('count', 1)))
+        print(f"🆕 Creation de {count} cycles...")
+        return job_response(submit_job("new", [["-n"]] * count, on_done=_after_cycles_changed, batch=True))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)})
+
+@app.route('/api/cancel-cycles', methods=['POST'])
+def cancel_cycles():
+    """Annulation de plusieurs cycles ({"cycle_ids": [...]}) en un seul job, un seul reset du compteur à la fin"""
+    try:
+        cycle_ids = parse_cycle_ids((request.get_json(silent=True) or {}).get('cycle_ids'))
+        with read_db() as conn:
+            placeholders = ",".join("?" * len(cycle_ids))
+            known = {row[0] for row in conn.execute(f"SELECT id FROM cycles WHERE id IN ({placeholders})", cycle_ids)}
+        missing = [cycle_id for cycle_id in cycle_ids if cycle_id not in known]
+        cycle_ids = [cycle_id for cycle_id in cycle_ids if cycle_id in known]
+        if not cycle_ids:
+            return jsonify({"success": False, "error": "Aucun cycle trouve", "missing": missing}), 404
+        print(f"🗑️  Annulation de {len(cycle_ids)} cycles...")
+        response = job_response(submit_job("cancel", [["-c", str(cycle_id)] for cycle_id in cycle_ids], on_done=_after_cycles_cancelled, coalesce=True, batch=True))
+        payload = response.get_json()
+        payload["missing"] = missing
+        return jsonify(payload)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
 @app.route('/api/export', methods=['POST'])
 def export_data():
     try:
-        result = subprocess.run(['go', 'run', '.', '-e'], cwd=os.getcwd(), capture_output=True, text=True, timeout=30)
-        if result.returncode != 0:
-            return jsonify({"success": False, "error": result.stderr})
-        csv_file, json_file = get_latest_export_files()
-        return jsonify({"success": True, "output": result.stdout, "csv_file": csv_file, "json_file": json_file, "files": {"csv": csv_file is not None, "json": json_file is not None}})
+        return job_response(submit_job("export", ["-e"], on_done=_after_export, coalesce=True))
     except Exception as e:
         return jsonify({"success": False, "error": str(e)})
 
+@app.route('/api/export/stream')
+def export_stream():
+    """Export natif en streaming: ?format=csv|ndjson|json|parquet&gzip=1, filtres since_id/until_id/since/until/status/fields, reprise via after_id"""
+    try:
+        export_format = request.args.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"format doit etre {', '.join(EXPORT_FORMATS)}")
+        # Vérification de présence seulement: pyarrow n'est importé qu'à l'encodage
+        if export_format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+            raise ValueError("format parquet indisponible: pip install pyarrow")
+        until_id = int_arg(request.args.get('until_id'), "until_id")
+        if until_id is None:
+            # Borne figée au lancement: une reprise (after_id + until_id) exporte exactement la même plage
+            with read_db() as conn:
+                until_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM cycles").fetchone()[0]
+        statuses = [s for s in request.args.get('status', '').split(',') if s]
+        fields = [f for f in request.args.get('fields', '').split(',') if f]
+        columns, sql, params = export_query(since_id=int_arg(request.args.get('since_id'), "since_id"), until_id=until_id, after_id=int_arg(request.args.get('after_id'), "after_id"), since=parse_time_arg(request.args.get('since'), "since"), until=parse_time_arg(request.args.get('until'), "until"), statuses=statuses, fields=fields)
+        body = EXPORT_ENCODERS[export_format](columns, _export_chunks(sql, params))
+        filename = f"cycles_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+        mimetype = EXPORT_FORMATS[export_format]
+        if request.args.get('gzip') == '1':
+            body = _gzip_stream(body)
+            filename += ".gz"
+            mimetype = "application/gzip"
+        return Response(body, mimetype=mimetype, headers={"Content-Disposition": f'attachment; filename="{filename}"', "X-Export-Until-Id": str(until_id), "X-Accel-Buffering": "no"})
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        print(f"❌ Erreur export: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/bot-binary')
+def get_bot_binary():
+    """État du binaire précompilé; le gain estimé = nombre d'exécutions x durée d'une compilation"""
+    build_seconds = BOT_BUILD["build_seconds"]
+    return jsonify({"enabled": BOT_PREBUILT, "binary": BOT_BINARY if BOT_BUILD["fingerprint"] else None, "fingerprint": BOT_BUILD["fingerprint"], "build_seconds": build_seconds, "built_at": BOT_BUILD["built_at"], "runs": BOT_BUILD["runs"], "estimated_saved_seconds": round(BOT_BUILD["runs"] * build_seconds, 1) if build_seconds else 0, "error": BOT_BUILD["error"]})
+
+@app.route('/api/jobs')
+def list_jobs():
+    jobs = all_job_views().values()
+    return jsonify(sorted(jobs, key=lambda j: j["submitted_at"], reverse=True)[:50])
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    job = JOBS.get(job_id)
+    if job is not None:
+        return jsonify(job_view(job))
+    # Job lancé par un autre worker: on force la relecture de l'état partagé
+    sync_shared_state(force=True)
+    if job_id not in SHARED_JOBS:
+        return jsonify({"error": "Job introuvable"}), 404
+    return jsonify(SHARED_JOBS[job_id])
+
 @app.route('/download/<filetype>')
 def download_file(filetype):
     try:
@@ -526,17 +2835,10 @@ def download_file(filetype):
 
 @app.route('/api/get-config', methods=['GET'])
 def get_config():
-    """Récupère la configuration actuelle du bot.conf"""
-    try:
-        config = {}
-        with open('bot.conf', 'r') as f:
-            for line in f:
-                line = line.strip()
-                if '=' in line and not line.startswith('#'):
-                    key, value = line.split('=', 1)
-                    if key in ['BUY_OFFSET', 'SELL_OFFSET', 'PERCENT']:
-                        config[key.lower()] = value.strip('"')
-        return jsonify(config)
+    """Récupère la configuration actuelle du bot.conf (instantané en mémoire)"""
+    try:
+        config = CONFIG
+        return jsonify({key.lower(): config[key] for key in ('BUY_OFFSET', 'SELL_OFFSET', 'PERCENT') if key in config})
     except Exception as e:
         print(f"❌ Erreur get-config: {e}")
         return jsonify({'error': str(e)}), 500
@@ -550,29 +2852,11 @@ def update_bot_config():
         sell_offset = data.get('sell_offset')
         percent = data.get('percent')
         
-        # Lire le fichier actuel
-        with open('bot.conf', 'r') as f:
-            lines = f.readlines()
+        write_config({'BUY_OFFSET': buy_offset, 'SELL_OFFSET': sell_offset, 'PERCENT': percent})
         
-        # Mettre à jour les lignes
-        new_lines = []
-        for line in lines:
-            stripped = line.strip()
-            if stripped.startswith('BUY_OFFSET=') and buy_offset is not None:
-                new_lines.append(f'BUY_OFFSET={buy_offset}\n')
-            elif stripped.startswith('SELL_OFFSET=') and sell_offset is not None:
-                new_lines.append(f'SELL_OFFSET={sell_offset}\n')
-            elif stripped.startswith('PERCENT=') and percent is not None:
-                new_lines.append(f'PERCENT={percent}\n')
-            else:
-                new_lines.append(line)
-        
-        # Écrire le nouveau fichier
-        with open('bot.conf', 'w') as f:
-            f.writelines(new_lines)
-        
-        # Recharger la config en mémoire
-        load_config()
+        # Prévenir les autres workers (qui verraient aussi le changement de mtime au prochain stat)
+        publish_snapshot()
+        state_set("config", {"pid": os.getpid(), "updated_at": time.time(), "version": CONFIG_STATE["version"]})
         
         print(f"✅ Configuration mise à jour: BUY_OFFSET={buy_offset}, SELL_OFFSET={sell_offset}, PERCENT={percent}")
         return jsonify({'success': True, 'message': 'Configuration mise à jour avec succès'})
@@ -580,26 +2864,122 @@ def update_bot_config():
         print(f"❌ Erreur update-config: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# ============ DEMARRAGE (PRECHAUFFAGE + DISPONIBILITE) ============
+
+# Le préchauffage remplit les caches (magasin de cycles, historique, prix, balances) avant le
+# premier chargement de page, qui déclenche sinon cinq calculs à froid en parallèle
+STARTUP = {"started_at": time.time(), "ready_at": None, "steps": [], "warmup_thread": None}
+STARTUP_READY = threading.Event()
+WARMUP_EXEMPT_ENDPOINTS = {"readiness", "metrics", "static", "index", "stream"}
+
+@contextmanager
+def startup_step(name):
+    """Chronomètre une étape du démarrage (rapport de /api/ready et de /metrics)"""
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = str(e)
+        raise
+    finally:
+        STARTUP["steps"].append({"step": name, "seconds": round(time.perf_counter() - start, 3), "error": error})
+
+WARMUP_STEPS = [
+    ("cycle_store", lambda: (refresh_active_cycles(), refresh_performance_curve())),
+    ("gains_histogram", lambda: compute_gains_histogram()),
+    ("history", lambda: [active_history_window(bucket_name, 0) for bucket_name in ("hour", HISTORY_DEFAULT_BUCKET)]),
+    ("snapshot", lambda: refresh_snapshot_now(timeout=WARMUP_MAX_WAIT)),
+]
+
+def startup_report():
+    ready_at = STARTUP["ready_at"]
+    return {"ready": is_ready(), "pid": os.getpid(), "started_at": datetime.fromtimestamp(STARTUP["started_at"]).isoformat(), "ready_in_seconds": round(ready_at - STARTUP["started_at"], 3) if ready_at else None, "steps": list(STARTUP["steps"])}
+
+def is_ready():
+    return STARTUP_READY.is_set() or STARTUP["warmup_thread"] is None
+
+def warm_up():
+    for name, step in WARMUP_STEPS:
+        try:
+            with startup_step(f"warmup_{name}"):
+                step()
+        except Exception as e:
+            print(f"⚠️  Prechauffage {name} en echec: {e}")
+    ensure_snapshot_refresher()
+    STARTUP["ready_at"] = time.time()
+    STARTUP_READY.set()
+    steps = ", ".join(f"{step['step']} {step['seconds']}s" for step in STARTUP["steps"])
+    print(f"⏱️  Pret en {STARTUP['ready_at'] - STARTUP['started_at']:.2f}s ({steps})")
+    # Le binaire du bot ne sert qu'aux jobs: compilé après l'ouverture au trafic
+    try:
+        with startup_step("bot_binary"):
+            ensure_bot_binary()
+    except Exception as e:
+        print(f"⚠️  Prechauffage bot_binary en echec: {e}")
+
+def start_warm_up():
+    """Lance le préchauffage en arrière-plan: le worker sert tout de suite, /api/ready répond 503 jusqu'à la fin"""
+    if not WARMUP_ENABLED:
+        STARTUP["ready_at"] = time.time()
+        STARTUP_READY.set()
+        return
+    STARTUP["warmup_thread"] = threading.Thread(target=warm_up, daemon=True)
+    STARTUP["warmup_thread"].start()
+
+@app.before_request
+def wait_for_warm_up():
+    # Les requêtes arrivées pendant le préchauffage attendent les caches chauds au lieu de recalculer à froid
+    if not is_ready() and request.endpoint not in WARMUP_EXEMPT_ENDPOINTS:
+        STARTUP_READY.wait(WARMUP_MAX_WAIT)
+
+@app.route('/api/ready')
+def readiness():
+    """Sonde de disponibilité: 503 tant que le préchauffage n'est pas terminé, avec le rapport de démarrage"""
+    report = startup_report()
+    return jsonify(report), 200 if report["ready"] else 503
+
+APP_STATE = {"created": False}
+APP_STATE_LOCK = threading.Lock()
+
+def create_app():
+    """Fabrique d'application pour gunicorn (un appel par worker, sans --preload): chaque worker
+    charge la config et la base, un seul est élu leader pour le planificateur auto"""
+    with APP_STATE_LOCK:
+        if APP_STATE["created"]:
+            return app
+        APP_STATE["created"] = True
+    with startup_step("config"):
+        load_config()
+        load_auto_config()
+    with startup_step("database"):
+        init_database()
+    with startup_step("shared_state"):
+        sync_shared_state(force=True)
+    if try_acquire_leadership():
+        start_leader_tasks()
+    else:
+        print(f"🧑‍🤝‍🧑 Worker {os.getpid()} suiveur: le planificateur auto tourne dans un autre worker")
+        LEADER["thread"] = threading.Thread(target=leader_election, daemon=True)
+        LEADER["thread"].start()
+    start_warm_up()
+    return app
+
 if __name__ == '__main__':
-    load_config()
-    load_auto_config()
-    init_database()
-    auto_thread = threading.Thread(target=auto_cycle_worker, daemon=True)
-    auto_thread.start()
+    create_app()
     print("\n" + "="*60)
     print("🚀 DASHBOARD BOT TRADING MEXC")
     print("="*60)
     print(f"🌐 URL: http://localhost:8081")
-    print(f"🔄 Auto-refresh: 3 minutes")
-    print(f"🔄 Update cycles: toutes les 2 minutes")
+    print(f"🔄 Update cycles: toutes les {AUTO_STATE['update_interval_seconds']}s (si cycles actifs)")
     print(f"🤖 Mode auto: {'ACTIF' if AUTO_STATE['enabled'] else 'INACTIF'}")
     if AUTO_STATE['enabled']:
         print(f"⏱️  Intervalle: {AUTO_STATE['interval_minutes']} minutes")
-    print(f"💰 Prix BTC: CoinGecko")
+    print(f"💰 Prix BTC: {'WebSocket MEXC + CoinGecko en secours' if PRICE_STREAM_ENABLED else 'CoinGecko'}")
     print(f"💼 Balances: MEXC")
     print(f"📊 DB: {os.path.abspath(DB_PATH)}")
     print("="*60 + "\n")
     import logging
     log = logging.getLogger('werkzeug')
     log.setLevel(logging.ERROR)
-    app.run(host='0.0.0.0', port=8081, debug=False)
+    app.run(host='0.0.0.0', port=8081, debug=False, threaded=True)
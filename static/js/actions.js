@@ -1,10 +1,35 @@
+// Lancer une commande du bot et attendre la fin du job (sans bloquer le serveur)
+const JOB_POLL_MAX = 600;
+
+async function runJob(url, options) {
+    const response = await fetch(url, options || { method: 'POST' });
+    const submitted = await response.json();
+    if (!submitted.job_id) return { success: false, error: submitted.error };
+    
+    // Une interrogation par seconde, au plus JOB_POLL_MAX fois (10 min)
+    for (let poll = 0; poll < JOB_POLL_MAX; poll++) {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        const jobResponse = await fetch('/api/jobs/' + submitted.job_id);
+        const job = await jobResponse.json().catch(() => ({}));
+        if (!jobResponse.ok) {
+            return { success: false, error: job.error || ('HTTP ' + jobResponse.status) };
+        }
+        if (job.status === 'succeeded' || job.status === 'failed') {
+            return { success: job.status === 'succeeded', output: job.output, error: job.error, ...job.result };
+        }
+        if (job.status !== 'queued' && job.status !== 'running') {
+            return { success: false, error: 'Statut de job inattendu: ' + job.status };
+        }
+    }
+    return { success: false, error: 'Job ' + submitted.job_id + ' toujours en cours apres 10 min' };
+}
+
 // Créer un nouveau cycle
 async function createNewCycle() {
     if (!confirm('Creer un nouveau cycle de trading ?')) return;
     
     try {
-        const response = await fetch('/api/new-cycle', { method: 'POST' });
-        const data = await response.json();
+        const data = await runJob('/api/new-cycle');
         
         if (data.success) {
             alert('✅ Nouveau cycle cree!');
@@ -25,8 +50,7 @@ async function createNewCycle() {
 // Mettre à jour les cycles
 async function updateCycles() {
     try {
-        const response = await fetch('/api/update-cycles', { method: 'POST' });
-        const data = await response.json();
+        const data = await runJob('/api/update-cycles');
         
         if (data.success) {
             alert('✅ Cycles mis a jour!');
@@ -44,23 +68,29 @@ async function updateCycles() {
     }
 }
 
-// Annuler un cycle
+// Annuler un ou plusieurs cycles (IDs séparés par des virgules ou des espaces)
 async function cancelCycle() {
-    const cycleId = prompt('ID du cycle a annuler:');
-    if (!cycleId || cycleId.trim() === '') return;
+    const input = prompt('ID(s) du cycle a annuler (ex: 12, 15, 18):');
+    if (!input || input.trim() === '') return;
+    const cycleIds = input.split(/[\s,;]+/).filter(id => id !== '');
     
-    if (!confirm('Annuler le cycle #' + cycleId + ' ?')) return;
+    if (!confirm('Annuler le(s) cycle(s) #' + cycleIds.join(', #') + ' ?')) return;
     
     try {
-        const response = await fetch('/api/cancel-cycle', {
+        const batch = cycleIds.length > 1;
+        const data = await runJob(batch ? '/api/cancel-cycles' : '/api/cancel-cycle', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ cycle_id: cycleId })
+            body: JSON.stringify(batch ? { cycle_ids: cycleIds } : { cycle_id: cycleIds[0] })
         });
-        const data = await response.json();
         
-        if (data.success) {
-            alert('✅ Cycle #' + cycleId + ' annule!');
+        if (data.success || (data.items && data.succeeded > 0)) {
+            if (data.items) {
+                const failed = data.items.filter(item => !item.success).map(item => '#' + item.cycle_id);
+                alert('✅ ' + data.succeeded + ' cycle(s) annule(s)' + (failed.length ? '\n❌ Echecs: ' + failed.join(', ') : ''));
+            } else {
+                alert('✅ Cycle #' + cycleIds[0] + ' annule!');
+            }
             setTimeout(async () => {
                 await refreshData();
                 await loadPerformanceData();
@@ -75,37 +105,18 @@ async function cancelCycle() {
     }
 }
 
-// Exporter les données
-async function exportData() {
-    try {
-        const response = await fetch('/api/export', { method: 'POST' });
-        const data = await response.json();
-        
-        if (data.success) {
-            const csvLink = document.createElement('a');
-            csvLink.href = '/download/csv';
-            csvLink.download = data.csv_file || 'cycles_export.csv';
-            document.body.appendChild(csvLink);
-            csvLink.click();
-            document.body.removeChild(csvLink);
-            
-            setTimeout(() => {
-                const jsonLink = document.createElement('a');
-                jsonLink.href = '/download/json';
-                jsonLink.download = data.json_file || 'cycles_export.json';
-                document.body.appendChild(jsonLink);
-                jsonLink.click();
-                document.body.removeChild(jsonLink);
-            }, 500);
-            
-            alert('✅ Téléchargement des exports lancé!');
-            setTimeout(refreshData, 1000);
-        } else {
-            alert('❌ Erreur: ' + (data.error || data.output));
-        }
-    } catch (e) {
-        alert('❌ Erreur: ' + e);
-    }
+// Exporter les données (export natif en streaming, sans passer par le bot)
+function exportData() {
+    const formats = ['csv', 'json'];
+    formats.forEach((format, index) => {
+        setTimeout(() => {
+            const link = document.createElement('a');
+            link.href = '/api/export/stream?format=' + format;
+            document.body.appendChild(link);
+            link.click();
+            document.body.removeChild(link);
+        }, index * 500);
+    });
 }
 
 // ============ GESTION DE LA CONFIGURATION BOT ============
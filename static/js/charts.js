@@ -5,12 +5,16 @@ let sparklineBuyChart = null;
 let sparklineSellChart = null;
 let currentPeriod = 14;
 let historyData = { dates: [], buy_counts: [], sell_counts: [], full_dates: [] };
+const PERFORMANCE_POINTS = 500;
 
 // Chargement des données pour les graphiques
 async function loadPerformanceData() {
     try {
-        const response = await fetch('/api/performance');
-        allPerformanceData = await response.json();
+        // Courbe sous-échantillonnée côté serveur (LTTB), en colonnes: directement utilisable par Chart.js
+        const response = await fetch('/api/performance?format=columns&points=' + PERFORMANCE_POINTS, { cache: 'no-cache' });
+        const data = await response.json();
+        if (!data.cycle_id) return;
+        allPerformanceData = data;
         updatePerformanceChart();
     } catch (e) {
         console.error('Erreur performance:', e);
@@ -19,7 +23,7 @@ async function loadPerformanceData() {
 
 async function loadGainsDistribution() {
     try {
-        const response = await fetch('/api/gains-distribution');
+        const response = await fetch('/api/gains-distribution', { cache: 'no-cache' });
         const data = await response.json();
         updateGainsDistributionChart(data);
     } catch (e) {
@@ -27,9 +31,15 @@ async function loadGainsDistribution() {
     }
 }
 
+// Historique horodaté agrégé côté serveur: buckets horaires pour 7/14 jours, journaliers au-delà
+function activeHistoryUrl(days) {
+    if (days > 0 && days <= 14) return '/api/active-cycles-history-split?bucket=hour&days=' + days;
+    return '/api/active-cycles-history-split?bucket=day' + (days > 0 ? '&days=' + days : '');
+}
+
 async function loadActiveCyclesTimeline() {
     try {
-        const response = await fetch('/api/active-cycles-history-split');
+        const response = await fetch(activeHistoryUrl(currentPeriod), { cache: 'no-cache' });
         historyData = await response.json();
         updateDualGaugeAndSparkline(currentPeriod);
     } catch (e) {
@@ -48,25 +58,22 @@ function changePeriod(days) {
         }
     });
     
-    updateDualGaugeAndSparkline(days);
+    loadActiveCyclesTimeline();
+}
+
+// Répartition achat/vente rattrapée après coup: le serveur la signale comme approximative
+function approxSuffix(index) {
+    return (historyData.split_approximate || [])[index] ? ' (approx.)' : '';
 }
 
 // Mise à jour des 2 jauges et sparklines
 function updateDualGaugeAndSparkline(days) {
     if (!historyData.dates || historyData.dates.length === 0) return;
     
-    let filteredDates, filteredBuyCounts, filteredSellCounts;
-    
-    if (days === 0) {
-        filteredDates = historyData.dates;
-        filteredBuyCounts = historyData.buy_counts;
-        filteredSellCounts = historyData.sell_counts;
-    } else {
-        const startIndex = Math.max(0, historyData.dates.length - days);
-        filteredDates = historyData.dates.slice(startIndex);
-        filteredBuyCounts = historyData.buy_counts.slice(startIndex);
-        filteredSellCounts = historyData.sell_counts.slice(startIndex);
-    }
+    // La fenêtre est déjà appliquée par le serveur (?days=)
+    const filteredDates = historyData.dates;
+    const filteredBuyCounts = historyData.buy_counts;
+    const filteredSellCounts = historyData.sell_counts;
     
     const currentBuyValue = filteredBuyCounts[filteredBuyCounts.length - 1] || 0;
     const currentSellValue = filteredSellCounts[filteredSellCounts.length - 1] || 0;
@@ -201,7 +208,7 @@ function updateDualGaugeAndSparkline(days) {
                     padding: 8,
                     displayColors: false,
                     callbacks: {
-                        label: (ctx) => ctx.parsed.y + ' en achat'
+                        label: (ctx) => ctx.parsed.y + ' en achat' + approxSuffix(ctx.dataIndex)
                     }
                 }
             },
@@ -255,7 +262,7 @@ function updateDualGaugeAndSparkline(days) {
                     padding: 8,
                     displayColors: false,
                     callbacks: {
-                        label: (ctx) => ctx.parsed.y + ' en vente'
+                        label: (ctx) => ctx.parsed.y + ' en vente' + approxSuffix(ctx.dataIndex)
                     }
                 }
             },
@@ -276,8 +283,8 @@ function updateDualGaugeAndSparkline(days) {
 
 // Graphique de performance
 function updatePerformanceChart() {
-    const labels = allPerformanceData.map(d => d.cycle_id);
-    const data = allPerformanceData.map(d => d.cumulative_gain);
+    const labels = allPerformanceData.cycle_id;
+    const data = allPerformanceData.cumulative_gain;
     
     if (performanceChart) performanceChart.destroy();
     
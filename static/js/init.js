@@ -5,8 +5,15 @@ loadPerformanceData();
 loadGainsDistribution();
 loadActiveCyclesTimeline();
 refreshAutoStatus();
-setInterval(refreshData, 180000);
-setInterval(refreshAutoStatus, 10000);
+setInterval(tickCountdown, 1000);
+
+// Mises à jour poussées par le serveur (SSE), polling en secours
+if (window.EventSource) {
+    startEventStream();
+} else {
+    setInterval(refreshData, 180000);
+    setInterval(refreshAutoStatus, 10000);
+}
 
 // Charger la config bot au démarrage
 setTimeout(() => {
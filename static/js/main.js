@@ -2,9 +2,27 @@
 let performanceChart = null;
 let gainsDistributionChart = null;
 let activeCyclesTimelineChart = null;
-let allPerformanceData = [];
+let allPerformanceData = { cycle_id: [], gain: [], cumulative_gain: [] };
+let nextCyclesCursor = null;
+let activeCyclesById = new Map();
+let loadedCycles = [];
+let autoCountdown = { enabled: false, seconds: null, receivedAt: 0 };
+let chartsRefreshTimer = null;
 
 // Fonctions utilitaires
+// Réponse ?format=columns ({colonne: [valeurs]}) vers une liste d'objets
+function rowsFromColumns(columns) {
+    const fields = Object.keys(columns);
+    const count = fields.length ? columns[fields[0]].length : 0;
+    const rows = new Array(count);
+    for (let i = 0; i < count; i++) {
+        const row = {};
+        for (const field of fields) row[field] = columns[field][i];
+        rows[i] = row;
+    }
+    return rows;
+}
+
 function formatNumber(n, d) {
     return Number(n).toLocaleString('fr-FR', {
         minimumFractionDigits: d,
@@ -30,38 +48,48 @@ async function refreshAutoStatus() {
     try {
         const response = await fetch('/api/auto-status');
         const data = await response.json();
-        
-        document.getElementById('autoToggle').checked = data.enabled;
-        
-        // Ne mettre à jour l'intervalle QUE si le mode auto est activé
-        if (data.enabled) {
-            document.getElementById('intervalInput').value = data.interval_minutes;
-        }
-        
-        const statusText = document.getElementById('autoStatusText');
-        const countdown = document.getElementById('countdown');
-        
-        if (data.enabled) {
-            statusText.textContent = 'Actif';
-            statusText.classList.remove('inactive');
-            
-            if (data.minutes_remaining !== null) {
-                const mins = Math.floor(data.minutes_remaining);
-                const secs = Math.floor((data.minutes_remaining - mins) * 60);
-                countdown.textContent = mins + 'm ' + secs + 's';
-            } else {
-                countdown.textContent = 'Calcul...';
-            }
-        } else {
-            statusText.textContent = 'Inactif';
-            statusText.classList.add('inactive');
-            countdown.textContent = '--';
-        }
+        applyAutoStatus(data);
     } catch (e) {
         console.error('Erreur auto status:', e);
     }
 }
 
+function applyAutoStatus(data) {
+    document.getElementById('autoToggle').checked = data.enabled;
+    
+    // Ne mettre à jour l'intervalle QUE si le mode auto est activé
+    if (data.enabled) {
+        document.getElementById('intervalInput').value = data.interval_minutes;
+    }
+    
+    const statusText = document.getElementById('autoStatusText');
+    
+    if (data.enabled) {
+        statusText.textContent = 'Actif';
+        statusText.classList.remove('inactive');
+    } else {
+        statusText.textContent = 'Inactif';
+        statusText.classList.add('inactive');
+    }
+    
+    autoCountdown = { enabled: data.enabled, seconds: data.seconds_remaining, receivedAt: Date.now() };
+    tickCountdown();
+}
+
+// Décompte local, resynchronisé à chaque statut reçu du serveur
+function tickCountdown() {
+    const countdown = document.getElementById('countdown');
+    
+    if (!autoCountdown.enabled) {
+        countdown.textContent = '--';
+    } else if (autoCountdown.seconds === null) {
+        countdown.textContent = 'Calcul...';
+    } else {
+        const remaining = Math.max(0, autoCountdown.seconds - Math.floor((Date.now() - autoCountdown.receivedAt) / 1000));
+        countdown.textContent = Math.floor(remaining / 60) + 'm ' + (remaining % 60) + 's';
+    }
+}
+
 async function toggleAuto() {
     const enabled = document.getElementById('autoToggle').checked;
     const interval = parseFloat(document.getElementById('intervalInput').value);
@@ -103,6 +131,7 @@ async function toggleAuto() {
                 statusText.textContent = 'Inactif';
                 statusText.classList.add('inactive');
                 countdown.textContent = '--';
+                autoCountdown.enabled = false;
             } else {
                 alert('❌ ' + data.error);
                 document.getElementById('autoToggle').checked = true;
@@ -144,21 +173,120 @@ async function updateInterval() {
     }
 }
 
+// Rendu des lignes de cycles
+function renderActiveCycleRow(c) {
+    const isBuy = c.status.includes('buy') || c.status === 'buy';
+    const type = isBuy ? 'buy' : 'sell';
+    const price = isBuy ? c.buyPrice : c.sellPrice;
+    
+    const buyAmount = c.buyPrice * c.quantity;
+    const sellAmount = c.sellPrice * c.quantity;
+    const gainPercent = ((sellAmount - buyAmount) / buyAmount * 100).toFixed(2);
+    const gainAbs = (sellAmount - buyAmount).toFixed(2);
+    
+    const percentDedicated = c.percent || 0;
+    const usdcDedicated = c.dedicatedBalance || 0;
+    
+    return '<tr><td>#' + c.id + '</td><td>' + getStatusBadge(type) + '</td><td>$' + formatNumber(price, 2) + '</td><td>' + formatNumber(c.quantity, 8) + '</td><td class="' + (gainPercent >= 0 ? 'positive' : 'negative') + '">' + gainPercent + '%</td><td class="' + (gainAbs >= 0 ? 'positive' : 'negative') + '">$' + gainAbs + '</td><td>' + percentDedicated + '%</td><td>$' + formatNumber(usdcDedicated, 2) + '</td></tr>';
+}
+
+function renderCycleRow(c) {
+    const buyAmount = c.buyPrice * c.quantity;
+    const sellAmount = c.sellPrice * c.quantity;
+    const gainPercent = ((sellAmount - buyAmount) / buyAmount * 100).toFixed(2);
+    const gainAbs = (sellAmount - buyAmount).toFixed(2);
+    
+    const percentDedicated = c.percent || 0;
+    const usdcDedicated = c.dedicatedBalance || 0;
+    
+    return '<tr><td>#' + c.id + '</td><td>' + getStatusBadge(c.status) + '</td><td>' + formatNumber(c.quantity, 8) + '</td><td>$' + formatNumber(c.buyPrice, 2) + '</td><td>$' + formatNumber(c.sellPrice, 2) + '</td><td class="' + (gainPercent >= 0 ? 'positive' : 'negative') + '">' + gainPercent + '%</td><td class="' + (gainAbs >= 0 ? 'positive' : 'negative') + '">$' + gainAbs + '</td><td>' + percentDedicated + '%</td><td>$' + formatNumber(usdcDedicated, 2) + '</td></tr>';
+}
+
+function renderActiveCyclesTable() {
+    const activeCycles = Array.from(activeCyclesById.values()).sort((a, b) => b.id - a.id);
+    const activeTable = document.getElementById('activeCyclesTable');
+    
+    if (activeCycles.length === 0) {
+        activeTable.innerHTML = '<tr><td colspan="8" style="text-align:center;color:#9ca3af;">Aucun cycle actif</td></tr>';
+    } else {
+        activeTable.innerHTML = activeCycles.map(renderActiveCycleRow).join('');
+    }
+}
+
+function renderCyclesTable() {
+    const allTable = document.getElementById('cyclesTable');
+    
+    if (loadedCycles.length === 0) {
+        allTable.innerHTML = '<tr><td colspan="9" style="text-align:center;color:#9ca3af;">Aucun cycle</td></tr>';
+    } else {
+        allTable.innerHTML = loadedCycles.map(renderCycleRow).join('');
+    }
+}
+
+function applyBalances(balances) {
+    document.getElementById('usdcBalance').textContent = formatNumber(balances.usdc, 2);
+    document.getElementById('btcBalance').textContent = formatNumber(balances.btc, 8);
+    document.getElementById('btcPrice').textContent = formatNumber(balances.btc_price, 2);
+}
+
+function applyStats(stats) {
+    document.getElementById('gainAbs').textContent = formatNumber(stats.gain_abs, 2);
+    document.getElementById('gainPercent').textContent = formatNumber(stats.gain_percent, 2);
+    document.getElementById('completedCount').textContent = stats.completed_cycles;
+    document.getElementById('totalCount').textContent = stats.total_cycles;
+}
+
+// Pagination de la table "Tous les cycles" (curseur par id)
+function updateLoadMoreButton() {
+    const button = document.getElementById('loadMoreCycles');
+    if (button) {
+        button.style.display = nextCyclesCursor === null ? 'none' : 'inline-block';
+    }
+}
+
+async function loadMoreCycles() {
+    if (nextCyclesCursor === null) return;
+    
+    try {
+        const response = await fetch('/api/cycles?format=columns&limit=50&cursor=' + nextCyclesCursor);
+        const data = await response.json();
+        const cycles = rowsFromColumns(data.cycles);
+        
+        loadedCycles = loadedCycles.concat(cycles);
+        document.getElementById('cyclesTable').insertAdjacentHTML('beforeend', cycles.map(renderCycleRow).join(''));
+        nextCyclesCursor = data.next_cursor;
+        updateLoadMoreButton();
+    } catch (e) {
+        console.error('❌ Erreur pagination cycles:', e);
+    }
+}
+
+// L'instantané limite les cycles actifs à une page: on lit la suite par curseur
+async function loadRemainingActiveCycles(cursor) {
+    try {
+        while (cursor !== null) {
+            const response = await fetch('/api/cycles?status=active&format=columns&limit=500&cursor=' + cursor);
+            const data = await response.json();
+            for (const cycle of rowsFromColumns(data.cycles)) activeCyclesById.set(cycle.id, cycle);
+            cursor = data.next_cursor;
+        }
+        renderActiveCyclesTable();
+    } catch (e) {
+        console.error('❌ Erreur pagination cycles actifs:', e);
+    }
+}
+
 // Actualisation des données
 async function refreshData() {
     console.log('⏳ Actualisation...');
     
     try {
-        const response = await fetch('/api/data?t=' + Date.now(), { cache: 'no-store' });
+        // Revalidation par ETag: le serveur répond 304 si l'instantané n'a pas changé
+        const response = await fetch('/api/data', { cache: 'no-cache' });
         const data = await response.json();
         
-        document.getElementById('usdcBalance').textContent = formatNumber(data.balances.usdc, 2);
-        document.getElementById('btcBalance').textContent = formatNumber(data.balances.btc, 8);
-        document.getElementById('gainAbs').textContent = formatNumber(data.stats.gain_abs, 2);
-        document.getElementById('gainPercent').textContent = formatNumber(data.stats.gain_percent, 2);
-        document.getElementById('btcPrice').textContent = formatNumber(data.balances.btc_price, 2);
-        document.getElementById('completedCount').textContent = data.stats.completed_cycles;
-        document.getElementById('totalCount').textContent = data.stats.total_cycles;
+        applyBalances(data.balances);
+        applyStats(data.stats);
         if (document.getElementById('buyOffsetDisplay')) {
             document.getElementById('buyOffsetDisplay').textContent = data.config.buy_offset;
         }
@@ -169,50 +297,75 @@ async function refreshData() {
             document.getElementById('percentDisplay').textContent = data.config.percent + '%';
         }
         
-        const activeCycles = data.cycles.filter(c => c.status !== 'completed');
-        const activeTable = document.getElementById('activeCyclesTable');
-        
-        if (activeCycles.length === 0) {
-            activeTable.innerHTML = '<tr><td colspan="8" style="text-align:center;color:#9ca3af;">Aucun cycle actif</td></tr>';
-        } else {
-            activeTable.innerHTML = activeCycles.map(c => {
-                const isBuy = c.status.includes('buy') || c.status === 'buy';
-                const type = isBuy ? 'buy' : 'sell';
-                const price = isBuy ? c.buyPrice : c.sellPrice;
-                
-                const buyAmount = c.buyPrice * c.quantity;
-                const sellAmount = c.sellPrice * c.quantity;
-                const gainPercent = ((sellAmount - buyAmount) / buyAmount * 100).toFixed(2);
-                const gainAbs = (sellAmount - buyAmount).toFixed(2);
-                
-                const percentDedicated = c.percent || 0;
-                const usdcDedicated = c.dedicatedBalance || 0;
-                
-                return '<tr><td>#' + c.id + '</td><td>' + getStatusBadge(type) + '</td><td>$' + formatNumber(price, 2) + '</td><td>' + formatNumber(c.quantity, 8) + '</td><td class="' + (gainPercent >= 0 ? 'positive' : 'negative') + '">' + gainPercent + '%</td><td class="' + (gainAbs >= 0 ? 'positive' : 'negative') + '">$' + gainAbs + '</td><td>' + percentDedicated + '%</td><td>$' + formatNumber(usdcDedicated, 2) + '</td></tr>';
-            }).join('');
-        }
-        
-        const allTable = document.getElementById('cyclesTable');
-        
-        if (data.cycles.length === 0) {
-            allTable.innerHTML = '<tr><td colspan="9" style="text-align:center;color:#9ca3af;">Aucun cycle</td></tr>';
-        } else {
-            allTable.innerHTML = data.cycles.map(c => {
-                const buyAmount = c.buyPrice * c.quantity;
-                const sellAmount = c.sellPrice * c.quantity;
-                const gainPercent = ((sellAmount - buyAmount) / buyAmount * 100).toFixed(2);
-                const gainAbs = (sellAmount - buyAmount).toFixed(2);
-                
-                const percentDedicated = c.percent || 0;
-                const usdcDedicated = c.dedicatedBalance || 0;
-                
-                return '<tr><td>#' + c.id + '</td><td>' + getStatusBadge(c.status) + '</td><td>' + formatNumber(c.quantity, 8) + '</td><td>$' + formatNumber(c.buyPrice, 2) + '</td><td>$' + formatNumber(c.sellPrice, 2) + '</td><td class="' + (gainPercent >= 0 ? 'positive' : 'negative') + '">' + gainPercent + '%</td><td class="' + (gainAbs >= 0 ? 'positive' : 'negative') + '">$' + gainAbs + '</td><td>' + percentDedicated + '%</td><td>$' + formatNumber(usdcDedicated, 2) + '</td></tr>';
-            }).join('');
-        }
+        activeCyclesById = new Map(data.active_cycles.map(c => [c.id, c]));
+        loadedCycles = data.cycles;
+        renderActiveCyclesTable();
+        if (data.active_next_cursor !== null) loadRemainingActiveCycles(data.active_next_cursor);
+        renderCyclesTable();
+        nextCyclesCursor = data.next_cursor;
+        updateLoadMoreButton();
         
-        document.getElementById('lastUpdate').textContent = data.last_update;
+        // Sources pas encore chargées ou en échec prolongé: on l'indique à côté de l'heure
+        document.getElementById('lastUpdate').textContent = data.last_update + (data.stale ? ' (données partielles)' : '');
         console.log('✅ Actualisation terminee');
     } catch (e) {
         console.error('❌ Erreur refresh:', e);
     }
 }
+
+// Flux SSE: le serveur pousse uniquement les changements
+function applyCycleChanges(delta) {
+    delta.changed.forEach(c => {
+        if (c.status !== 'completed') {
+            activeCyclesById.set(c.id, c);
+        } else {
+            activeCyclesById.delete(c.id);
+        }
+        const index = loadedCycles.findIndex(x => x.id === c.id);
+        if (index >= 0) {
+            loadedCycles[index] = c;
+        } else if (loadedCycles.length === 0 || c.id > loadedCycles[0].id) {
+            loadedCycles.unshift(c);
+        }
+    });
+    delta.deleted.forEach(id => activeCyclesById.delete(id));
+    loadedCycles = loadedCycles.filter(c => !delta.deleted.includes(c.id));
+    
+    renderActiveCyclesTable();
+    renderCyclesTable();
+    document.getElementById('lastUpdate').textContent = new Date().toLocaleTimeString('fr-FR');
+    scheduleChartsRefresh();
+}
+
+function scheduleChartsRefresh() {
+    if (chartsRefreshTimer) clearTimeout(chartsRefreshTimer);
+    chartsRefreshTimer = setTimeout(() => {
+        loadPerformanceData();
+        loadGainsDistribution();
+        loadActiveCyclesTimeline();
+    }, 2000);
+}
+
+function startEventStream() {
+    const source = new EventSource('/api/stream');
+    let hadError = false;
+    
+    source.addEventListener('cycles', e => applyCycleChanges(JSON.parse(e.data)));
+    source.addEventListener('stats', e => applyStats(JSON.parse(e.data)));
+    source.addEventListener('balances', e => applyBalances(JSON.parse(e.data)));
+    source.addEventListener('auto', e => applyAutoStatus(JSON.parse(e.data)));
+    source.addEventListener('reload', () => refreshData());
+    source.addEventListener('job', e => console.log('✅ Job termine:', JSON.parse(e.data)));
+    
+    // Après une reconnexion, des changements ont pu être manqués: rechargement complet
+    source.onopen = () => {
+        if (hadError) {
+            hadError = false;
+            refreshData();
+        }
+    };
+    source.onerror = () => {
+        hadError = true;
+        console.error('❌ Flux SSE interrompu, reconnexion...');
+    };
+}
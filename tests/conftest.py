@@ -0,0 +1,43 @@
+"""Fixtures communes: le dashboard est importé dans un dossier temporaire avec une base vide"""
+import os
+import sqlite3
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmark import CYCLES_SCHEMA
+
+
+@pytest.fixture(scope="session")
+def dashboard(tmp_path_factory):
+    workdir = tmp_path_factory.mktemp("dashboard")
+    os.chdir(workdir)
+    os.makedirs("db")
+    with sqlite3.connect(os.path.join("db", "bot.db")) as conn:
+        conn.execute(CYCLES_SCHEMA)
+    with open("bot.conf", "w") as f:
+        f.write('MEXC_API_KEY="test"\nMEXC_SECRET_KEY="test"\nBUY_OFFSET=-400\nSELL_OFFSET=500\nPERCENT=3\n')
+    # Variables lues à l'import: aucun appel réseau ni compilation du bot
+    os.environ.update({"COINGECKO_URL": "http://127.0.0.1:9", "MEXC_API_URL": "http://127.0.0.1:9", "BOT_PREBUILT": "0", "PRICE_STREAM": "0"})
+    import dashboard
+    dashboard.BOT_COMMAND = [sys.executable, "-c", "import sys; print('bot stub', *sys.argv[1:])"]
+    dashboard.load_config()
+    dashboard.init_database()
+    yield dashboard
+    os.chdir(ROOT)
+
+
+@pytest.fixture
+def cycles(dashboard):
+    """Vide la table cycles et retourne une fonction d'insertion (status, createdAt, completedAt)"""
+    def insert(rows):
+        with dashboard.write_db() as conn:
+            conn.executemany("INSERT INTO cycles (status, quantity, buyPrice, sellPrice, createdAt, completedAt) VALUES (?, 1, 100, 110, ?, ?)", rows)
+    with dashboard.write_db() as conn:
+        conn.execute("DELETE FROM cycles")
+        conn.execute("DELETE FROM cycles_history")
+    dashboard.HISTORY_CACHE.clear()
+    yield insert
@@ -0,0 +1,26 @@
+"""Validation des lots: messages d'erreur lisibles, jamais le texte brut d'une exception Python"""
+import pytest
+
+
+@pytest.mark.parametrize("cycle_ids", [None, [], "12", [1, "abc"], [1.5], [True], [-3], {"a": 1}])
+def test_invalid_cycle_ids_are_rejected(dashboard, cycle_ids):
+    response = dashboard.app.test_client().post("/api/cancel-cycles", json={"cycle_ids": cycle_ids})
+    assert response.status_code == 400
+    error = response.get_json()["error"]
+    assert "invalid literal" not in error and "int()" not in error
+
+
+def test_too_many_cycle_ids(dashboard):
+    response = dashboard.app.test_client().post("/api/cancel-cycles", json={"cycle_ids": list(range(1, dashboard.BATCH_MAX_ITEMS + 2))})
+    assert response.status_code == 400
+    assert str(dashboard.BATCH_MAX_ITEMS) in response.get_json()["error"]
+
+
+def test_cycle_ids_are_deduplicated(dashboard):
+    assert dashboard.parse_cycle_ids([3, "3", 5, 3]) == [3, 5]
+
+
+def test_invalid_count(dashboard):
+    response = dashboard.app.test_client().post("/api/new-cycles?count=abc")
+    assert response.status_code == 400
+    assert "count" in response.get_json()["error"]
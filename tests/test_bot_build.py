@@ -0,0 +1,41 @@
+"""Binaire précompilé du bot: un échec de compilation n'est pas retenté pour les mêmes sources"""
+import subprocess
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture
+def go_sources(dashboard, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "main.go").write_text("package main\n")
+    monkeypatch.setattr(dashboard, "BOT_PREBUILT", True)
+    monkeypatch.setattr(dashboard, "BOT_SOURCE_CHECK_INTERVAL", 0)
+    monkeypatch.setattr(dashboard, "BOT_BUILD", {**dashboard.BOT_BUILD, "fingerprint": None, "failed_fingerprint": None, "error": None})
+    builds = []
+
+    def fake_run(command, **kwargs):
+        builds.append(command)
+        return SimpleNamespace(returncode=1, stderr="syntax error")
+    monkeypatch.setattr(subprocess, "run", fake_run)
+    return tmp_path, builds
+
+
+def test_failed_build_is_not_retried(dashboard, go_sources):
+    source_dir, builds = go_sources
+    for _ in range(3):
+        assert dashboard.bot_command(["-u"]) == dashboard.BOT_COMMAND + ["-u"]
+    assert len(builds) == 1
+    # Sources modifiées: nouvelle tentative
+    (source_dir / "main.go").write_text("package main\n\nfunc main() {}\n")
+    dashboard.bot_command(["-u"])
+    assert len(builds) == 2
+
+
+def test_failure_is_shared_with_other_workers(dashboard, go_sources, monkeypatch):
+    _, builds = go_sources
+    dashboard.ensure_bot_binary()
+    # Un autre worker (état mémoire vierge) relit l'échec dans le fichier d'état
+    monkeypatch.setitem(dashboard.BOT_BUILD, "failed_fingerprint", None)
+    assert dashboard.ensure_bot_binary() is None
+    assert len(builds) == 1
@@ -0,0 +1,69 @@
+"""?format=columns et sérialisation orjson: mêmes données que le format lignes, avec ou sans orjson"""
+import json
+from array import array
+
+import pytest
+
+
+@pytest.fixture(params=["orjson", "standard"])
+def client(request, dashboard, cycles, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(dashboard, "orjson", None)
+    cycles([(status, "2024-01-01 00:00:00", None) for status in ["completed", "buy", "sell", "completed", "buy_filled"] * 7])
+    return dashboard.app.test_client()
+
+
+def transpose(rows, fields):
+    return {field: [row[field] for row in rows] for field in fields}
+
+
+@pytest.mark.parametrize("query", ["", "limit=10", "limit=5&order=asc&fields=status,buyPrice", "status=completed&limit=4", "status=unknown"])
+def test_cycles_columns_match_rows(client, query):
+    rows = client.get(f"/api/cycles?{query}").get_json()
+    columns = client.get(f"/api/cycles?{query}&format=columns").get_json()
+    assert columns["cycles"] == transpose(rows["cycles"], columns["fields"])
+    assert (columns["next_cursor"], columns["has_more"]) == (rows["next_cursor"], rows["has_more"])
+    if rows["cycles"]:
+        assert set(columns["fields"]) == set(rows["cycles"][0])
+    else:
+        assert all(values == [] for values in columns["cycles"].values())
+
+
+def test_columns_pagination(client):
+    seen = []
+    cursor = ""
+    while True:
+        page = client.get(f"/api/cycles?format=columns&limit=8&fields=status{cursor}").get_json()
+        seen.extend(page["cycles"]["id"])
+        if not page["has_more"]:
+            break
+        cursor = f"&cursor={page['next_cursor']}"
+    assert len(seen) == 35 and seen == sorted(seen, reverse=True)
+
+
+def test_performance_columns_match_rows(client):
+    rows = client.get("/api/performance").get_json()
+    columns = client.get("/api/performance?format=columns").get_json()
+    assert columns == transpose(rows, ["cycle_id", "gain", "cumulative_gain"])
+
+
+def test_unknown_format_rejected(client):
+    for url in ("/api/cycles?format=xml", "/api/performance?format=csv", "/api/active-cycles-history?format=table"):
+        response = client.get(url)
+        assert response.status_code == 400
+        assert "format" in response.get_json()["error"]
+
+
+def test_provider_serializes_store_types(dashboard, client):
+    payload = {"ids": array("q", [3, 1, 2]), "pair": (1.5, "b"), "zeta": None, "alpha": "é"}
+    body = dashboard.app.json.dumps(payload)
+    assert json.loads(body) == {"ids": [3, 1, 2], "pair": [1.5, "b"], "zeta": None, "alpha": "é"}
+    with dashboard.app.test_request_context():
+        response = dashboard.app.json.response(payload)
+    assert response.mimetype == "application/json"
+    assert json.loads(response.get_data()) == json.loads(body)
+    # Clés triées dans les deux encodeurs: ETag et cache stables
+    keys = list(json.loads(body))
+    assert keys == sorted(keys)
@@ -0,0 +1,107 @@
+"""bot.conf: instantané immuable et versionné, écriture atomique, rechargement sur modification externe"""
+import os
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def config_file(dashboard):
+    with open(dashboard.CONFIG_FILE) as f:
+        original = f.read()
+    with open(dashboard.CONFIG_FILE, "w") as f:
+        f.write('# Offsets du bot\nMEXC_API_KEY="test"\nMEXC_SECRET_KEY="test"\nBUY_OFFSET=-400\nSELL_OFFSET=500\nPERCENT=3\n')
+    os.chmod(dashboard.CONFIG_FILE, 0o600)
+    dashboard.load_config(force=True)
+    yield dashboard.CONFIG_FILE
+    with open(dashboard.CONFIG_FILE, "w") as f:
+        f.write(original)
+    dashboard.load_config(force=True)
+
+
+def test_snapshot_is_read_only_and_replaced_whole(dashboard, config_file):
+    before = dashboard.CONFIG
+    version = dashboard.CONFIG_STATE["version"]
+    with pytest.raises(TypeError):
+        before["PERCENT"] = "9"
+    dashboard.write_config({"PERCENT": "4"})
+    # Un lecteur qui tenait l'ancienne référence garde des valeurs cohérentes
+    assert before["PERCENT"] == "3"
+    assert dashboard.CONFIG["PERCENT"] == "4"
+    assert dashboard.CONFIG_STATE["version"] == version + 1
+
+
+def test_write_keeps_other_lines_and_mode(dashboard, config_file):
+    inode = os.stat(config_file).st_ino
+    dashboard.write_config({"BUY_OFFSET": "-350", "SELL_OFFSET": None, "UNKNOWN": "1"})
+    with open(config_file) as f:
+        content = f.read()
+    assert content == '# Offsets du bot\nMEXC_API_KEY="test"\nMEXC_SECRET_KEY="test"\nBUY_OFFSET=-350\nSELL_OFFSET=500\nPERCENT=3\n'
+    info = os.stat(config_file)
+    assert info.st_ino != inode
+    assert info.st_mode & 0o777 == 0o600
+    assert not [name for name in os.listdir(os.path.dirname(os.path.abspath(config_file))) if name.startswith(".bot.conf.")]
+
+
+def test_failed_write_leaves_file_untouched(dashboard, config_file, monkeypatch):
+    with open(config_file) as f:
+        original = f.read()
+    snapshot = dashboard.CONFIG
+
+    def failing_replace(src, dst):
+        raise OSError("disque plein")
+
+    monkeypatch.setattr(dashboard.os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        dashboard.write_config({"PERCENT": "8"})
+    monkeypatch.undo()
+    with open(config_file) as f:
+        assert f.read() == original
+    assert dashboard.CONFIG is snapshot
+    assert not [name for name in os.listdir(os.path.dirname(os.path.abspath(config_file))) if name.startswith(".bot.conf.")]
+
+
+def test_external_change_is_reloaded(dashboard, config_file, monkeypatch):
+    version = dashboard.CONFIG_STATE["version"]
+    monkeypatch.setitem(dashboard.CONFIG_STATE, "checked_at", 0)
+    assert dashboard.watch_config() is False
+    with open(config_file, "a") as f:
+        f.write("EXTRA=1\n")
+    monkeypatch.setitem(dashboard.CONFIG_STATE, "checked_at", 0)
+    assert dashboard.watch_config() is True
+    assert dashboard.CONFIG["EXTRA"] == "1"
+    assert dashboard.CONFIG_STATE["version"] == version + 1
+    # Dans l'intervalle de surveillance, aucun stat du fichier
+    assert dashboard.watch_config() is False
+
+
+def test_readers_never_see_a_partial_config(dashboard, config_file):
+    dashboard.write_config({"BUY_OFFSET": "0", "SELL_OFFSET": "0", "PERCENT": "0"})
+    errors = []
+    done = threading.Event()
+
+    def reader():
+        while not done.is_set():
+            config = dashboard.CONFIG
+            values = {config.get("BUY_OFFSET"), config.get("SELL_OFFSET"), config.get("PERCENT")}
+            if len(values) != 1:
+                errors.append(dict(config))
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for value in range(1, 30):
+        dashboard.write_config({"BUY_OFFSET": str(value), "SELL_OFFSET": str(value), "PERCENT": str(value)})
+    done.set()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert errors == []
+    assert dashboard.CONFIG["PERCENT"] == "29"
+
+
+def test_update_route_round_trip(dashboard, config_file):
+    client = dashboard.app.test_client()
+    response = client.post("/api/update-config", json={"buy_offset": "-420", "sell_offset": "510", "percent": "2"})
+    assert response.get_json()["success"] is True
+    assert client.get("/api/get-config").get_json() == {"buy_offset": "-420", "sell_offset": "510", "percent": "2"}
+    assert dashboard.state_get("config")["version"] == dashboard.CONFIG_STATE["version"]
@@ -0,0 +1,93 @@
+"""Stats par statut et journal des changements maintenus par triggers, comparés à un agrégat complet"""
+import random
+
+import pytest
+
+STATUSES = ["buy", "sell", "completed", "buy_filled", None]
+
+
+def scanned(dashboard):
+    with dashboard.read_db() as conn:
+        return dashboard._stats_by_status(conn.execute(dashboard.CYCLES_STATS_SCAN).fetchall())
+
+
+def materialized(dashboard):
+    with dashboard.read_db() as conn:
+        return dashboard._stats_by_status(conn.execute("SELECT * FROM cycles_stats").fetchall())
+
+
+def current_seq(dashboard):
+    with dashboard.read_db() as conn:
+        return dashboard.read_changes(conn, 0)[0]
+
+
+@pytest.fixture
+def stats(dashboard, cycles):
+    dashboard.check_cycles_stats()
+    assert dashboard.STATS_STATE["materialized"]
+    return cycles
+
+
+def test_triggers_match_full_scan(dashboard, stats):
+    rng = random.Random(11)
+    stats([(rng.choice(STATUSES), "2024-01-01 00:00:00", None) for _ in range(200)])
+    for _ in range(20):
+        with dashboard.write_db() as conn:
+            ids = [row[0] for row in conn.execute("SELECT id FROM cycles")]
+            conn.executemany("INSERT INTO cycles (status, quantity, buyPrice, sellPrice) VALUES (?, ?, ?, ?)", [(rng.choice(STATUSES), rng.uniform(0.1, 2), rng.uniform(90, 110), rng.uniform(95, 120)) for _ in range(3)])
+            for cycle_id in rng.sample(ids, 5):
+                conn.execute("UPDATE cycles SET status = ?, quantity = ?, buyPrice = ? WHERE id = ?", (rng.choice(STATUSES), rng.uniform(0.1, 2), rng.uniform(90, 110), cycle_id))
+            conn.executemany("DELETE FROM cycles WHERE id = ?", [(cycle_id,) for cycle_id in rng.sample(ids, 2)])
+        assert dashboard._stats_consistent(materialized(dashboard), scanned(dashboard))
+    totals = dashboard.get_cycle_totals()
+    expected = scanned(dashboard)
+    assert totals["total_count"] == sum(count for count, _, _ in expected.values())
+    assert totals["completed_count"] == expected["completed"][0]
+    assert totals["total_sell"] == pytest.approx(expected["completed"][2])
+
+
+def test_changelog_lists_changed_ids(dashboard, stats):
+    stats([("buy", "2024-01-01 00:00:00", None)] * 5)
+    with dashboard.read_db() as conn:
+        ids = [row[0] for row in conn.execute("SELECT id FROM cycles ORDER BY id")]
+    seq = current_seq(dashboard)
+    with dashboard.write_db() as conn:
+        conn.execute("UPDATE cycles SET status = 'sell' WHERE id = ?", (ids[1],))
+        conn.execute("DELETE FROM cycles WHERE id = ?", (ids[3],))
+        new_id = conn.execute("INSERT INTO cycles (status, quantity, buyPrice, sellPrice) VALUES ('buy', 1, 100, 110)").lastrowid
+    with dashboard.read_db() as conn:
+        new_seq, changed = dashboard.read_changes(conn, seq)
+        assert new_seq == seq + 3
+        assert sorted(changed) == sorted([ids[1], ids[3], new_id])
+        # Rien depuis le dernier seq; un seq inconnu (plus grand) impose une reconstruction
+        assert dashboard.read_changes(conn, new_seq) == (new_seq, [])
+        assert dashboard.read_changes(conn, new_seq + 10) == (new_seq, None)
+
+
+def test_pruned_changelog_requires_rebuild(dashboard, stats, monkeypatch):
+    stats([("buy", "2024-01-01 00:00:00", None)])
+    seq = current_seq(dashboard)
+    stats([("buy", "2024-01-01 00:00:00", None)] * 5)
+    monkeypatch.setattr(dashboard, "CHANGELOG_RETENTION", 2)
+    dashboard.check_cycles_stats()
+    with dashboard.read_db() as conn:
+        new_seq, changed = dashboard.read_changes(conn, seq)
+        assert changed is None
+        assert dashboard.read_changes(conn, new_seq - 1)[1] is not None
+
+
+def test_drift_and_missing_triggers_are_repaired(dashboard, stats):
+    stats([("completed", "2024-01-01 00:00:00", "2024-01-02 00:00:00")] * 4)
+    with dashboard.write_db() as conn:
+        conn.execute("UPDATE cycles_stats SET count = count + 7 WHERE status = 'completed'")
+    dashboard.check_cycles_stats()
+    assert dashboard._stats_consistent(materialized(dashboard), scanned(dashboard))
+    with dashboard.write_db() as conn:
+        conn.execute("DROP TRIGGER cycles_stats_insert")
+        conn.execute("DROP TRIGGER cycles_changelog_delete")
+    dashboard.check_cycles_stats()
+    stats([("completed", "2024-01-01 00:00:00", "2024-01-02 00:00:00")])
+    with dashboard.write_db() as conn:
+        conn.execute("DELETE FROM cycles WHERE id = (SELECT MIN(id) FROM cycles)")
+    assert materialized(dashboard)["completed"][0] == 4
+    assert dashboard._stats_consistent(materialized(dashboard), scanned(dashboard))
@@ -0,0 +1,56 @@
+"""Magasin colonnaire et vues dérivées: maintien incrémental comparé à un recomptage complet"""
+import random
+
+import pytest
+
+STATUSES = ["buy", "sell", "completed", "buy_filled", "completed"]
+
+
+def recount(dashboard):
+    with dashboard.read_db() as conn:
+        rows = conn.execute("SELECT id, COALESCE(status, ''), COALESCE(buyPrice, 0), COALESCE(sellPrice, 0), COALESCE(quantity, 0) FROM cycles ORDER BY id").fetchall()
+    active = buy = sell = 0
+    timeline = {"ids": [], "active_counts": [], "buy_counts": [], "sell_counts": []}
+    performance = {"ids": [], "gains": [], "cumulative": []}
+    cumulative = 0
+    for cycle_id, status, buy_price, sell_price, quantity in rows:
+        is_active, is_buy, is_sell = dashboard._cycle_phase(status)
+        active, buy, sell = active + is_active, buy + is_buy, sell + is_sell
+        for key, value in (("ids", cycle_id), ("active_counts", active), ("buy_counts", buy), ("sell_counts", sell)):
+            timeline[key].append(value)
+        if status == "completed":
+            gain = sell_price * quantity - buy_price * quantity
+            cumulative += gain
+            performance["ids"].append(cycle_id)
+            performance["gains"].append(gain)
+            performance["cumulative"].append(cumulative)
+    return timeline, performance
+
+
+def check(dashboard):
+    timeline, performance = recount(dashboard)
+    incremental = dashboard.refresh_active_cycles()
+    for key, values in timeline.items():
+        assert list(incremental[key]) == values, key
+    ids, gains, cumulative = dashboard.refresh_performance_curve()
+    assert list(ids) == performance["ids"]
+    assert list(gains) == pytest.approx(performance["gains"])
+    assert list(cumulative) == pytest.approx(performance["cumulative"])
+
+
+def test_incremental_views_match_full_recount(dashboard, cycles, capsys):
+    rng = random.Random(7)
+    cycles([(rng.choice(STATUSES), "2024-01-01 00:00:00", None) for _ in range(300)])
+    check(dashboard)
+    capsys.readouterr()
+    for _ in range(20):
+        with dashboard.write_db() as conn:
+            ids = [row[0] for row in conn.execute("SELECT id FROM cycles")]
+            # Ajouts, changements de statut/prix (y compris au début de la table) et suppressions
+            conn.executemany("INSERT INTO cycles (status, quantity, buyPrice, sellPrice) VALUES (?, ?, ?, ?)", [(rng.choice(STATUSES), rng.uniform(0.1, 2), rng.uniform(90, 110), rng.uniform(95, 120)) for _ in range(rng.randint(0, 5))])
+            for cycle_id in rng.sample(ids, 5):
+                conn.execute("UPDATE cycles SET status = ?, sellPrice = ? WHERE id = ?", (rng.choice(STATUSES), rng.uniform(95, 120), cycle_id))
+            conn.executemany("DELETE FROM cycles WHERE id = ?", [(cycle_id,) for cycle_id in rng.sample(ids, 3)])
+        check(dashboard)
+    # Le journal suffit: aucun rechargement complet après le chargement initial
+    assert "rechargement complet" not in capsys.readouterr().out
@@ -0,0 +1,19 @@
+"""Pagination des cycles: aucun cycle actif perdu au-delà d'une page"""
+
+
+def test_active_cycles_beyond_one_page_have_a_cursor(dashboard, cycles):
+    count = dashboard.CYCLES_PAGE_MAX + 7
+    cycles([("buy", "2024-01-01 00:00:00", None)] * count + [("completed", "2024-01-01 00:00:00", "2024-01-02 00:00:00")] * 3)
+    summary = dashboard.load_cycles_summary()
+    assert len(summary["active_cycles"]) == dashboard.CYCLES_PAGE_MAX
+    assert summary["active_next_cursor"] is not None
+    client = dashboard.app.test_client()
+    rest = client.get(f"/api/cycles?status=active&limit=500&cursor={summary['active_next_cursor']}").get_json()
+    ids = {cycle["id"] for cycle in summary["active_cycles"]} | {cycle["id"] for cycle in rest["cycles"]}
+    assert len(ids) == count
+    assert rest["next_cursor"] is None
+
+
+def test_small_active_set_has_no_cursor(dashboard, cycles):
+    cycles([("sell", "2024-01-01 00:00:00", None)] * 3)
+    assert dashboard.load_cycles_summary()["active_next_cursor"] is None
@@ -0,0 +1,27 @@
+"""ETag des routes d'analyse: jamais sur une réponse d'erreur"""
+import pytest
+
+
+@pytest.mark.parametrize("url, target", [
+    ("/api/performance", "refresh_performance_curve"),
+    ("/api/gains-distribution", "compute_gains_histogram"),
+    ("/api/active-cycles-timeline", "refresh_active_cycles"),
+    ("/api/active-cycles-history", "active_history_window"),
+    ("/api/active-cycles-history-split", "active_history_window"),
+])
+def test_failed_view_is_not_cached(dashboard, cycles, monkeypatch, url, target):
+    cycles([("completed", "2024-01-01 00:00:00", "2024-01-02 00:00:00"), ("buy", "2024-01-03 00:00:00", None)])
+    client = dashboard.app.test_client()
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("panne")
+    with monkeypatch.context() as patch:
+        patch.setattr(dashboard, target, broken)
+        failed = client.get(url)
+    assert failed.status_code == 500
+    assert "ETag" not in failed.headers
+    # Données réparées, même version: le client reçoit le contenu et non un 304 sur l'échec
+    ok = client.get(url)
+    assert ok.status_code == 200
+    assert "ETag" in ok.headers
+    assert client.get(url, headers={"If-None-Match": ok.headers["ETag"]}).status_code == 304
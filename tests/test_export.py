@@ -0,0 +1,82 @@
+"""Export en streaming: plages par id et par date, reprise avec borne figée, gzip et formats"""
+import csv
+import gzip
+import importlib.util
+import io
+import json
+
+import pytest
+
+
+@pytest.fixture
+def exported(dashboard, cycles):
+    cycles([("completed", f"2024-01-{day:02d} 12:00:00", f"2024-01-{day:02d} 18:00:00") for day in range(1, 11)])
+    with dashboard.read_db() as conn:
+        ids = [row[0] for row in conn.execute("SELECT id FROM cycles ORDER BY id")]
+    return dashboard.app.test_client(), ids
+
+
+def csv_ids(response):
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    return [int(row["id"]) for row in rows]
+
+
+def test_full_export_freezes_upper_bound(exported):
+    client, ids = exported
+    response = client.get("/api/export/stream")
+    assert csv_ids(response) == ids
+    assert response.headers["X-Export-Until-Id"] == str(ids[-1])
+
+
+def test_id_and_date_ranges(exported):
+    client, ids = exported
+    assert csv_ids(client.get(f"/api/export/stream?since_id={ids[2]}&until_id={ids[5]}")) == ids[2:6]
+    # createdAt du 3 au 5 janvier inclus (dates naïves = UTC)
+    assert csv_ids(client.get("/api/export/stream?since=2024-01-03&until=2024-01-05T23:59:59")) == ids[2:5]
+    assert csv_ids(client.get("/api/export/stream?status=active")) == []
+
+
+def test_resume_exports_same_range(exported, cycles):
+    client, ids = exported
+    first = client.get("/api/export/stream")
+    until_id = first.headers["X-Export-Until-Id"]
+    # Des cycles créés entre le début de l'export et la reprise ne doivent pas y apparaître
+    cycles([("active", "2024-02-01 00:00:00", None)] * 3)
+    resumed = client.get(f"/api/export/stream?after_id={ids[3]}&until_id={until_id}")
+    assert csv_ids(resumed) == ids[4:]
+    assert resumed.headers["X-Export-Until-Id"] == until_id
+
+
+def test_gzip_matches_plain_export(exported):
+    client, _ = exported
+    plain = client.get("/api/export/stream?format=ndjson")
+    compressed = client.get("/api/export/stream?format=ndjson&gzip=1")
+    assert compressed.mimetype == "application/gzip"
+    assert compressed.headers["Content-Disposition"].endswith('.ndjson.gz"')
+    assert gzip.decompress(compressed.get_data()) == plain.get_data()
+
+
+def test_json_and_ndjson_formats(exported):
+    client, ids = exported
+    ndjson = [json.loads(line) for line in client.get("/api/export/stream?format=ndjson&fields=status").get_data(as_text=True).splitlines()]
+    assert ndjson == [{"id": cycle_id, "status": "completed"} for cycle_id in ids]
+    assert [row["id"] for row in client.get("/api/export/stream?format=json").get_json()] == ids
+    assert client.get("/api/export/stream?format=json&since_id=999999").get_json() == []
+
+
+def test_parquet_export(exported):
+    pq = pytest.importorskip("pyarrow.parquet")
+    client, ids = exported
+    response = client.get("/api/export/stream?format=parquet&gzip=1")
+    table = pq.read_table(io.BytesIO(gzip.decompress(response.get_data())))
+    assert table.column("id").to_pylist() == ids
+
+
+def test_parquet_without_pyarrow(exported, monkeypatch):
+    client, _ = exported
+    find_spec = importlib.util.find_spec
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name, *args: None if name == "pyarrow" else find_spec(name, *args))
+    response = client.get("/api/export/stream?format=parquet")
+    assert response.status_code == 400
+    assert "pyarrow" in response.get_json()["error"]
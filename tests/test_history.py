@@ -0,0 +1,116 @@
+"""Historique incrémental des cycles actifs comparé à un recalcul complet"""
+import random
+from datetime import datetime, timezone
+
+import pytest
+
+HOUR = 3600
+STATUSES = ["buy", "sell", "completed"]
+
+
+def stamp(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def make_cycles(start, end, count, seed):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        created = rng.randint(start, end - 1)
+        status = rng.choice(STATUSES)
+        completed = rng.randint(created, end - 1) if status == "completed" else None
+        rows.append((status, created, completed))
+    return rows
+
+
+def brute_force(rows, width, first, last):
+    """(bucket, actifs, achat, vente) à la fin de chaque bucket, en parcourant tous les cycles"""
+    result = []
+    for bucket in range(first, last + 1):
+        end = (bucket + 1) * width
+        alive = [status for status, created, completed in rows if created < end and not (status == "completed" and completed < end)]
+        buy = sum(1 for status in alive if status == "buy")
+        result.append((bucket, len(alive), buy, len(alive) - buy))
+    return result
+
+
+@pytest.fixture
+def clock(dashboard, monkeypatch):
+    now = [1_700_000_000 // HOUR * HOUR + 1800]
+    monkeypatch.setattr(dashboard.time, "time", lambda: now[0])
+    return now
+
+
+def counts(history):
+    """Buckets sans le marqueur approximate, comparables au recalcul complet"""
+    return [row[:4] for row in history]
+
+
+def insert(cycles, rows):
+    cycles([(status, stamp(created), stamp(completed) if completed is not None else None) for status, created, completed in rows])
+
+
+def test_history_matches_brute_force(dashboard, cycles, clock, monkeypatch):
+    monkeypatch.setattr(dashboard, "HISTORY_MAX_BUCKETS", 1000)
+    rows = make_cycles(clock[0] - 48 * HOUR, clock[0], 400, seed=1)
+    insert(cycles, rows)
+    history = dashboard.refresh_active_history(HOUR)
+    current = clock[0] // HOUR
+    first = min(created for _, created, _ in rows) // HOUR
+    assert counts(history[:-1]) == brute_force(rows, HOUR, first, current - 1)
+    # Bucket ouvert: état actuel de la table
+    assert history[-1][:4] == brute_force(rows, HOUR, current, current)[0]
+
+    # Une heure plus tard: seuls les nouveaux buckets sont calculés, les anciens restent identiques
+    clock[0] += HOUR
+    newer = make_cycles(clock[0] - HOUR // 2, clock[0], 20, seed=2)
+    insert(cycles, newer)
+    history = dashboard.refresh_active_history(HOUR)
+    assert counts(history[:-1]) == brute_force(rows + newer, HOUR, first, current)
+
+
+def test_history_longer_than_window_is_not_rebuilt(dashboard, cycles, clock, monkeypatch, capsys):
+    monkeypatch.setattr(dashboard, "HISTORY_MAX_BUCKETS", 24)
+    rows = make_cycles(clock[0] - 100 * HOUR, clock[0], 300, seed=3)
+    insert(cycles, rows)
+    current = clock[0] // HOUR
+    for step in range(3):
+        history = dashboard.refresh_active_history(HOUR)
+        assert counts(history[:-1]) == brute_force(rows, HOUR, current - 24, current - 1)
+        clock[0] += HOUR
+        current += 1
+    assert "reconstruction" not in capsys.readouterr().out
+    # Un cycle antérieur à la fenêtre conservée ne déclenche pas de reconstruction: seuls les nouveaux buckets le voient
+    older = [("buy", clock[0] - 200 * HOUR, None)]
+    insert(cycles, older)
+    history = dashboard.refresh_active_history(HOUR)
+    assert "reconstruction" not in capsys.readouterr().out
+    assert counts(history[:-2]) == brute_force(rows, HOUR, current - 24, current - 2)
+    assert history[-2][:4] == brute_force(rows + older, HOUR, current - 1, current - 1)[0]
+
+
+def test_history_rebuilds_when_older_cycles_appear(dashboard, cycles, clock, monkeypatch, capsys):
+    monkeypatch.setattr(dashboard, "HISTORY_MAX_BUCKETS", 1000)
+    rows = make_cycles(clock[0] - 10 * HOUR, clock[0], 100, seed=4)
+    insert(cycles, rows)
+    dashboard.refresh_active_history(HOUR)
+    older = make_cycles(clock[0] - 30 * HOUR, clock[0] - 20 * HOUR, 50, seed=5)
+    insert(cycles, older)
+    history = dashboard.refresh_active_history(HOUR)
+    assert "reconstruction" in capsys.readouterr().out
+    current = clock[0] // HOUR
+    first = min(created for _, created, _ in older) // HOUR
+    assert counts(history[:-1]) == brute_force(rows + older, HOUR, first, current - 1)
+
+
+def test_backfilled_split_is_flagged_approximate(dashboard, cycles, clock, monkeypatch):
+    monkeypatch.setattr(dashboard, "HISTORY_MAX_BUCKETS", 1000)
+    insert(cycles, make_cycles(clock[0] - 10 * HOUR, clock[0], 50, seed=6))
+    history = dashboard.active_history_window("hour", 0)
+    # Rattrapage: seuls le bucket tout juste clos et le bucket ouvert sont fidèles
+    assert history["split_approximate"][-2:] == [False, False]
+    assert all(history["split_approximate"][:-2])
+    clock[0] += HOUR
+    history = dashboard.active_history_window("hour", 0)
+    assert history["split_approximate"][-3:] == [False, False, False]
+    assert len(history["split_approximate"]) == len(history["buy_counts"])
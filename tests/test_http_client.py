@@ -0,0 +1,89 @@
+"""Client HTTP partagé contre un serveur local: single-flight, caches du prix et des balances"""
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from benchmark import StubApiHandler
+
+
+class CountingHandler(StubApiHandler):
+    def do_GET(self):
+        self.server.hits.append(self.path.split("?")[0])
+        time.sleep(self.server.delay)
+        super().do_GET()
+
+
+@pytest.fixture
+def stub_api(dashboard, monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CountingHandler)
+    server.hits = []
+    server.delay = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setattr(dashboard, "COINGECKO_URL", url)
+    monkeypatch.setattr(dashboard, "MEXC_API_URL", url)
+    monkeypatch.setattr(dashboard, "BTC_PRICE_CACHE", {"price": 0, "timestamp": 0})
+    monkeypatch.setattr(dashboard, "BALANCES_CACHE", {"data": None, "timestamp": 0})
+    monkeypatch.setattr(dashboard, "state_set", lambda key, value: None)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def run_concurrently(fn, count):
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(fn())
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=call) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return results, errors
+
+
+def test_concurrent_price_calls_share_one_request(dashboard, stub_api):
+    stub_api.delay = 0.3
+    results, errors = run_concurrently(dashboard.fetch_btc_price, 8)
+    assert not errors
+    assert results == [65000.12] * 8
+    assert stub_api.hits == ["/api/v3/simple/price"]
+
+
+def test_followers_give_up_on_a_hung_leader(dashboard, monkeypatch):
+    monkeypatch.setattr(dashboard, "SINGLE_FLIGHT_WAIT", 0.2)
+    release = threading.Event()
+    leader = threading.Thread(target=dashboard.single_flight, args=("hung", lambda: release.wait(5)))
+    leader.start()
+    time.sleep(0.05)
+    start = time.time()
+    with pytest.raises(TimeoutError):
+        dashboard.single_flight("hung", lambda: "jamais appelé")
+    assert time.time() - start < 1
+    release.set()
+    leader.join(5)
+
+
+def test_balances_cache_lifetime(dashboard, stub_api, monkeypatch):
+    assert dashboard.fetch_mexc_balances() == {"usdc": 1750.5, "btc": 0.03}
+    dashboard.fetch_mexc_balances()
+    assert len(stub_api.hits) == 1
+    # Cache expiré: nouvel appel à l'API
+    monkeypatch.setitem(dashboard.BALANCES_CACHE, "timestamp", time.time() - dashboard.BALANCES_CACHE_DURATION - 1)
+    dashboard.fetch_mexc_balances()
+    assert stub_api.hits == ["/api/v3/account"] * 2
+
+
+def test_price_cache_lifetime(dashboard, stub_api, monkeypatch):
+    dashboard.fetch_btc_price()
+    dashboard.fetch_btc_price()
+    assert len(stub_api.hits) == 1
+    monkeypatch.setitem(dashboard.BTC_PRICE_CACHE, "timestamp", time.time() - dashboard.CACHE_DURATION - 1)
+    dashboard.fetch_btc_price()
+    assert len(stub_api.hits) == 2
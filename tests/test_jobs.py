@@ -0,0 +1,44 @@
+"""File de jobs: un seul job par type à la fois, doublons en attente fusionnés, attentes bornées"""
+import sys
+import time
+
+
+def sleeper(seconds):
+    return [sys.executable, "-c", f"import time, sys; time.sleep({seconds}); print('ok', *sys.argv[1:])"]
+
+
+def test_same_kind_jobs_are_serialised_and_coalesced(dashboard, monkeypatch):
+    monkeypatch.setattr(dashboard, "BOT_COMMAND", sleeper(0.3))
+    first = dashboard.submit_job("test-serial", ["a"])
+    second = dashboard.submit_job("test-serial", ["b"], coalesce=True)
+    duplicate = dashboard.submit_job("test-serial", ["b"], coalesce=True)
+    assert duplicate is second
+    assert second["coalesced"] == 1
+    for job in (first, second):
+        dashboard.wait_job(job, 10)
+        assert job["status"] == "succeeded"
+    # Le second n'a démarré qu'une fois le premier terminé
+    assert second["started_at"] >= first["finished_at"] - 0.05
+    assert "ok b" in second["output"]
+
+
+def test_other_kinds_run_in_parallel(dashboard, monkeypatch):
+    monkeypatch.setattr(dashboard, "BOT_COMMAND", sleeper(0.5))
+    start = time.time()
+    jobs = [dashboard.submit_job(kind, ["x"]) for kind in ("test-par-a", "test-par-b")]
+    for job in jobs:
+        dashboard.wait_job(job, 10)
+    assert time.time() - start < 0.95
+
+
+def test_scheduler_wait_is_bounded(dashboard, monkeypatch):
+    monkeypatch.setattr(dashboard, "BOT_COMMAND", sleeper(0))
+    monkeypatch.setattr(dashboard, "JOB_TIMEOUT", 0.3)
+    start = time.time()
+    # Un autre worker tient le verrou des jobs update: le job reste bloqué
+    with dashboard.process_lock("job-update"):
+        assert dashboard.update_cycles_auto() is False
+        assert time.time() - start < 2
+    job = next(job for job in dashboard.JOBS.values() if job["kind"] == "update")
+    dashboard.wait_job(job, 10)
+    assert job["finished_at"] is not None
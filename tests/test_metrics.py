@@ -0,0 +1,93 @@
+"""Exposition Prometheus de /metrics: syntaxe, histogrammes cumulés, échappement et jauges"""
+import re
+
+import pytest
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(?:[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*",?)*\})? (-?[0-9.e+-]+|[+-]Inf|NaN)$')
+
+
+@pytest.fixture
+def metrics(dashboard, monkeypatch):
+    # Registre vide: seules les observations du test apparaissent
+    monkeypatch.setattr(dashboard, "METRICS", {"histograms": {}, "counters": {}})
+    return dashboard
+
+
+def parse(text):
+    """Familles déclarées (# TYPE) et échantillons (nom, labels bruts, valeur)"""
+    families = {}
+    samples = []
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            families[name] = kind
+        elif line and not line.startswith("#"):
+            match = SAMPLE.match(line)
+            assert match, line
+            samples.append((match.group(1), match.group(2) or "", float(match.group(3))))
+    return families, samples
+
+
+def family_of(name, families):
+    for suffix in ("_bucket", "_sum", "_count"):
+        if name.endswith(suffix) and families.get(name[:-len(suffix)]) == "histogram":
+            return name[:-len(suffix)]
+    return name
+
+
+def test_exposition_is_well_formed(metrics):
+    client = metrics.app.test_client()
+    client.get("/api/performance")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    families, samples = parse(response.get_data(as_text=True))
+    assert samples
+    for name, _, _ in samples:
+        assert family_of(name, families) in families, name
+    assert any(name == "dashboard_http_request_duration_seconds_count" and 'route="/api/performance"' in labels for name, labels, _ in samples)
+
+
+def test_histogram_buckets_are_cumulative(metrics):
+    for value in (0.0005, 0.003, 0.003, 0.7, 100):
+        metrics.observe("dashboard_job_duration_seconds", value, kind="new")
+    _, samples = parse(metrics.render_metrics())
+    buckets = [(labels, value) for name, labels, value in samples if name == "dashboard_job_duration_seconds_bucket"]
+    counts = [value for _, value in buckets]
+    assert counts == sorted(counts)
+    assert dict(buckets)['{kind="new",le="0.001"}'] == 1
+    assert dict(buckets)['{kind="new",le="0.005"}'] == 3
+    assert dict(buckets)['{kind="new",le="+Inf"}'] == 5
+    totals = {name: value for name, _, value in samples if name.startswith("dashboard_job_duration_seconds_") and not name.endswith("_bucket")}
+    assert totals["dashboard_job_duration_seconds_count"] == 5
+    assert totals["dashboard_job_duration_seconds_sum"] == pytest.approx(100.7065, abs=1e-5)
+
+
+def test_label_values_are_escaped(metrics):
+    metrics.inc("dashboard_jobs_total", kind='quo"te\\back\nline', returncode=0)
+    text = metrics.render_metrics()
+    assert 'dashboard_jobs_total{kind="quo\\"te\\\\back\\nline",returncode="0"} 1' in text
+    parse(text)
+
+
+def test_cache_hit_ratio(metrics):
+    metrics.cache_event("snapshot_etag", True)
+    metrics.cache_event("snapshot_etag", False)
+    metrics.cache_event("snapshot_etag", False)
+    metrics.cache_event("gains_histogram", True)
+    _, samples = parse(metrics.render_metrics())
+    ratios = {labels: value for name, labels, value in samples if name == "dashboard_cache_hit_ratio"}
+    assert ratios == {'{cache="gains_histogram"}': 1, '{cache="snapshot_etag"}': pytest.approx(0.3333)}
+
+
+def test_sql_labels_are_bounded(metrics):
+    assert metrics.sql_label("SELECT id FROM cycles WHERE id > ?") == "SELECT cycles"
+    assert metrics.sql_label("insert into cycles_changelog (cycle_id) VALUES (1)") == "INSERT cycles_changelog"
+    assert metrics.sql_label("PRAGMA query_only = ON") == "PRAGMA"
+
+
+def test_disabled_metrics(metrics, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_ENABLED", False)
+    metrics.inc("dashboard_jobs_total", kind="new", returncode=0)
+    assert metrics.METRICS["counters"] == {}
+    assert metrics.app.test_client().get("/metrics").status_code == 404
@@ -0,0 +1,73 @@
+"""Courbe de performance: sous-échantillonnage LTTB et mode delta ?since_id="""
+import math
+import random
+
+import pytest
+
+
+def test_lttb_keeps_everything_below_threshold(dashboard):
+    values = [1, 5, 2, 8]
+    assert dashboard.lttb_indices(values, 10) == [0, 1, 2, 3]
+    assert dashboard.lttb_indices(values, 2) == [0, 1, 2, 3]
+
+
+@pytest.mark.parametrize("count, threshold", [(1000, 50), (101, 3), (257, 100)])
+def test_lttb_shape(dashboard, count, threshold):
+    rng = random.Random(count)
+    values = [math.sin(i / 20) * 100 + rng.uniform(-5, 5) for i in range(count)]
+    indices = dashboard.lttb_indices(values, threshold)
+    assert len(indices) == threshold
+    assert indices[0] == 0 and indices[-1] == count - 1
+    assert indices == sorted(set(indices))
+
+
+def test_lttb_keeps_spikes(dashboard):
+    values = [0.0] * 500
+    values[123] = 1000
+    values[377] = -1000
+    indices = dashboard.lttb_indices(values, 20)
+    assert 123 in indices and 377 in indices
+
+
+@pytest.fixture
+def curve(dashboard, cycles):
+    rng = random.Random(3)
+    with dashboard.write_db() as conn:
+        conn.executemany("INSERT INTO cycles (status, quantity, buyPrice, sellPrice) VALUES (?, 1, 100, ?)", [(rng.choice(["completed", "completed", "buy"]), rng.uniform(90, 120)) for _ in range(300)])
+    client = dashboard.app.test_client()
+    return client, client.get("/api/performance").get_json()
+
+
+def test_downsampled_route(dashboard, curve):
+    client, full = curve
+    sampled = client.get("/api/performance?points=40").get_json()
+    assert len(sampled) == 40
+    assert sampled[0] == full[0] and sampled[-1] == full[-1]
+    assert all(point in full for point in sampled)
+    columns = client.get("/api/performance?points=40&format=columns").get_json()
+    assert columns["cycle_id"] == [point["cycle_id"] for point in sampled]
+
+
+def test_since_id_delta(dashboard, curve):
+    client, full = curve
+    middle = full[len(full) // 2]
+    delta = client.get(f"/api/performance?since_id={middle['cycle_id']}").get_json()
+    assert delta["base_cumulative"] == middle["cumulative_gain"]
+    assert delta["last_id"] == full[-1]["cycle_id"]
+    assert full[:len(full) // 2 + 1] + delta["points"] == full
+    # Un since_id tombant sur un cycle non complété part du cycle complété suivant
+    k = next(k for k in range(len(full) - 1) if full[k + 1]["cycle_id"] - full[k]["cycle_id"] > 1)
+    between = client.get(f"/api/performance?since_id={full[k]['cycle_id'] + 1}").get_json()
+    assert between["base_cumulative"] == full[k]["cumulative_gain"]
+    assert between["points"] == full[k + 1:]
+    assert client.get(f"/api/performance?since_id={full[-1]['cycle_id']}").get_json()["points"] == []
+    start = client.get("/api/performance?since_id=0").get_json()
+    assert start["base_cumulative"] == 0 and start["points"] == full
+
+
+@pytest.mark.parametrize("query", ["since_id=abc", "points=many"])
+def test_invalid_arguments(dashboard, curve, query):
+    client, _ = curve
+    response = client.get(f"/api/performance?{query}")
+    assert response.status_code == 400
+    assert "invalid literal" not in response.get_json()["error"]
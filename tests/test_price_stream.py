@@ -0,0 +1,59 @@
+"""Flux de prix WebSocket contre un serveur local: abonnement, bid/ask, messages hors ordre"""
+import asyncio
+import importlib.util
+import json
+
+import pytest
+
+websockets = pytest.importorskip("websockets")
+
+
+@pytest.fixture
+def price_stream(dashboard, monkeypatch):
+    for key, value in {"price": 0, "bid": 0, "ask": 0, "updated_at": 0, "event_time": 0, "connected": False, "published_at": 0, "thread": None}.items():
+        monkeypatch.setitem(dashboard.PRICE_STREAM, key, value)
+    monkeypatch.setattr(dashboard, "publish_snapshot", lambda: None)
+    # Pas de publication dans l'état partagé: les autres tests ne doivent pas voir un prix frais
+    published = []
+    monkeypatch.setattr(dashboard, "state_set", lambda key, value: published.append((key, value)))
+    for key in ("data", "updated_at", "error"):
+        monkeypatch.setitem(dashboard.SNAPSHOT_SOURCES["price"], key, dashboard.SNAPSHOT_SOURCES["price"][key])
+    return published
+
+
+def test_session_against_local_server(dashboard, price_stream, monkeypatch):
+    stream = dashboard.PRICE_STREAM
+    received = []
+
+    async def handler(ws):
+        received.append(json.loads(await ws.recv()))
+        await ws.send(json.dumps({"d": {"b": "100", "a": "102"}, "t": 2}))
+        # Message plus ancien que le précédent: ignoré
+        await ws.send(json.dumps({"d": {"b": "1", "a": "1"}, "t": 1}))
+        await ws.send(json.dumps({"c": "spot@public.bookTicker.v3.api@BTCUSDT"}))
+
+    async def scenario():
+        async with websockets.serve(handler, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            monkeypatch.setattr(dashboard, "MEXC_WS_URL", f"ws://127.0.0.1:{port}")
+            # Le serveur ferme après ses messages: la session se termine par une exception (reconnexion côté appelant)
+            with pytest.raises(websockets.ConnectionClosed):
+                await asyncio.wait_for(dashboard._price_stream_session(websockets), timeout=5)
+
+    asyncio.run(scenario())
+    assert received == [{"method": "SUBSCRIPTION", "params": [dashboard.MEXC_WS_CHANNEL]}]
+    assert stream["connected"] is True
+    assert (stream["bid"], stream["ask"], stream["price"]) == (100, 102, 101)
+    assert stream["event_time"] == 2
+    assert price_stream == [("price_stream", {"price": 101, "bid": 100, "ask": 102, "updated_at": stream["updated_at"]})]
+    assert dashboard.stream_price_fresh()
+    assert dashboard.fetch_current_price() == 101
+    assert dashboard.SNAPSHOT_SOURCES["price"]["data"] == 101
+
+
+def test_missing_module_does_not_start_thread(dashboard, price_stream, monkeypatch):
+    find_spec = importlib.util.find_spec
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name, *args: None if name == "websockets" else find_spec(name, *args))
+    monkeypatch.setattr(dashboard, "PRICE_STREAM_ENABLED", True)
+    dashboard.start_price_stream()
+    assert dashboard.PRICE_STREAM["thread"] is None
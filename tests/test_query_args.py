@@ -0,0 +1,39 @@
+"""Paramètres de requête invalides: 400 avec un message lisible, jamais le texte brut d'une exception Python"""
+import pytest
+
+RAW_ERRORS = ("invalid literal", "int()", "isoformat", "could not convert")
+
+
+@pytest.mark.parametrize("url, name", [
+    ("/api/cycles?limit=abc", "limit"),
+    ("/api/cycles?cursor=1.5", "cursor"),
+    ("/api/gains-distribution?bins=abc", "bins"),
+    ("/api/gains-distribution?since_id=x", "since_id"),
+    ("/api/gains-distribution?until_id=x", "until_id"),
+    ("/api/gains-distribution?since=notadate", "since"),
+    ("/api/gains-distribution?until=2024-13-45", "until"),
+    ("/api/export/stream?since_id=abc", "since_id"),
+    ("/api/export/stream?after_id=abc", "after_id"),
+    ("/api/export/stream?since=notadate", "since"),
+])
+def test_invalid_arguments_are_rejected(dashboard, url, name):
+    response = dashboard.app.test_client().get(url)
+    assert response.status_code == 400
+    error = response.get_json()["error"]
+    assert error.startswith(name)
+    assert not any(raw in error for raw in RAW_ERRORS)
+
+
+def test_valid_arguments_still_accepted(dashboard, cycles):
+    cycles([("completed", "2024-01-01 00:00:00", "2024-01-02 00:00:00")] * 3)
+    client = dashboard.app.test_client()
+    page = client.get("/api/cycles?limit=2&order=asc").get_json()
+    assert len(page["cycles"]) == 2
+    assert client.get(f"/api/cycles?cursor={page['cycles'][0]['id']}").status_code == 200
+    histogram = client.get("/api/gains-distribution?bins=4&since=2024-01-01&until=1900000000").get_json()
+    assert histogram["total"] == 3
+
+
+def test_empty_arguments_are_ignored(dashboard):
+    assert dashboard.int_arg("", "limit") is None
+    assert dashboard.parse_time_arg("") is None
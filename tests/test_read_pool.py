@@ -0,0 +1,34 @@
+"""Pool de connexions de lecture: une connexion n'y revient que si elle est propre"""
+import sqlite3
+
+import pytest
+
+
+def drain(dashboard):
+    while not dashboard.DB_READ_POOL.empty():
+        dashboard.DB_READ_POOL.get_nowait().close()
+
+
+def test_connection_returns_after_application_error(dashboard):
+    drain(dashboard)
+    with pytest.raises(KeyError):
+        with dashboard.read_db() as conn:
+            conn.execute("SELECT 1").fetchone()
+            raise KeyError("x")
+    assert dashboard.DB_READ_POOL.get_nowait() is conn
+
+
+def test_connection_left_in_transaction_is_discarded(dashboard):
+    drain(dashboard)
+    with dashboard.read_db() as conn:
+        conn.execute("BEGIN")
+    assert dashboard.DB_READ_POOL.empty()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+
+
+def test_closed_connection_is_not_pooled(dashboard):
+    drain(dashboard)
+    with dashboard.read_db() as conn:
+        conn.close()
+    assert dashboard.DB_READ_POOL.empty()
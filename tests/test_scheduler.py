@@ -0,0 +1,59 @@
+"""Planificateur du mode auto: écritures partagées et rattrapage des échéances"""
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def auto(dashboard, monkeypatch, tmp_path):
+    """Mode auto actif (60 min, politique catchup) et création de cycle remplacée par un compteur"""
+    monkeypatch.setattr(dashboard, "AUTO_CONFIG_FILE", str(tmp_path / "auto_config.json"))
+    created = []
+    monkeypatch.setattr(dashboard, "create_cycle_auto", lambda: created.append(datetime.now()) or True)
+    now = datetime.now()
+    monkeypatch.setattr(dashboard, "AUTO_STATE", {**dashboard.AUTO_STATE, "enabled": True, "interval_minutes": 60, "catchup_policy": "catchup", "jitter_seconds": 0, "last_cycle_time": (now - timedelta(minutes=30)).isoformat(), "next_cycle_time": (now + timedelta(minutes=30)).isoformat()})
+    dashboard.state_set("auto", dict(dashboard.AUTO_STATE))
+    monkeypatch.setitem(dashboard.AUTO_SCHEDULER, "started_at", now.timestamp())
+    return created
+
+
+def test_scheduler_keeps_changes_made_during_create(dashboard, auto, monkeypatch):
+    def create_while_stopped_elsewhere():
+        # Un autre worker arrête le mode auto et change l'intervalle pendant le job de création
+        dashboard.state_set("auto", {**dashboard.state_get("auto"), "enabled": False, "interval_minutes": 15})
+        return True
+    monkeypatch.setattr(dashboard, "create_cycle_auto", create_while_stopped_elsewhere)
+    dashboard._run_auto_create(datetime.now().timestamp())
+    shared = dashboard.state_get("auto")
+    assert shared["enabled"] is False
+    assert shared["interval_minutes"] == 15
+    assert dashboard.AUTO_STATE["enabled"] is False
+    assert datetime.fromisoformat(shared["last_cycle_time"]) > datetime.now() - timedelta(seconds=5)
+
+
+def test_shorter_interval_creates_a_single_cycle(dashboard, auto):
+    client = dashboard.app.test_client()
+    response = client.post("/api/auto-config", json={"interval_minutes": 10})
+    assert response.get_json()["success"]
+    due = datetime.fromisoformat(dashboard.AUTO_STATE["next_cycle_time"])
+    # Dernier cycle il y a 30 min: l'échéance last + 10 min est passée, elle est ramenée à maintenant
+    assert due >= datetime.now() - timedelta(seconds=5)
+    dashboard._run_auto_create(due.timestamp())
+    assert len(auto) == 1
+    assert datetime.fromisoformat(dashboard.AUTO_STATE["next_cycle_time"]) > datetime.now() + timedelta(minutes=9)
+
+
+def test_late_run_without_downtime_creates_a_single_cycle(dashboard, auto, monkeypatch):
+    due = datetime.now().timestamp() - 35 * 60
+    # Échéance posée après le démarrage du planificateur (un job bloquant l'a retardée)
+    monkeypatch.setitem(dashboard.AUTO_SCHEDULER, "started_at", due - 1)
+    dashboard.AUTO_STATE["interval_minutes"] = 10
+    dashboard._run_auto_create(due)
+    assert len(auto) == 1
+
+
+def test_downtime_before_startup_is_caught_up(dashboard, auto):
+    dashboard.AUTO_STATE["interval_minutes"] = 10
+    # Échéance manquée de 35 min pendant l'arrêt: 3 échéances sautées + celle en cours
+    dashboard._run_auto_create(datetime.now().timestamp() - 35 * 60)
+    assert len(auto) == 4
@@ -0,0 +1,62 @@
+"""/api/data: attente bornée des sources et flag stale"""
+import threading
+import time
+
+
+def test_slow_source_returns_partial_payload(dashboard, monkeypatch):
+    release = threading.Event()
+    sources = {name: {**source, "data": None, "updated_at": 0, "error": None, "running": False, "forced": False} for name, source in dashboard.SNAPSHOT_SOURCES.items()}
+    monkeypatch.setattr(dashboard, "SNAPSHOT_SOURCES", sources)
+    monkeypatch.setattr(dashboard, "SNAPSHOT_READY", threading.Event())
+    monkeypatch.setattr(dashboard, "SNAPSHOT_MAX_WAIT", 0.5)
+    monkeypatch.setitem(dashboard.SNAPSHOT, "current", None)
+    monkeypatch.setitem(dashboard.SNAPSHOT, "thread", object())
+    monkeypatch.setitem(dashboard.SNAPSHOT_FETCHERS, "price", lambda: 50000.0)
+    monkeypatch.setitem(dashboard.SNAPSHOT_FETCHERS, "balances", lambda: release.wait(10) and {"usdc": 1, "btc": 2})
+    for name in sources:
+        sources[name]["running"] = True
+        dashboard.SNAPSHOT_EXECUTOR.submit(dashboard._refresh_source, name)
+    client = dashboard.app.test_client()
+    start = time.perf_counter()
+    response = client.get("/api/data")
+    assert time.perf_counter() - start < 3
+    data = response.get_json()
+    # Les balances ne sont pas arrivées: réponse partielle signalée, le reste est servi
+    assert data["stale"] is True
+    assert data["sources"]["balances"]["stale"] is True
+    assert data["sources"]["price"]["stale"] is False
+    assert data["balances"]["btc_price"] == 50000.0
+    release.set()
+    for _ in range(50):
+        if dashboard.SNAPSHOT_READY.is_set():
+            break
+        time.sleep(0.05)
+    fresh = client.get("/api/data", headers={"If-None-Match": response.headers["ETag"]})
+    assert fresh.status_code == 200
+    assert fresh.get_json()["stale"] is False
+
+
+def test_failing_price_source_is_reported(dashboard, monkeypatch):
+    sources = {name: {**source, "data": None, "updated_at": 0, "error": None, "running": False, "forced": False} for name, source in dashboard.SNAPSHOT_SOURCES.items()}
+    monkeypatch.setattr(dashboard, "SNAPSHOT_SOURCES", sources)
+    monkeypatch.setitem(dashboard.BTC_PRICE_CACHE, "price", 0)
+    monkeypatch.setitem(dashboard.BTC_PRICE_CACHE, "timestamp", 0)
+    monkeypatch.setitem(dashboard.PRICE_STREAM, "price", 0)
+
+    def unreachable():
+        raise ConnectionError("CoinGecko injoignable")
+    monkeypatch.setattr(dashboard, "_request_btc_price", unreachable)
+    dashboard._refresh_source("price")
+    # L'échec est conservé: pas de prix 0 présenté comme frais
+    assert sources["price"]["error"] == "CoinGecko injoignable"
+    assert sources["price"]["updated_at"] == 0
+    snapshot = dashboard.SNAPSHOT["current"]
+    price = next(source for source in snapshot.sources if source[0] == "price")
+    assert dashboard.source_stale(*price[:2], time.time())
+    ready = threading.Event()
+    ready.set()
+    monkeypatch.setattr(dashboard, "SNAPSHOT_READY", ready)
+    monkeypatch.setitem(dashboard.SNAPSHOT, "thread", object())
+    data = dashboard.app.test_client().get("/api/data").get_json()
+    assert data["stale"] is True
+    assert data["sources"]["price"]["error"] == "CoinGecko injoignable"
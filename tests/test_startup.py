@@ -0,0 +1,36 @@
+"""Préchauffage en arrière-plan: /api/ready reflète l'état réel du worker"""
+import threading
+
+
+def test_ready_is_503_while_warming_up(dashboard, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(dashboard, "WARMUP_ENABLED", True)
+    monkeypatch.setattr(dashboard, "WARMUP_STEPS", [("slow", release.wait)])
+    monkeypatch.setattr(dashboard, "ensure_bot_binary", lambda: None)
+    monkeypatch.setattr(dashboard, "ensure_snapshot_refresher", lambda: None)
+    monkeypatch.setattr(dashboard, "STARTUP_READY", threading.Event())
+    monkeypatch.setitem(dashboard.STARTUP, "warmup_thread", None)
+    monkeypatch.setitem(dashboard.STARTUP, "steps", [])
+    client = dashboard.app.test_client()
+    # start_warm_up ne bloque pas: la sonde voit le préchauffage en cours
+    dashboard.start_warm_up()
+    response = client.get("/api/ready")
+    assert response.status_code == 503
+    assert response.get_json()["ready"] is False
+    release.set()
+    dashboard.STARTUP["warmup_thread"].join(5)
+    response = client.get("/api/ready")
+    assert response.status_code == 200
+    assert any(step["step"] == "warmup_slow" for step in response.get_json()["steps"])
+
+
+def test_read_connection_uri_escapes_path(dashboard, monkeypatch, tmp_path):
+    import sqlite3
+    folder = tmp_path / "base #1?"
+    folder.mkdir()
+    with sqlite3.connect(folder / "bot.db") as conn:
+        conn.execute("CREATE TABLE t (x)")
+    monkeypatch.setattr(dashboard, "DB_PATH", str(folder / "bot.db"))
+    conn = dashboard._open_read_connection()
+    assert conn.execute("SELECT name FROM sqlite_master").fetchone()[0] == "t"
+    conn.close()
@@ -0,0 +1,22 @@
+"""Flux SSE: deltas de cycles lus par paquets"""
+import json
+import queue
+
+
+def test_large_change_set_is_chunked(dashboard, cycles, monkeypatch):
+    with dashboard.read_db() as conn:
+        seq = dashboard.read_changes(conn, None)[0]
+    count = 2 * dashboard.SQL_IN_CHUNK + 10
+    cycles([("buy", "2024-01-01 00:00:00", None)] * count)
+    subscriber = queue.Queue()
+    monkeypatch.setattr(dashboard, "STREAM_SUBSCRIBERS", [subscriber])
+    with dashboard.read_db() as conn:
+        dashboard._stream_cycle_changes(conn, seq)
+    events = []
+    while not subscriber.empty():
+        event, data = subscriber.get_nowait().strip().split("\n")
+        assert event == "event: cycles"
+        events.append(json.loads(data[len("data: "):]))
+    assert len(events) == 3
+    assert sum(len(event["changed"]) for event in events) == count
+    assert not any(event["deleted"] for event in events)
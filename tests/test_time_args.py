@@ -0,0 +1,36 @@
+"""Bornes since/until: même référence UTC que les dates texte lues par SQLite"""
+import time
+
+import pytest
+
+
+@pytest.fixture(params=["UTC", "Europe/Paris", "America/New_York"])
+def local_timezone(request, monkeypatch):
+    # Le résultat ne doit pas dépendre du fuseau du serveur
+    monkeypatch.setenv("TZ", request.param)
+    time.tzset()
+    yield request.param
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_naive_dates_are_utc(dashboard, local_timezone):
+    assert dashboard.parse_time_arg("2024-01-31") == 1706659200
+    assert dashboard.parse_time_arg("2024-07-01T12:30:00") == 1719837000
+
+
+def test_explicit_offset_is_kept(dashboard, local_timezone):
+    assert dashboard.parse_time_arg("2024-07-01T14:30:00+02:00") == 1719837000
+    assert dashboard.parse_time_arg("2024-07-01T12:30:00+00:00") == 1719837000
+
+
+def test_numbers_and_empty_values(dashboard):
+    assert dashboard.parse_time_arg("1719837000") == 1719837000
+    assert dashboard.parse_time_arg("") is None
+    assert dashboard.parse_time_arg(None) is None
+
+
+def test_bounds_match_sql_epoch(dashboard, local_timezone):
+    with dashboard.read_db() as conn:
+        sql_epoch = conn.execute(f"SELECT {dashboard.epoch_sql('stamp')} FROM (SELECT '2024-07-01 12:30:00' AS stamp)").fetchone()[0]
+    assert dashboard.parse_time_arg("2024-07-01 12:30:00") == sql_epoch